@@ -0,0 +1,119 @@
+"""
+Tail latency under overload, with and without adaptive admission control.
+
+Simulates a worker whose requests slow down as more run at once, like
+chat pipelines and scrapes sharing one event loop, CPU and upstream
+bandwidth. Requests arrive faster than the worker can serve them. The
+same arrival schedule is replayed with no limit and through an
+AdaptiveLimiter. For each run it reports latency percentiles of the
+completed requests and the share shed with 503.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_admission --requests 2000 --rate 400
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from fastapi import HTTPException
+
+from src.core.admission import AdaptiveLimiter
+
+
+class SimulatedWorker:
+    """Service time grows linearly once more than `capacity` requests run at once"""
+
+    def __init__(self, capacity: int, service_time: float):
+        self.capacity = capacity
+        self.service_time = service_time
+        self.running = 0
+
+    async def handle(self) -> None:
+        self.running += 1
+        try:
+            await asyncio.sleep(self.service_time * max(1.0, self.running / self.capacity))
+        finally:
+            self.running -= 1
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(q * len(values)))], 4)
+
+
+async def run(arrivals, worker: SimulatedWorker, limiter=None) -> dict:
+    latencies = []
+    shed = 0
+
+    async def request():
+        nonlocal shed
+        started = time.perf_counter()
+        permit = None
+        if limiter is not None:
+            try:
+                permit = await limiter.acquire()
+            except HTTPException:
+                shed += 1
+                return
+        try:
+            await worker.handle()
+        finally:
+            if permit is not None:
+                permit.release()
+        latencies.append(time.perf_counter() - started)
+
+    tasks = []
+    origin = time.perf_counter()
+    for at in arrivals:
+        delay = at - (time.perf_counter() - origin)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(request()))
+    await asyncio.gather(*tasks)
+    return {
+        "completed": len(latencies),
+        "shed_share": round(shed / len(arrivals), 3),
+        "p50_seconds": percentile(latencies, 0.5),
+        "p99_seconds": percentile(latencies, 0.99),
+        "max_seconds": percentile(latencies, 1.0),
+        "final_limit": round(limiter.limit, 1) if limiter else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=400, help="arrivals per second")
+    parser.add_argument("--capacity", type=int, default=20, help="requests served at full speed at once")
+    parser.add_argument("--service-time", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    arrivals, at = [], 0.0
+    for _ in range(args.requests):
+        at += rng.expovariate(args.rate)
+        arrivals.append(at)
+
+    target = args.service_time * 2
+    unlimited = asyncio.run(run(arrivals, SimulatedWorker(args.capacity, args.service_time)))
+    limited = asyncio.run(run(
+        arrivals,
+        SimulatedWorker(args.capacity, args.service_time),
+        AdaptiveLimiter("bench", initial=8, max_limit=200, target_latency=target, queue_timeout=target),
+    ))
+    print(json.dumps({
+        "requests": args.requests,
+        "arrival_rate": args.rate,
+        "worker_capacity_per_second": round(args.capacity / args.service_time, 1),
+        "no_limit": unlimited,
+        "adaptive_limit": limited,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
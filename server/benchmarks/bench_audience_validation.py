@@ -0,0 +1,72 @@
+"""
+Validation time and memory for large bulk-email audiences.
+
+Compares per-recipient pydantic models (List[EmailRecipient] with EmailStr)
+against the batched, columnar Recipients path used by BulkEmailSchema.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_audience_validation --recipients 100000
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from typing import List
+
+from pydantic import TypeAdapter
+
+from src.api.email.schema import BulkEmailSchema, EmailRecipient
+
+
+def build_request(recipients: int) -> dict:
+    return {
+        "time": "2026-01-01T09:00:00",
+        "message": "Stock clearance offer",
+        "channel": "email",
+        "audience": [
+            {"email": f"customer{i}@example.com", "name": f"Customer {i}"}
+            for i in range(recipients)
+        ],
+    }
+
+
+def measure(fn) -> dict:
+    """Wall time of one call, and peak traced memory of a second traced call"""
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {"seconds": round(elapsed, 4), "peak_mb": round(peak / 2**20, 2)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipients", type=int, default=100_000)
+    args = parser.parse_args()
+
+    request = build_request(args.recipients)
+    per_model = TypeAdapter(List[EmailRecipient])
+
+    def pydantic_path():
+        audience = per_model.validate_python(request["audience"])
+        # The old service then copied every model into a dict for Celery
+        return [{"email": r.email, "name": r.name} for r in audience]
+
+    def columnar_path():
+        return BulkEmailSchema.model_validate(request).audience.to_payload()
+
+    results = {
+        "recipients": args.recipients,
+        "pydantic_models": measure(pydantic_path),
+        "columnar": measure(columnar_path),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Enqueue cost and broker footprint of bulk-email task messages.
+
+Compares the legacy JSON list-of-dicts message, the columnar msgpack+zstd
+message and the claim-check reference. With --redis the messages are also
+published to the broker at REDIS_URL and the queue's memory is read back
+with MEMORY USAGE.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_celery_payload --recipients 1000000
+    python -m benchmarks.bench_celery_payload --recipients 1000000 --redis
+"""
+import argparse
+import json
+import os
+import time
+
+# Keep the claim-check blobs in-process unless a real Redis is requested
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+
+from kombu.serialization import dumps  # noqa: E402
+
+from src.api.email.audience import Recipients  # noqa: E402
+from src.core import codec  # noqa: E402
+
+
+def task_kwargs(recipients) -> dict:
+    return {
+        "campaign_id": "bench",
+        "subject": "Email Campaign - bench",
+        "body": "Stock clearance offer",
+        "from_email": "noreply@example.com",
+        "from_name": "Marketing Team",
+        "recipients": recipients,
+    }
+
+
+def measure_encoding(name: str, build, serializer: str) -> dict:
+    """Time to build the task argument plus serialize the message body"""
+    start = time.perf_counter()
+    _, _, body = dumps(((), task_kwargs(build()), {}), serializer=serializer)
+    elapsed = time.perf_counter() - start
+    return {"variant": name, "serialize_ms": round(elapsed * 1e3, 2), "message_bytes": len(body)}
+
+
+def measure_redis(audience: Recipients, serializer: str, messages: int) -> dict:
+    """Publish real task messages and read back enqueue latency and queue memory"""
+    from src.api.email.tasks import send_bulk_email_task
+    from src.core.storage import get_redis
+
+    client = get_redis()
+    queue = "bench_celery_payload"
+    client.delete(queue)
+
+    latencies = []
+    for _ in range(messages):
+        start = time.perf_counter()
+        send_bulk_email_task.apply_async(
+            kwargs=task_kwargs(audience.to_task_payload()),
+            queue=queue,
+            serializer=serializer,
+        )
+        latencies.append(time.perf_counter() - start)
+
+    memory = client.memory_usage(queue) or 0
+    client.delete(queue)
+    return {
+        "serializer": serializer,
+        "messages": messages,
+        "enqueue_ms_avg": round(sum(latencies) / len(latencies) * 1e3, 2),
+        "queue_memory_bytes": memory,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipients", type=int, default=1_000_000)
+    parser.add_argument("--redis", action="store_true", help="publish to REDIS_URL")
+    parser.add_argument("--messages", type=int, default=5)
+    args = parser.parse_args()
+
+    codec.register_with_kombu()
+    audience = Recipients(
+        [f"customer{i}@example.com" for i in range(args.recipients)],
+        [f"Customer {i}" for i in range(args.recipients)],
+    )
+
+    results = {
+        "recipients": args.recipients,
+        "encoding": [
+            measure_encoding("json list of dicts", lambda: [
+                {"email": email, "name": name} for email, name in audience
+            ], "json"),
+            measure_encoding("json columnar", audience.to_payload, "json"),
+            measure_encoding("msgpack-zstd columnar", audience.to_payload, codec.CODEC_NAME),
+            measure_encoding("msgpack-zstd claim check", audience.to_task_payload, codec.CODEC_NAME),
+        ],
+    }
+
+    if args.redis:
+        results["redis"] = [
+            measure_redis(audience, "json", args.messages),
+            measure_redis(audience, codec.CODEC_NAME, args.messages),
+        ]
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
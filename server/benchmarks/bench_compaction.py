@@ -0,0 +1,78 @@
+"""
+Size of website data handed to the generator, before and after compaction.
+
+Measures a crawl of the local fixture site and a synthetic storefront page
+with the repeated navigation, footer and product-card markup typical of
+real shops.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_compaction --products 500
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.fixtures.servers import FixtureSite
+from src.api.source.compaction import SOURCE_BYTE_BUDGET, compact_blocks, compact_crawl
+from src.api.source.crawler import crawl_website
+from src.api.source.service import parse_page
+from src.core.serialization import dumps_bytes
+
+NAV = "".join(f'<li><a href="/c/{i}">Category {i}</a></li>' for i in range(40))
+FOOTER = "".join(f'<li><a href="/help/{i}">Help topic {i}</a></li>' for i in range(20))
+
+
+def storefront_html(products: int) -> str:
+    cards = "".join(
+        f"""<div class="card">
+          <h3>Product {i % 50}</h3>
+          <p>Free delivery on orders over $75. Free returns within 30 days.</p>
+          <ul><li>Add to cart</li><li>Add to wishlist</li></ul>
+          <a href="/p/{i}">View Product {i % 50}</a>
+        </div>"""
+        for i in range(products)
+    )
+    return f"""<html><body>
+      <nav><ul>{NAV}</ul></nav><nav class="mobile"><ul>{NAV}</ul></nav>
+      <h1>Summer sale</h1><p>Up to 40% off outdoor planters.</p>
+      {cards}
+      <footer><ul>{FOOTER}</ul><p>© 2024 Example Store. All rights reserved.</p></footer>
+    </body></html>"""
+
+
+def measure(raw, compact) -> dict:
+    start = time.perf_counter()
+    compacted = compact(raw)
+    elapsed = time.perf_counter() - start
+    before, after = len(dumps_bytes(raw)), len(dumps_bytes(compacted))
+    return {
+        "bytes_before": before,
+        "bytes_after": after,
+        "reduction": round(1 - after / before, 4),
+        "approx_tokens_before": before // 4,
+        "approx_tokens_after": after // 4,
+        "compaction_ms": round(elapsed * 1e3, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=500)
+    args = parser.parse_args()
+
+    blocks, _ = parse_page(storefront_html(args.products))
+    with FixtureSite() as site:
+        crawl = asyncio.run(crawl_website(f"{site.url}/", max_pages=50, max_depth=3))
+
+    results = {
+        "byte_budget": SOURCE_BYTE_BUDGET,
+        "storefront_page": measure(blocks, compact_blocks),
+        # Crawl stats are metadata, not content; leave them out of both sides
+        "fixture_crawl": measure({"url": crawl["url"], "pages": crawl["pages"]}, compact_crawl),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Fetch time for a large Facebook page through the Graph stub server.
+
+Serves src.api.source.graph_stub locally with a per-request delay and
+fetches one big page's newest posts over HTTP. It compares a single
+sequential cursor walk with windowed fetching at several prefetch depths.
+It then measures a cached read and an incremental sync after new posts
+are published.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_facebook --posts 5000 --max-posts 2000 --latency 0.02
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=5000, help="posts on the stub page")
+    parser.add_argument("--max-posts", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.02, help="stub delay per request (seconds)")
+    parser.add_argument("--published", type=int, default=5, help="posts published before the incremental sync")
+    args = parser.parse_args()
+
+    # The stub reads these at import
+    os.environ["FACEBOOK_STUB_POSTS"] = str(args.posts)
+    os.environ["FACEBOOK_STUB_LATENCY"] = str(args.latency)
+
+    import httpx
+
+    from benchmarks.fixtures.servers import ApiServer
+    from src.api.source import facebook, graph_stub
+
+    url = "https://facebook.com/bench-page"
+    page_id = facebook.page_id_from_url(url)
+    graph_stub.get_stub_page(page_id)  # generate the page before timing
+
+    async def timed_fetch(windows: int, prefetch: int) -> dict:
+        facebook.FACEBOOK_WINDOWS, facebook.FACEBOOK_PREFETCH = windows, prefetch
+        facebook._cache.clear()
+        start = time.perf_counter()
+        result = await facebook.fetch_facebook_page(url, args.max_posts)
+        return {
+            "seconds": round(time.perf_counter() - start, 3),
+            "posts": result["total_posts"],
+            "requests": result["sync"]["requests"],
+        }
+
+    async def scenario(server_url: str) -> dict:
+        facebook._provider = facebook.HttpGraphProvider(server_url)
+        results = {
+            "sequential_cursor": await timed_fetch(1, 1),
+            "windows_12_prefetch_1": await timed_fetch(12, 1),
+            "windows_12_prefetch_4": await timed_fetch(12, 4),
+            "windows_12_prefetch_8": await timed_fetch(12, 8),
+        }
+
+        start = time.perf_counter()
+        await facebook.fetch_facebook_page(url, args.max_posts)
+        results["cached_seconds"] = round(time.perf_counter() - start, 4)
+
+        async with httpx.AsyncClient() as client:
+            for i in range(args.published):
+                await client.post(f"{server_url}/v19.0/{page_id}/feed",
+                                  params={"access_token": "bench"}, json={"message": f"Fresh post {i}"})
+        facebook.FACEBOOK_CACHE_TTL = 0
+        start = time.perf_counter()
+        synced = await facebook.fetch_facebook_page(url, args.max_posts)
+        results["incremental_sync"] = {
+            "seconds": round(time.perf_counter() - start, 3),
+            "new_posts": synced["sync"]["new_posts"],
+            "requests": synced["sync"]["requests"],
+        }
+        return results
+
+    with ApiServer(graph_stub.app) as server:
+        results = asyncio.run(scenario(server.url))
+
+    print(json.dumps({
+        "page_posts": args.posts,
+        "max_posts": args.max_posts,
+        "stub_latency": args.latency,
+        **results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
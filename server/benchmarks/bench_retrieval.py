@@ -0,0 +1,84 @@
+"""
+Context size and latency of BM25 retrieval over large fetched sources.
+
+Builds the chat pipeline's source index over a synthetic CRM export, a
+large storefront page and a Facebook page. It reports index build and
+query time, and the context handed to the generator compared with the
+full source data.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_retrieval --customers 10000 --products 2000
+"""
+import argparse
+import json
+import statistics
+import time
+
+from benchmarks.bench_compaction import storefront_html
+from src.api.source.service import get_crm_mock_data, get_facebook_page_mock_data, parse_page
+from src.api.stream.retrieval import SourceIndex
+from src.core.serialization import dumps_bytes
+
+QUERIES = [
+    "Which VIP customers bought the cloud storage plan?",
+    "What summer sale offers are on the website?",
+    "Which Facebook posts got the most engagement?",
+    "customers who prefer sms",
+]
+
+
+def build_sources(customers: int, products: int) -> dict:
+    crm = get_crm_mock_data()
+    base = crm["customers"]
+    crm["customers"] = [
+        {**base[i % len(base)], "customer_id": f"CUST-{i}"} for i in range(customers)
+    ]
+    blocks, _ = parse_page(storefront_html(products))
+    return {
+        "crm_data": crm,
+        "website_data": blocks,
+        "facebook_data": get_facebook_page_mock_data("https://facebook.com/bench"),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--customers", type=int, default=10_000)
+    parser.add_argument("--products", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    sources = build_sources(args.customers, args.products)
+
+    start = time.perf_counter()
+    index = SourceIndex.build(sources)
+    build_seconds = time.perf_counter() - start
+
+    per_query = {}
+    for query in QUERIES:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            context = index.search(query)
+            timings.append(time.perf_counter() - start)
+        context_bytes = len(dumps_bytes(context))
+        per_query[query] = {
+            "fragments": len(context),
+            "sources": sorted({fragment["source"] for fragment in context}),
+            "context_bytes": context_bytes,
+            "search_ms": round(statistics.median(timings) * 1e3, 3),
+        }
+
+    results = {
+        "fragments_indexed": len(index),
+        "terms_indexed": len(index.postings),
+        "source_bytes": index.source_bytes,
+        "approx_source_tokens": index.source_bytes // 4,
+        "index_build_ms": round(build_seconds * 1e3, 3),
+        "queries": per_query,
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
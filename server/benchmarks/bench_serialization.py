@@ -0,0 +1,78 @@
+"""
+Per-event and per-response CPU cost of the JSON serialization paths.
+
+Compares stdlib json + FastAPI's jsonable_encoder/JSONResponse against the
+orjson-backed path enabled with FAST_JSON=1, on a large CRM payload.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_serialization --customers 5000
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from src.api.source.service import get_crm_mock_data
+
+
+def build_crm_payload(customers: int) -> dict:
+    """Concatenate mock CRM batches until the requested size is reached"""
+    payload = get_crm_mock_data()
+    while len(payload["customers"]) < customers:
+        payload["customers"].extend(get_crm_mock_data()["customers"])
+    payload["customers"] = payload["customers"][:customers]
+    payload["total_customers"] = customers
+    return payload
+
+
+def cpu_cost(fn, repeat: int) -> float:
+    """Average CPU seconds per call"""
+    fn()  # warm up
+    start = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return (time.process_time() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--customers", type=int, default=5000)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--responses", type=int, default=20)
+    args = parser.parse_args()
+
+    payload = build_crm_payload(args.customers)
+    chunk_event = {
+        "type": "chunk",
+        "content": "Access multiple data sources simultaneously and stream results",
+        "progress": 42.5,
+        "chunk_number": 12,
+        "timestamp": datetime.now().isoformat(),
+    }
+
+    results = {
+        "customers": args.customers,
+        "payload_bytes": len(orjson.dumps(payload)),
+        "sse_event_us": {
+            "json": cpu_cost(lambda: {"data": json.dumps(chunk_event)}, args.events) * 1e6,
+            "orjson": cpu_cost(
+                lambda: {"data": orjson.dumps(chunk_event).decode()}, args.events
+            ) * 1e6,
+        },
+        "crm_response_ms": {
+            "jsonable_encoder+JSONResponse": cpu_cost(
+                lambda: JSONResponse(jsonable_encoder(payload)), args.responses
+            ) * 1e3,
+            "JSONResponse": cpu_cost(lambda: JSONResponse(payload), args.responses) * 1e3,
+            "ORJSONResponse": cpu_cost(lambda: ORJSONResponse(payload), args.responses) * 1e3,
+        },
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
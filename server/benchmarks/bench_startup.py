@@ -0,0 +1,84 @@
+"""
+Cold import time of the API for each deployment role.
+
+For each APP_ROLE, runs `python -X importtime -c "import src.main"` in a
+fresh interpreter several times. It reports the median total import time
+and which deferred modules (Celery, the task modules, httpx, bs4, redis)
+were loaded at startup anyway. The time to import those deferred modules
+on first use is measured the same way. With --budget, it exits non-zero
+when a role's median exceeds that many seconds, so CI can track startup
+regressions.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_startup --runs 5 --budget 2.0
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROLES = ["all", "stream", "source", "email"]
+DEFERRED = ["celery", "src.celery_app", "src.api.email.tasks", "src.api.channels.tasks", "httpx", "bs4", "redis"]
+
+PROBE = (
+    "import sys, {module}; "
+    "print(','.join(name for name in {deferred!r} if name in sys.modules))"
+)
+
+
+def import_time(module: str, env: dict) -> tuple:
+    """(seconds to import `module` in a fresh interpreter, deferred modules it loaded)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module, deferred=DEFERRED)],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    # stderr lines: "import time: self [us] | cumulative | name"; the module's own line is last
+    for line in reversed(result.stderr.splitlines()):
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            loaded = [name for name in result.stdout.strip().split(",") if name]
+            return int(parts[1]) / 1e6, loaded
+    raise RuntimeError(f"No importtime line for {module}")
+
+
+def measure(module: str, env: dict, runs: int) -> dict:
+    samples = [import_time(module, env) for _ in range(runs)]
+    return {
+        "median_seconds": round(statistics.median(seconds for seconds, _ in samples), 3),
+        "deferred_loaded": samples[-1][1],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=None, help="max median seconds per role")
+    args = parser.parse_args()
+
+    base = {
+        **os.environ,
+        "PYTHONPATH": os.getcwd(),
+        "STORAGE_BACKEND": "memory",
+        "LOG_LEVEL": "WARNING",
+    }
+    roles = {role: measure("src.main", {**base, "APP_ROLE": role}, args.runs) for role in ROLES}
+    deferred = {
+        module: measure(module, base, args.runs)["median_seconds"]
+        for module in ["src.api.email.tasks", "httpx", "bs4", "redis"]
+    }
+    over = [role for role, result in roles.items() if args.budget and result["median_seconds"] > args.budget]
+    print(json.dumps({
+        "runs": args.runs,
+        "budget_seconds": args.budget,
+        "roles": roles,
+        "deferred_first_use_seconds": deferred,
+        "over_budget": over,
+    }, indent=2))
+    if over:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Screening time for large audiences against a large suppression list.
+
+Times the dedupe and suppression pass that runs before enqueueing, for a
+1M-recipient audience with duplicates against a 1M-entry bounce and
+unsubscribe list. A plain per-address set lookup is shown for comparison.
+That version gives no duplicate handling or shared store.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_suppression --recipients 1000000 --suppressed 1000000
+"""
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+
+from src.api.email.audience import Recipients  # noqa: E402
+from src.core.suppression import get_suppression_list  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipients", type=int, default=1_000_000)
+    parser.add_argument("--suppressed", type=int, default=1_000_000)
+    parser.add_argument("--duplicate-rate", type=float, default=0.02)
+    parser.add_argument("--suppressed-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    # Every 1/rate-th recipient is on the suppression list; duplicates repeat earlier ones
+    suppressed_every = max(1, int(1 / args.suppressed_rate))
+    duplicate_every = max(1, int(1 / args.duplicate_rate))
+    emails = [
+        f"Customer{i - 1 if i % duplicate_every == 0 else i}@Example.com"
+        for i in range(args.recipients)
+    ]
+    audience = Recipients(emails, [f"Customer {i}" for i in range(args.recipients)])
+
+    suppression = get_suppression_list("email")
+    start = time.perf_counter()
+    suppression.add(f"bounce{i}@example.com" for i in range(args.suppressed))
+    suppression.add(f"customer{i}@example.com" for i in range(0, args.recipients, suppressed_every))
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    kept, duplicates, suppressed = audience.screen()
+    screen_seconds = time.perf_counter() - start
+
+    exact = {address.lower() for address in suppression.store.scan()}
+    start = time.perf_counter()
+    naive = [address for address in emails if address.lower() not in exact]
+    naive_seconds = time.perf_counter() - start
+
+    print(json.dumps({
+        "recipients": args.recipients,
+        "suppression_list": suppression.store.count(),
+        "load_seconds": round(load_seconds, 3),
+        "screen_seconds": round(screen_seconds, 3),
+        "kept": len(kept),
+        "duplicates_removed": duplicates,
+        "suppressed": suppressed,
+        "plain_set_filter_seconds": round(naive_seconds, 3),
+        "plain_set_kept": len(naive),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
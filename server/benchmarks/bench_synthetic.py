@@ -0,0 +1,61 @@
+"""
+Synthetic data generation throughput.
+
+Generates customers (with order histories), Facebook posts and email
+audience rows with src.api.source.synthetic, serializes them to NDJSON,
+and reports records per second. It also checks that a second run with the
+same seed produces identical output.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_synthetic --customers 200000 --posts 1000000 --audience 1000000
+"""
+import argparse
+import hashlib
+import json
+import time
+
+from src.api.source import synthetic
+
+
+def timed_export(kind: str, size: int, seed: int) -> dict:
+    digest = hashlib.blake2b(digest_size=16)
+    written = 0
+    start = time.perf_counter()
+    for block in synthetic.iter_ndjson(kind, size, seed):
+        digest.update(block)
+        written += len(block)
+    seconds = time.perf_counter() - start
+    return {
+        "records": size,
+        "seconds": round(seconds, 3),
+        "records_per_second": round(size / seconds) if seconds else None,
+        "megabytes": round(written / 1e6, 1),
+        "digest": digest.hexdigest(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--customers", type=int, default=200_000)
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    parser.add_argument("--audience", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    results = {
+        "crm": timed_export("crm", args.customers, args.seed),
+        "facebook_posts": timed_export("facebook_posts", args.posts, args.seed),
+        "audience": timed_export("audience", args.audience, args.seed),
+    }
+    first = timed_export("crm", min(args.customers, 10_000), args.seed)
+    repeat = timed_export("crm", min(args.customers, 10_000), args.seed)
+    print(json.dumps({
+        "seed": args.seed,
+        "chunk_size": synthetic.SYNTHETIC_CHUNK_SIZE,
+        **results,
+        "deterministic": repeat["digest"] == first["digest"],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
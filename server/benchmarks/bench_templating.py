@@ -0,0 +1,84 @@
+"""
+Rendering time and memory for personalized campaign messages.
+
+Compares per-recipient str.format calls against the compiled, batched
+Template used by the campaign tasks, for both a realistic spread of first
+names (cache hits) and fully unique values (every render a cache miss).
+
+Usage (from the server directory):
+    python -m benchmarks.bench_templating --messages 1000000
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from src.core.templating import Template
+
+MESSAGE = (
+    "Hi {name}, our stock clearance sale is live: up to 50% off everything "
+    "in store until Sunday. Reply STOP to opt out. Sent to {email}."
+)
+SIMPLE_MESSAGE = "Hi {name|there}, our stock clearance sale is live: up to 50% off until Sunday."
+
+
+def build_columns(messages: int, distinct_names: int) -> dict:
+    return {
+        "name": [f"Customer {i % distinct_names}" for i in range(messages)],
+        "email": [f"customer{i}@example.com" for i in range(messages)],
+    }
+
+
+def measure(fn) -> dict:
+    """Wall time of one call, and peak traced memory of a second traced call"""
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {"seconds": round(elapsed, 4), "peak_mb": round(peak / 2**20, 2)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--distinct-names", type=int, default=5_000)
+    parser.add_argument("--batch-size", type=int, default=1_000)
+    args = parser.parse_args()
+
+    columns = build_columns(args.messages, args.distinct_names)
+    names, emails = columns["name"], columns["email"]
+
+    def naive(message):
+        def run():
+            return [message.format(name=name, email=email) for name, email in zip(names, emails)]
+        return run
+
+    def compiled(message):
+        def run():
+            # Fresh template per run so the cache starts cold each time
+            return list(Template(message).iter_render(columns, args.messages, args.batch_size))
+        return run
+
+    results = {
+        "messages": args.messages,
+        "distinct_names": args.distinct_names,
+        "name_and_email": {
+            "str_format": measure(naive(MESSAGE)),
+            "compiled_batched": measure(compiled(MESSAGE)),
+        },
+        # {name} only: identical variable sets share one cached render
+        "name_only": {
+            "str_format": measure(naive(SIMPLE_MESSAGE.replace("|there", ""))),
+            "compiled_batched": measure(compiled(SIMPLE_MESSAGE)),
+        },
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+End-to-end benchmark harness for the FastAPI + Celery stack.
+
+Runs fully offline: the API is served by uvicorn in-process, Celery uses the
+in-memory broker and result backend (eager mode for campaign completion),
+and website scraping hits a local fixture server. Results are written as
+JSON so they can be diffed between commits.
+
+Usage (from the server directory):
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --scenarios chat_sse --clients 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+SCENARIOS = ("chat_sse", "tools_scrape", "website_crawl", "email_bulk", "campaign_completion")
+
+
+def configure_environment(args: argparse.Namespace) -> None:
+    """Offline settings; must run before anything under src is imported"""
+    os.environ.setdefault("STORAGE_BACKEND", "memory")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("CELERY_BROKER_URL", "memory://")
+    os.environ.setdefault("CELERY_RESULT_BACKEND", "cache+memory://")
+    os.environ["CHAT_CHUNK_DELAY"] = str(args.chunk_delay)
+    os.environ["CAMPAIGN_START_DELAY"] = "0"
+    os.environ["CAMPAIGN_SEND_DELAY"] = str(args.send_delay)
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """Summary in milliseconds"""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1e3, 3),
+        "p50_ms": round(pick(0.50) * 1e3, 3),
+        "p95_ms": round(pick(0.95) * 1e3, 3),
+        "p99_ms": round(pick(0.99) * 1e3, 3),
+        "max_ms": round(ordered[-1] * 1e3, 3),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def bench_chat_sse(client, args, site) -> dict:
+    """Time-to-first-event and event throughput for concurrent /stream/chat clients"""
+    payload = {
+        "message": "Which customers should get the summer sale email?",
+        "data_source": [{"name": "crm"}, {"name": "facebook_page", "data": {"url": "bench"}}],
+        "channel": ["email"],
+    }
+
+    async def one_client():
+        start = time.perf_counter()
+        first_event = None
+        events = 0
+        async with client.stream("POST", "/stream/chat", json=payload) as response:
+            async for line in response.aiter_lines():
+                if line.startswith("data:"):
+                    events += 1
+                    if first_event is None:
+                        first_event = time.perf_counter() - start
+        return first_event, events, time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one_client() for _ in range(args.clients)))
+    elapsed = time.perf_counter() - start
+    total_events = sum(events for _, events, _ in results)
+    return {
+        "clients": args.clients,
+        "time_to_first_event": percentiles([ttfe for ttfe, _, _ in results if ttfe is not None]),
+        "stream_duration": percentiles([duration for _, _, duration in results]),
+        "total_events": total_events,
+        "events_per_second": round(total_events / elapsed, 1),
+    }
+
+
+async def bench_tools_scrape(client, args, site) -> dict:
+    """/stream/tools latency when scraping the local fixture site"""
+    payload = [{"name": "website", "data": {"url": f"{site.url}/index.html"}}]
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one_request():
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post("/stream/tools", json=payload)
+            response.raise_for_status()
+            return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one_request() for _ in range(args.requests)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "latency": percentiles(latencies),
+        "requests_per_second": round(args.requests / elapsed, 1),
+    }
+
+
+async def bench_website_crawl(client, args, site) -> dict:
+    """/source/website crawl mode over the whole fixture site"""
+    payload = {"url": f"{site.url}/", "crawl": True, "max_pages": args.crawl_pages, "max_depth": 3}
+    latencies = []
+    stats = {}
+    for _ in range(args.crawls):
+        start = time.perf_counter()
+        response = await client.post("/source/website", json=payload)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        stats = response.json()["stats"]
+    return {
+        "crawls": args.crawls,
+        "latency": percentiles(latencies),
+        "last_crawl": stats,
+    }
+
+
+def audience(size: int) -> List[dict]:
+    return [{"email": f"customer{i}@example.com", "name": f"Customer {i}"} for i in range(size)]
+
+
+async def bench_email_bulk(client, args, site) -> dict:
+    """/email/bulk enqueue throughput against the in-memory broker"""
+    from src.celery_app import celery_app
+
+    celery_app.conf.task_always_eager = False
+    payload = {
+        "time": datetime.now().isoformat(),
+        "message": "Summer sale",
+        "channel": "email",
+        "audience": audience(args.audience),
+    }
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one_request():
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post("/email/bulk", json=payload)
+            response.raise_for_status()
+            return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one_request() for _ in range(args.requests)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": args.requests,
+        "audience": args.audience,
+        "latency": percentiles(latencies),
+        "enqueues_per_second": round(args.requests / elapsed, 1),
+        "recipients_per_second": round(args.requests * args.audience / elapsed, 1),
+    }
+
+
+async def bench_campaign_completion(client, args, site) -> dict:
+    """Create campaigns with eager Celery and check how many run to completion"""
+    from src.celery_app import celery_app
+
+    celery_app.conf.task_always_eager = True
+    payload = {
+        "time": datetime.now().isoformat(),
+        "message": "Summer sale",
+        "channel": "email",
+        "audience": audience(args.campaign_audience),
+    }
+
+    start = time.perf_counter()
+    campaign_ids = []
+    for _ in range(args.campaigns):
+        response = await client.post("/email/campaign/create", json=payload)
+        response.raise_for_status()
+        campaign_ids.append(response.json()["campaign_id"])
+    elapsed = time.perf_counter() - start
+
+    completed = sent = failed = 0
+    for campaign_id in campaign_ids:
+        status = (await client.get(f"/email/campaign/{campaign_id}")).json()
+        if status.get("status") == "completed":
+            completed += 1
+        sent += status.get("sent_count", 0)
+        failed += status.get("failed_count", 0)
+
+    return {
+        "campaigns": args.campaigns,
+        "audience": args.campaign_audience,
+        "completion_rate": round(completed / args.campaigns, 4),
+        "delivery_rate": round(sent / max(1, sent + failed), 4),
+        "campaigns_per_second": round(args.campaigns / elapsed, 2),
+    }
+
+
+async def run_scenarios(args: argparse.Namespace) -> dict:
+    import httpx
+
+    from benchmarks.fixtures.servers import ApiServer, FixtureSite
+    from src.main import app
+
+    runners = {
+        "chat_sse": bench_chat_sse,
+        "tools_scrape": bench_tools_scrape,
+        "website_crawl": bench_website_crawl,
+        "email_bulk": bench_email_bulk,
+        "campaign_completion": bench_campaign_completion,
+    }
+    results = {}
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    with FixtureSite() as site, ApiServer(app) as api:
+        async with httpx.AsyncClient(base_url=api.url, timeout=120, limits=limits) as client:
+            for name in args.scenarios:
+                results[name] = await runners[name](client, args, site)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--clients", type=int, default=50, help="concurrent SSE clients")
+    parser.add_argument("--chunk-delay", type=float, default=0.01, help="seconds between chat chunks")
+    parser.add_argument("--requests", type=int, default=200, help="requests per request/response scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--crawls", type=int, default=10, help="sequential crawls of the fixture site")
+    parser.add_argument("--crawl-pages", type=int, default=50)
+    parser.add_argument("--audience", type=int, default=1000, help="recipients per /email/bulk request")
+    parser.add_argument("--campaigns", type=int, default=20)
+    parser.add_argument("--campaign-audience", type=int, default=100)
+    parser.add_argument("--send-delay", type=float, default=0.0, help="simulated seconds per email")
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    configure_environment(args)
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "parameters": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": asyncio.run(run_scenarios(args)),
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import re
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.core import codec
+from src.core.blobstore import get_blob_store
+from src.core.suppression import get_suppression_list
+from ..email.audience import (
+    AUDIENCE_BLOB_TTL,
+    CLAIM_CHECK_THRESHOLD,
+    EMAIL_PATTERN,
+    MAX_REPORTED_ERRORS,
+)
+
+# E.164 phone numbers, as used by SMS and WhatsApp providers
+PHONE_PATTERN = re.compile(r"\+[1-9]\d{6,14}")
+
+# Recipient field and address format for each channel
+CHANNEL_ADDRESS = {
+    "email": ("email", EMAIL_PATTERN),
+    "sms": ("phone", PHONE_PATTERN),
+    "whatsapp": ("phone", PHONE_PATTERN),
+}
+
+
+class ChannelRecipients:
+    """Columnar recipient list for one channel (addresses and names)"""
+
+    __slots__ = ("channel", "addresses", "names")
+
+    def __init__(self, channel: str, addresses: List[str], names: List[Optional[str]]):
+        self.channel = channel
+        self.addresses = addresses
+        self.names = names
+
+    def __len__(self) -> int:
+        return len(self.addresses)
+
+    def __iter__(self) -> Iterator[Tuple[str, Optional[str]]]:
+        return zip(self.addresses, self.names)
+
+    @classmethod
+    def validate(cls, channel: str, records: Any) -> "ChannelRecipients":
+        """Validate a list of recipient records in one pass for the channel's address type"""
+        field, pattern = CHANNEL_ADDRESS[channel]
+        if not isinstance(records, list):
+            raise ValueError("audience must be a list of recipients")
+        try:
+            addresses = [record[field] for record in records]
+            names = [record.get("name") for record in records]
+        except (TypeError, KeyError):
+            raise ValueError(f"each {channel} recipient must be an object with a '{field}' field")
+
+        match = pattern.fullmatch
+        invalid = [
+            idx for idx, address in enumerate(addresses)
+            if not isinstance(address, str) or match(address) is None
+        ]
+        if invalid:
+            shown = ", ".join(str(idx) for idx in invalid[:MAX_REPORTED_ERRORS])
+            raise ValueError(f"{len(invalid)} invalid {field}(s) at index {shown}")
+        return cls(channel, addresses, names)
+
+    def batches(self, size: int) -> Iterator["ChannelRecipients"]:
+        """Split into consecutive batches of at most `size` recipients"""
+        for start in range(0, len(self), size):
+            yield ChannelRecipients(
+                self.channel,
+                self.addresses[start:start + size],
+                self.names[start:start + size],
+            )
+
+    def screen(self) -> Tuple["ChannelRecipients", int, int]:
+        """Drop duplicate and suppressed addresses; see Recipients.screen"""
+        keep, duplicates, suppressed = get_suppression_list(self.channel).screen(self.addresses)
+        if len(keep) == len(self):
+            return self, duplicates, suppressed
+        addresses, names = self.addresses, self.names
+        return (
+            ChannelRecipients(self.channel, [addresses[idx] for idx in keep], [names[idx] for idx in keep]),
+            duplicates,
+            suppressed,
+        )
+
+    def to_task_payload(self) -> Dict[str, Any]:
+        """Columnar task argument; large batches go through the blob store"""
+        payload = {"addresses": self.addresses, "names": self.names}
+        if len(self) <= CLAIM_CHECK_THRESHOLD:
+            return payload
+        ref = f"audience:{uuid.uuid4().hex}"
+        get_blob_store().put(ref, codec.encode(payload), AUDIENCE_BLOB_TTL)
+        return {"ref": ref, "count": len(self)}
+
+    @classmethod
+    def from_payload(cls, channel: str, payload: Dict[str, Any]) -> "ChannelRecipients":
+        if "ref" in payload:
+            blob = get_blob_store().get(payload["ref"])
+            if blob is None:
+                raise ValueError(f"Audience {payload['ref']} has expired or was removed")
+            payload = codec.decode(blob)
+        return cls(channel, payload["addresses"], payload["names"])
@@ -0,0 +1,48 @@
+"""
+Local mock of a batch messaging provider for SMS, WhatsApp and email.
+
+Run it next to the workers and point the channel at it:
+
+    uvicorn src.api.channels.mock_provider:app --port 9000
+    SMS_PROVIDER_URL=http://localhost:9000 celery -A src.celery_app.celery_app worker -Q channel.sms
+
+MOCK_PROVIDER_FAILURE_RATE and MOCK_PROVIDER_LATENCY (seconds per batch)
+shape its behaviour.
+"""
+import asyncio
+import os
+import random
+import uuid
+from typing import List, Optional
+
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+FAILURE_RATE = float(os.getenv("MOCK_PROVIDER_FAILURE_RATE", "0.1"))
+LATENCY = float(os.getenv("MOCK_PROVIDER_LATENCY", "0.05"))
+
+app = FastAPI(title="Mock messaging provider")
+
+
+class BatchRecipient(BaseModel):
+    to: str
+    name: Optional[str] = None
+    # Personalized text; falls back to the batch body
+    body: Optional[str] = None
+
+
+class BatchRequest(BaseModel):
+    body: str
+    recipients: List[BatchRecipient]
+
+
+@app.post("/v1/{channel}/batch")
+async def send_batch(channel: str, data: BatchRequest):
+    await asyncio.sleep(LATENCY)
+    results = []
+    for recipient in data.recipients:
+        if random.random() < FAILURE_RATE:
+            results.append({"status": "failed", "id": None, "error": "Mock provider rejected message"})
+        else:
+            results.append({"status": "sent", "id": f"{channel}_{uuid.uuid4().hex[:12]}", "error": None})
+    return {"channel": channel, "accepted": len(data.recipients), "results": results}
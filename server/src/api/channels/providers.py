@@ -0,0 +1,106 @@
+"""
+Delivery provider adapters, one per channel.
+
+Each adapter sends a whole batch per call. Without a configured provider
+URL the channel uses the built-in simulator; point
+EMAIL_PROVIDER_URL / SMS_PROVIDER_URL / WHATSAPP_PROVIDER_URL at a real
+provider or at the local mock server (src.api.channels.mock_provider).
+"""
+import os
+import random
+import uuid
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+PROVIDER_TIMEOUT = float(os.getenv("PROVIDER_TIMEOUT", "30"))
+
+# Recipient in a provider call: (address, name)
+Message = Tuple[str, Optional[str]]
+
+
+class Provider(ABC):
+    channel: str
+
+    @abstractmethod
+    def send_batch(self, body: str, recipients: List[Message],
+                   bodies: Optional[Sequence[str]] = None) -> List[Dict]:
+        """
+        Send one message body to many recipients, or per-recipient
+        personalized `bodies` when given; one result per recipient
+        """
+
+
+class SimulatedProvider(Provider):
+    """In-process stand-in with a fixed failure rate"""
+
+    def __init__(self, channel: str, failure_rate: float = 0.1):
+        self.channel = channel
+        self.failure_rate = failure_rate
+
+    def send_batch(self, body: str, recipients: List[Message],
+                   bodies: Optional[Sequence[str]] = None) -> List[Dict]:
+        results = []
+        for address, name in recipients:
+            failed = random.random() < self.failure_rate
+            results.append({
+                "address": address,
+                "name": name,
+                "status": "failed" if failed else "sent",
+                "message_id": None if failed else f"{self.channel}_{uuid.uuid4().hex[:12]}",
+                "error": "Simulated delivery failure" if failed else None,
+            })
+        return results
+
+
+class HttpProvider(Provider):
+    """
+    Batch HTTP provider: POST {base_url}/v1/{channel}/batch with
+    {"body": ..., "recipients": [{"to": ..., "name": ...}]} and a
+    {"results": [...]} response in recipient order. Personalized
+    recipients carry their own "body".
+    """
+
+    def __init__(self, channel: str, base_url: str):
+        self.channel = channel
+        self.base_url = base_url.rstrip("/")
+        self._client = httpx.Client(timeout=PROVIDER_TIMEOUT)
+
+    def send_batch(self, body: str, recipients: List[Message],
+                   bodies: Optional[Sequence[str]] = None) -> List[Dict]:
+        if bodies is None:
+            items = [{"to": address, "name": name} for address, name in recipients]
+        else:
+            items = [
+                {"to": address, "name": name, "body": text}
+                for (address, name), text in zip(recipients, bodies)
+            ]
+        response = self._client.post(
+            f"{self.base_url}/v1/{self.channel}/batch",
+            json={"body": body, "recipients": items},
+        )
+        response.raise_for_status()
+        return [
+            {
+                "address": address,
+                "name": name,
+                "status": result["status"],
+                "message_id": result.get("id"),
+                "error": result.get("error"),
+            }
+            for (address, name), result in zip(recipients, response.json()["results"])
+        ]
+
+
+_providers: Dict[str, Provider] = {}
+
+
+def get_provider(channel: str) -> Provider:
+    """Provider for a channel, created once per process"""
+    provider = _providers.get(channel)
+    if provider is None:
+        base_url = os.getenv(f"{channel.upper()}_PROVIDER_URL")
+        provider = HttpProvider(channel, base_url) if base_url else SimulatedProvider(channel)
+        _providers[channel] = provider
+    return provider
@@ -0,0 +1,29 @@
+from fastapi import APIRouter
+from src.core.serialization import json_response
+from src.core.celery_async import run_blocking
+from ..email import schema as email_schema
+from ..email import service as email_service
+from . import schema, service
+
+channel_routes = APIRouter(prefix="/channels", tags=["Channels"])
+
+
+@channel_routes.post("/{channel}/batch")
+async def dispatch_batch(channel: schema.Channel, data: schema.DispatchBatchSchema):
+    """Queue a campaign on the channel's own queue, split into provider batches"""
+    try:
+        return await service.dispatch_batch(channel, data)
+    except ValueError as e:
+        return json_response({"error": str(e), "channel": channel}, status_code=422)
+
+
+@channel_routes.get("/campaign/{campaign_id}")
+async def get_campaign_status(campaign_id: str):
+    """Get channel campaign status by campaign ID"""
+    return json_response(service.get_campaign_status(campaign_id))
+
+
+@channel_routes.post("/{channel}/suppressions")
+async def add_suppressions(channel: schema.Channel, data: email_schema.SuppressionSchema):
+    """Stop sending to these addresses on the channel"""
+    return await run_blocking(email_service.add_suppressions, channel, data)
@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from typing import List, Literal
+from src.core.queues import Priority
+
+Channel = Literal["email", "sms", "whatsapp"]
+
+class DispatchBatchSchema(BaseModel):
+    time: str
+    message: str
+    audience: List[dict]
+    priority: Priority = "normal"
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [{
+                "time": "2026-01-01T09:00:00",
+                "message": "Limited time offer! Reply STOP to opt out.",
+                "audience": [{"phone": "+1234567890", "name": "John Doe"}],
+            }]
+        }
+    }
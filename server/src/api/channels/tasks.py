@@ -0,0 +1,107 @@
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Dict
+from celery.utils.time import get_exponential_backoff_interval
+from src.celery_app import celery_app
+from src.core.metrics import Counter, Histogram
+from src.core.rollups import RollupRecorder
+from src.core.templating import compile_template
+from ..email.audience import release_payload
+from .audience import CHANNEL_ADDRESS, ChannelRecipients
+from .providers import get_provider
+
+logger = logging.getLogger(__name__)
+
+# In-memory storage for demo purposes
+channel_campaigns: Dict[str, dict] = {}
+
+CHANNEL_MESSAGES = Counter(
+    "channel_messages_total", "Messages handed to channel providers", ["channel", "status"]
+)
+CHANNEL_BATCH_SECONDS = Histogram(
+    "channel_batch_seconds", "Time to deliver one provider batch", ["channel"]
+)
+
+# Retry a failed provider call this many times before failing the batch
+CHANNEL_BATCH_RETRIES = int(os.getenv("CHANNEL_BATCH_RETRIES", "3"))
+CHANNEL_RETRY_MAX_DELAY = 600
+
+
+# Only a failed provider call is retried: once it returns, the messages are
+# out, and a whole-task retry would send every one of them again
+@celery_app.task(bind=True, name="send_channel_batch_task", max_retries=CHANNEL_BATCH_RETRIES)
+def send_channel_batch_task(
+    self,
+    campaign_id: str,
+    channel: str,
+    body: str,
+    batch_index: int,
+    recipients: Dict[str, list],
+) -> dict:
+    """Deliver one batch of a channel campaign through the channel's provider"""
+    audience = ChannelRecipients.from_payload(channel, recipients)
+
+    # Merge fields ({name}, {email} / {phone}) are rendered once per batch
+    template = compile_template(body)
+    bodies = None
+    if not template.is_static:
+        bodies = template.render_batch(
+            {"name": audience.names, CHANNEL_ADDRESS[channel][0]: audience.addresses},
+            len(audience),
+        )
+
+    started = time.perf_counter()
+    try:
+        results = get_provider(channel).send_batch(body, list(audience), bodies)
+    except Exception as e:
+        countdown = get_exponential_backoff_interval(
+            factor=1, retries=self.request.retries, maximum=CHANNEL_RETRY_MAX_DELAY, full_jitter=True,
+        )
+        raise self.retry(exc=e, countdown=countdown)
+    elapsed = time.perf_counter() - started
+    CHANNEL_BATCH_SECONDS.labels(channel).observe(elapsed)
+
+    sent_count = sum(1 for result in results if result["status"] == "sent")
+    failed_count = len(results) - sent_count
+    CHANNEL_MESSAGES.labels(channel, "sent").inc(sent_count)
+    CHANNEL_MESSAGES.labels(channel, "failed").inc(failed_count)
+
+    # Every message of a batch waits for the whole provider call
+    rollup = RollupRecorder(campaign_id, channel)
+    if sent_count:
+        rollup.record("sent", elapsed, sent_count)
+    if failed_count:
+        rollup.record("failed", elapsed, failed_count)
+    try:
+        rollup.flush()
+    except Exception:
+        logger.exception("Could not flush channel rollups", extra={"campaign_id": campaign_id, "channel": channel})
+
+    campaign = channel_campaigns.get(campaign_id)
+    if campaign is not None:
+        campaign["sent_count"] += sent_count
+        campaign["failed_count"] += failed_count
+        campaign["completed_batches"] += 1
+        campaign["status"] = "processing"
+        if campaign["completed_batches"] == campaign["total_batches"]:
+            campaign["status"] = "completed"
+            campaign["completed_at"] = datetime.now().isoformat()
+
+    try:
+        release_payload(recipients)
+    except Exception:
+        logger.exception("Could not release channel batch payload", extra={"campaign_id": campaign_id})
+    logger.info("Channel batch delivered", extra={
+        "campaign_id": campaign_id, "channel": channel, "batch_index": batch_index,
+        "sent_count": sent_count, "failed_count": failed_count,
+    })
+
+    return {
+        "campaign_id": campaign_id,
+        "channel": channel,
+        "batch_index": batch_index,
+        "sent_count": sent_count,
+        "failed_count": failed_count,
+    }
@@ -0,0 +1,155 @@
+import os
+import re
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.core import codec
+from src.core.blobstore import get_blob_store
+from src.core.suppression import get_suppression_list
+
+# Pragmatic address check, applied to the whole audience in one pass.
+# Deliverability checks are left to the provider.
+EMAIL_PATTERN = re.compile(
+    r"[A-Za-z0-9.!#$%&'*+/=?^_`{|}~-]+"
+    r"@[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?"
+    r"(?:\.[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?)+"
+)
+
+# Maximum number of invalid positions reported back in a validation error
+MAX_REPORTED_ERRORS = 10
+
+# Audiences larger than this are stored once in the blob store and Celery
+# messages only carry a reference to them (claim check)
+CLAIM_CHECK_THRESHOLD = int(os.getenv("AUDIENCE_CLAIM_CHECK_THRESHOLD", "10000"))
+
+# Long enough for campaigns scheduled days ahead and their retries
+AUDIENCE_BLOB_TTL = int(os.getenv("AUDIENCE_BLOB_TTL", str(7 * 24 * 3600)))
+
+
+class Recipients:
+    """
+    Columnar recipient list.
+
+    Holds emails and names as two parallel lists instead of one object per
+    recipient, which keeps large audiences cheap to validate, store and
+    ship to Celery.
+    """
+
+    __slots__ = ("emails", "names")
+
+    def __init__(self, emails: List[str], names: List[Optional[str]]):
+        self.emails = emails
+        self.names = names
+
+    def __len__(self) -> int:
+        return len(self.emails)
+
+    def __iter__(self) -> Iterator[Tuple[str, Optional[str]]]:
+        return zip(self.emails, self.names)
+
+    @classmethod
+    def validate(cls, value: Any) -> "Recipients":
+        """Validate a request audience (list of records or columnar dict)"""
+        if isinstance(value, cls):
+            return value
+
+        if isinstance(value, dict):
+            emails, names = value.get("emails"), value.get("names")
+            if not isinstance(emails, list):
+                raise ValueError("audience.emails must be a list")
+            if names is None:
+                names = [None] * len(emails)
+            if not isinstance(names, list) or len(names) != len(emails):
+                raise ValueError("audience.names must be a list matching audience.emails")
+        elif isinstance(value, list):
+            try:
+                emails = [record["email"] for record in value]
+                names = [record.get("name") for record in value]
+            except (TypeError, KeyError):
+                raise ValueError("each audience entry must be an object with an 'email' field")
+        else:
+            raise ValueError("audience must be a list of recipients")
+
+        match = EMAIL_PATTERN.fullmatch
+        invalid = [
+            idx for idx, email in enumerate(emails)
+            if not isinstance(email, str) or match(email) is None
+        ]
+        if invalid:
+            shown = ", ".join(str(idx) for idx in invalid[:MAX_REPORTED_ERRORS])
+            raise ValueError(f"{len(invalid)} invalid email address(es) at index {shown}")
+
+        invalid = [
+            idx for idx, name in enumerate(names)
+            if name is not None and not isinstance(name, str)
+        ]
+        if invalid:
+            shown = ", ".join(str(idx) for idx in invalid[:MAX_REPORTED_ERRORS])
+            raise ValueError(f"{len(invalid)} invalid name(s) at index {shown}")
+
+        return cls(emails, names)
+
+    def to_records(self) -> List[Dict[str, Optional[str]]]:
+        """Expand back into one dict per recipient"""
+        return [{"email": email, "name": name} for email, name in self]
+
+    def select(self, indices: List[int]) -> "Recipients":
+        """Recipients at the given positions, in that order"""
+        if len(indices) == len(self.emails):
+            return self
+        emails, names = self.emails, self.names
+        return Recipients([emails[idx] for idx in indices], [names[idx] for idx in indices])
+
+    def screen(self) -> Tuple["Recipients", int, int]:
+        """
+        Drop duplicate addresses (case-insensitive, first one wins) and
+        suppressed ones. Returns the remaining recipients and the duplicate
+        and suppressed counts.
+        """
+        keep, duplicates, suppressed = get_suppression_list("email").screen(self.emails)
+        return self.select(keep), duplicates, suppressed
+
+    def to_payload(self) -> Dict[str, list]:
+        """Columnar encoding of the recipients"""
+        return {"emails": self.emails, "names": self.names}
+
+    def to_task_payload(self) -> Dict[str, Any]:
+        """
+        Encoding used for Celery task arguments.
+
+        Large audiences are written to the blob store once and replaced by a
+        reference, so the broker only ever holds a few bytes per campaign.
+        """
+        if len(self) <= CLAIM_CHECK_THRESHOLD:
+            return self.to_payload()
+
+        ref = f"audience:{uuid.uuid4().hex}"
+        get_blob_store().put(ref, codec.encode(self.to_payload()), AUDIENCE_BLOB_TTL)
+        return {"ref": ref, "count": len(self)}
+
+    @classmethod
+    def from_payload(cls, payload: Any) -> "Recipients":
+        """
+        Decode a Celery recipients argument.
+
+        Accepts a blob store reference, the columnar encoding and the legacy
+        list of dicts, so messages queued before an upgrade still process.
+        """
+        if isinstance(payload, dict) and "ref" in payload:
+            blob = get_blob_store().get(payload["ref"])
+            if blob is None:
+                raise ValueError(f"Audience {payload['ref']} has expired or was removed")
+            payload = codec.decode(blob)
+
+        if isinstance(payload, dict):
+            return cls(payload["emails"], payload["names"])
+        return cls(
+            [recipient["email"] for recipient in payload],
+            [recipient.get("name") for recipient in payload],
+        )
+
+
+def release_payload(payload: Any) -> None:
+    """Drop the stored audience behind a claim-check payload, if any"""
+    if isinstance(payload, dict) and "ref" in payload:
+        get_blob_store().delete(payload["ref"])
@@ -0,0 +1,170 @@
+"""
+Retries of transiently failed recipients and the dead-letter store.
+
+A campaign task never retries itself once it has started delivering.
+Instead, recipients that failed with a transient error are collected into
+retry batches of at most EMAIL_RETRY_BATCH_SIZE. Each batch is its own
+Celery task with a countdown that grows exponentially per attempt (with
+full jitter). Retry cost therefore grows with the number of failures, not
+with the audience size.
+
+Batches still failing after EMAIL_RETRY_MAX_ATTEMPTS attempts go to the
+dead-letter store, which keeps them until they are re-driven through
+POST /email/dlq/redrive.
+"""
+import os
+import random
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+from src.core import codec
+from src.core.metrics import Counter, Gauge
+from src.core.storage import STORAGE_BACKEND, get_redis
+
+EMAIL_RETRY_BATCH_SIZE = int(os.getenv("EMAIL_RETRY_BATCH_SIZE", "500"))
+EMAIL_RETRY_MAX_ATTEMPTS = int(os.getenv("EMAIL_RETRY_MAX_ATTEMPTS", "4"))
+# Delay before retry attempt n is up to BASE * 2**(n - 1) seconds, capped at MAX
+EMAIL_RETRY_BASE_DELAY = float(os.getenv("EMAIL_RETRY_BASE_DELAY", "30"))
+EMAIL_RETRY_MAX_DELAY = float(os.getenv("EMAIL_RETRY_MAX_DELAY", "900"))
+
+EMAIL_RETRIES = Counter(
+    "email_retry_recipients_total", "Recipients scheduled for retry or dead-lettered", ["outcome"]
+)
+DEAD_LETTER_BATCHES = Gauge(
+    "email_dead_letter_batches", "Batches held in the dead-letter store"
+)
+
+
+def retry_delay(attempt: int) -> float:
+    """Countdown before retry `attempt` (1-based): capped exponential backoff with full jitter"""
+    ceiling = min(EMAIL_RETRY_MAX_DELAY, EMAIL_RETRY_BASE_DELAY * 2 ** (attempt - 1))
+    return random.uniform(0, ceiling)
+
+
+def retry_batches(emails: List[str], names: List[Optional[str]]) -> List[Dict[str, list]]:
+    """Split failed recipients into columnar retry batches"""
+    return [
+        {"emails": emails[start:start + EMAIL_RETRY_BATCH_SIZE], "names": names[start:start + EMAIL_RETRY_BATCH_SIZE]}
+        for start in range(0, len(emails), EMAIL_RETRY_BATCH_SIZE)
+    ]
+
+
+class DeadLetterStore(ABC):
+    """
+    Retry batches that ran out of attempts. An entry holds everything needed
+    to send the batch again: campaign, message, recipients, last errors and
+    attempts made.
+    """
+
+    @abstractmethod
+    def push(self, entry: dict) -> str:
+        ...
+
+    @abstractmethod
+    def pop(self, limit: int, campaign_id: Optional[str] = None) -> List[dict]:
+        """Remove and return up to `limit` entries, oldest first"""
+
+    @abstractmethod
+    def peek(self, limit: int) -> List[dict]:
+        ...
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
+
+
+class MemoryDeadLetterStore(DeadLetterStore):
+    def __init__(self):
+        self._entries: List[dict] = []
+
+    def push(self, entry: dict) -> str:
+        self._entries.append(entry)
+        DEAD_LETTER_BATCHES.set(len(self._entries))
+        return entry["dlq_id"]
+
+    def pop(self, limit: int, campaign_id: Optional[str] = None) -> List[dict]:
+        taken, kept = [], []
+        for entry in self._entries:
+            if len(taken) < limit and campaign_id in (None, entry["campaign_id"]):
+                taken.append(entry)
+            else:
+                kept.append(entry)
+        self._entries = kept
+        DEAD_LETTER_BATCHES.set(len(kept))
+        return taken
+
+    def peek(self, limit: int) -> List[dict]:
+        return self._entries[:limit]
+
+    def count(self) -> int:
+        return len(self._entries)
+
+
+class RedisDeadLetterStore(DeadLetterStore):
+    """Entries are codec-encoded into a hash, and their ids are kept in arrival order in a list"""
+
+    entries_key = "email:dlq:entries"
+    order_key = "email:dlq:order"
+
+    def push(self, entry: dict) -> str:
+        pipe = get_redis().pipeline()
+        pipe.hset(self.entries_key, entry["dlq_id"], codec.encode(entry))
+        pipe.rpush(self.order_key, entry["dlq_id"])
+        pipe.execute()
+        return entry["dlq_id"]
+
+    def _load(self, ids: List[bytes]) -> List[dict]:
+        if not ids:
+            return []
+        return [codec.decode(data) for data in get_redis().hmget(self.entries_key, ids) if data is not None]
+
+    def pop(self, limit: int, campaign_id: Optional[str] = None) -> List[dict]:
+        redis = get_redis()
+        if campaign_id is None:
+            ids = redis.lpop(self.order_key, limit) or []
+            entries = self._load(ids)
+        else:
+            # A campaign filter has to look at entries; the store is small by design
+            entries = [
+                entry for entry in self._load(redis.lrange(self.order_key, 0, -1))
+                if entry["campaign_id"] == campaign_id
+            ][:limit]
+            pipe = redis.pipeline()
+            for entry in entries:
+                pipe.lrem(self.order_key, 1, entry["dlq_id"])
+            pipe.execute()
+            ids = [entry["dlq_id"] for entry in entries]
+        if ids:
+            redis.hdel(self.entries_key, *ids)
+        return entries
+
+    def peek(self, limit: int) -> List[dict]:
+        return self._load(get_redis().lrange(self.order_key, 0, limit - 1))
+
+    def count(self) -> int:
+        return get_redis().llen(self.order_key)
+
+
+_dead_letters: Optional[DeadLetterStore] = None
+
+
+def get_dead_letter_store() -> DeadLetterStore:
+    """Dead-letter store for the configured STORAGE_BACKEND"""
+    global _dead_letters
+    if _dead_letters is None:
+        _dead_letters = MemoryDeadLetterStore() if STORAGE_BACKEND == "memory" else RedisDeadLetterStore()
+    return _dead_letters
+
+
+def dead_letter_entry(batch: dict, recipients: Dict[str, list], errors: List[str], attempts: int) -> dict:
+    """Dead-letter record for a retry batch; `batch` holds the message fields"""
+    return {
+        "dlq_id": uuid.uuid4().hex,
+        **batch,
+        "recipients": recipients,
+        "errors": errors,
+        "attempts": attempts,
+        "dead_lettered_at": time.time(),
+    }
@@ -1,4 +1,10 @@
+from datetime import datetime
+from typing import Literal, Optional
+
 from fastapi import APIRouter
+from src.core.celery_async import run_blocking
+from src.core.serialization import json_response
+from ..channels.schema import Channel
 from . import schema, service
 
 email_routes = APIRouter(prefix="/email", tags=["Email"])
@@ -19,16 +25,58 @@ async def send_bulk_email(data: schema.BulkEmailSchema):
 @email_routes.get("/campaign/{campaign_id}")
 async def get_campaign_status(campaign_id: str):
     """Get campaign status by campaign ID"""
-    return service.get_campaign_status(campaign_id)
+    return json_response(service.get_campaign_status(campaign_id))
+
+
+@email_routes.get("/campaign/{campaign_id}/stats")
+async def get_campaign_stats(
+    campaign_id: str,
+    resolution: Literal["minute", "hour"] = "minute",
+    channel: Optional[Channel] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    """Per-minute or per-hour delivery counts and send latency percentiles"""
+    return await run_blocking(service.get_campaign_stats, campaign_id, resolution, channel, start, end)
 
 
 @email_routes.get("/campaigns")
 async def get_all_campaigns():
     """Get all email campaigns"""
-    return service.get_all_campaigns()
+    return json_response(service.get_all_campaigns())
 
 
 @email_routes.get("/task/{task_id}")
 async def get_task_status(task_id: str):
     """Get Celery task status by task ID"""
-    return service.get_task_status_service(task_id)
+    return await service.get_task_status_service(task_id)
+
+
+@email_routes.post("/suppressions")
+async def add_suppressions(data: schema.SuppressionSchema):
+    """Stop sending to these addresses (unsubscribes, bounces, complaints)"""
+    return await run_blocking(service.add_suppressions, "email", data)
+
+
+@email_routes.get("/suppressions/{address}")
+async def get_suppression(address: str):
+    """Check whether an address is suppressed"""
+    return await run_blocking(service.get_suppression, "email", address)
+
+
+@email_routes.delete("/suppressions/{address}")
+async def remove_suppression(address: str):
+    """Allow sending to a suppressed address again"""
+    return await run_blocking(service.remove_suppression, "email", address)
+
+
+@email_routes.get("/dlq")
+async def get_dead_letters(limit: int = 20):
+    """Retry batches that ran out of attempts"""
+    return await run_blocking(service.get_dead_letters, limit)
+
+
+@email_routes.post("/dlq/redrive")
+async def redrive_dead_letters(data: schema.RedriveSchema):
+    """Retry dead-lettered batches again"""
+    return await run_blocking(service.redrive_dead_letters, data)
@@ -1,21 +1,57 @@
-from pydantic import BaseModel, EmailStr
-from typing import List, Optional
+from pydantic import BaseModel, EmailStr, Field, PlainSerializer, PlainValidator, WithJsonSchema
+from typing import Annotated, List, Literal, Optional
+from src.core.queues import Priority
+from .audience import Recipients
 
 class EmailRecipient(BaseModel):
     email: EmailStr
     name: Optional[str] = None
 
+# Audiences are validated in one batched pass into a columnar Recipients
+# object instead of one EmailRecipient model per entry. The documented
+# request shape is unchanged.
+Audience = Annotated[
+    Recipients,
+    PlainValidator(Recipients.validate),
+    PlainSerializer(Recipients.to_records),
+    WithJsonSchema({
+        "type": "array",
+        "title": "Audience",
+        "items": {
+            "type": "object",
+            "title": "EmailRecipient",
+            "properties": {
+                "email": {"type": "string", "format": "email"},
+                "name": {"anyOf": [{"type": "string"}, {"type": "null"}]},
+            },
+            "required": ["email"],
+        },
+    }),
+]
+
 class BulkEmailSchema(BaseModel):
     time: str
     message: str
     channel: str
-    audience: List[EmailRecipient]
+    audience: Audience
+    # "high" for transactional sends; "low" defers to the bulk queue
+    priority: Priority = "normal"
 
 class CampaignCreateSchema(BaseModel):
     time: str
     message: str
     channel: str
-    audience: List[EmailRecipient]
+    audience: Audience
+    # "high" for transactional sends; "low" defers to the bulk queue
+    priority: Priority = "normal"
+
+class SuppressionSchema(BaseModel):
+    addresses: List[str]
+    reason: Literal["unsubscribe", "bounce", "complaint", "manual"] = "unsubscribe"
+
+class RedriveSchema(BaseModel):
+    campaign_id: Optional[str] = None
+    limit: int = Field(100, ge=1, le=10000)
 
 class EmailStatusSchema(BaseModel):
     campaign_id: str
@@ -1,36 +1,64 @@
+import time
 import uuid
 from datetime import datetime
-from typing import Dict
+from typing import Dict, Optional
+from src.core.celery_async import run_blocking
+from src.core.metrics import Histogram
+from src.core.queues import CHANNELS, select_queue
+from src.core.rollups import campaign_stats
+from src.core.suppression import get_suppression_list
 from . import schema
-from .tasks import send_bulk_email_task, get_task_status, email_campaigns, schedule_campaign_task
+from .retry import get_dead_letter_store
+from src.core.lazy import lazy_import
+
+# Celery and the task modules load on first use, not at API startup
+tasks = lazy_import("src.api.email.tasks")
+
+CELERY_ENQUEUE_SECONDS = Histogram(
+    "celery_enqueue_seconds", "Time to hand a task to the broker, as seen by the API", ["task"]
+)
 
 
 async def send_bulk_email(data: schema.BulkEmailSchema) -> dict:
     """Queue bulk email sending task in Celery"""
     campaign_id = str(uuid.uuid4())
 
-    # Prepare recipients data for Celery task
-    recipients_data = [
-        {"email": recipient.email, "name": recipient.name}
-        for recipient in data.audience
-    ]
+    # Duplicates and suppressed (bounced, unsubscribed) addresses never reach the queue
+    audience, duplicates, suppressed = await run_blocking(data.audience.screen)
+    queue = select_queue("email", len(audience), data.priority)
 
-    # Queue the task in Celery
-    task = send_bulk_email_task.delay(
-        campaign_id=campaign_id,
-        subject=f"Email Campaign - {data.time}",
-        body=data.message,
-        from_email="noreply@example.com",  # Default sender
-        from_name="Marketing Team",
-        recipients=recipients_data
-    )
+    def enqueue():
+        # Columnar (or claim-check) recipients payload for the Celery task
+        recipients_data = audience.to_task_payload()
+
+        # Queue the task in Celery
+        return tasks.send_bulk_email_task.apply_async(
+            kwargs={
+                "campaign_id": campaign_id,
+                "subject": f"Email Campaign - {data.time}",
+                "body": data.message,
+                "from_email": "noreply@example.com",  # Default sender
+                "from_name": "Marketing Team",
+                "recipients": recipients_data,
+            },
+            queue=queue,
+        )
+
+    # Broker round-trips run on the Celery I/O threads, not the event loop
+    started = time.perf_counter()
+    task = await run_blocking(enqueue)
+    CELERY_ENQUEUE_SECONDS.labels(tasks.send_bulk_email_task.name).observe(time.perf_counter() - started)
 
     return {
         "campaign_id": campaign_id,
         "task_id": task.id,
         "status": "queued",
         "message": "Bulk email task has been queued for processing",
-        "total_recipients": len(data.audience),
+        "priority": data.priority,
+        "queue": queue,
+        "total_recipients": len(audience),
+        "duplicates_removed": duplicates,
+        "suppressed": suppressed,
         "channel": data.channel,
         "scheduled_time": data.time
     }
@@ -38,7 +66,7 @@ async def send_bulk_email(data: schema.BulkEmailSchema) -> dict:
 
 def get_campaign_status(campaign_id: str) -> dict:
     """Get status of a bulk email campaign"""
-    campaign = email_campaigns.get(campaign_id)
+    campaign = tasks.email_campaigns.get(campaign_id)
 
     if not campaign:
         return {
@@ -58,6 +86,11 @@ def get_campaign_status(campaign_id: str) -> dict:
         "status": campaign["status"]
     }
 
+    # Retry progress, once the campaign has run
+    for key in ("bounced_count", "retry_pending", "dead_lettered"):
+        if key in campaign:
+            response[key] = campaign[key]
+
     # Add task_id if available
     if "task_id" in campaign:
         response["task_id"] = campaign["task_id"]
@@ -74,6 +107,27 @@ def get_campaign_status(campaign_id: str) -> dict:
     return response
 
 
+def get_campaign_stats(
+    campaign_id: str,
+    resolution: str = "minute",
+    channel: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> dict:
+    """Delivery time series of a campaign, read from the worker rollups only"""
+    stats = campaign_stats(
+        campaign_id,
+        (channel,) if channel else CHANNELS,
+        resolution,
+        start.timestamp() if start else 0,
+        end.timestamp() if end else float("inf"),
+    )
+    for bucket in stats["buckets"]:
+        bucket["start"] = datetime.fromtimestamp(bucket["start"]).isoformat()
+    stats["channel"] = channel
+    return stats
+
+
 def get_all_campaigns() -> dict:
     """Get all email campaigns"""
     campaigns_list = [
@@ -87,7 +141,7 @@ def get_all_campaigns() -> dict:
             "status": data["status"],
             "task_id": data.get("task_id")
         }
-        for campaign_id, data in email_campaigns.items()
+        for campaign_id, data in tasks.email_campaigns.items()
     ]
 
     # Sort by created_at (newest first)
@@ -99,49 +153,117 @@ def get_all_campaigns() -> dict:
     }
 
 
-def get_task_status_service(task_id: str) -> dict:
+async def get_task_status_service(task_id: str) -> dict:
     """Get the status of a Celery task by task ID"""
-    return get_task_status(task_id)
+    return await run_blocking(tasks.get_task_status, task_id)
 
 
 async def create_campaign(data: schema.CampaignCreateSchema) -> dict:
     """Create a campaign and schedule it for execution"""
     campaign_id = str(uuid.uuid4())
 
-    # Prepare recipients data for Celery task
-    recipients_data = [
-        {"email": recipient.email, "name": recipient.name}
-        for recipient in data.audience
-    ]
+    audience, duplicates, suppressed = await run_blocking(data.audience.screen)
+    queue = select_queue("email", len(audience), data.priority)
 
     # Store campaign info
-    email_campaigns[campaign_id] = {
+    tasks.email_campaigns[campaign_id] = {
         "campaign_id": campaign_id,
         "subject": f"Email Campaign - {data.time}",
+        "from_email": "noreply@example.com",  # Default sender
+        "from_name": "Marketing Team",
         "message": data.message,
         "channel": data.channel,
         "scheduled_time": data.time,
-        "total_recipients": len(data.audience),
+        "priority": data.priority,
+        "queue": queue,
+        "total_recipients": len(audience),
         "sent_count": 0,
         "failed_count": 0,
         "created_at": datetime.now().isoformat(),
         "status": "scheduled"
     }
 
-    # Schedule the campaign task
-    task = schedule_campaign_task.delay(
-        campaign_id=campaign_id,
-        scheduled_time=data.time,
-        message=data.message,
-        recipients=recipients_data
-    )
+    def enqueue():
+        # Columnar (or claim-check) recipients payload for the Celery task
+        recipients_data = audience.to_task_payload()
+
+        # Schedule the campaign task
+        return tasks.schedule_campaign_task.apply_async(
+            kwargs={
+                "campaign_id": campaign_id,
+                "scheduled_time": data.time,
+                "message": data.message,
+                "recipients": recipients_data,
+            },
+            queue=queue,
+        )
+
+    started = time.perf_counter()
+    task = await run_blocking(enqueue)
+    CELERY_ENQUEUE_SECONDS.labels(tasks.schedule_campaign_task.name).observe(time.perf_counter() - started)
 
     return {
         "campaign_id": campaign_id,
         "task_id": task.id,
         "status": "scheduled",
         "message": "Campaign has been scheduled successfully",
+        "priority": data.priority,
+        "queue": queue,
         "scheduled_time": data.time,
-        "total_recipients": len(data.audience),
+        "total_recipients": len(audience),
+        "duplicates_removed": duplicates,
+        "suppressed": suppressed,
         "channel": data.channel
     }
+
+
+def add_suppressions(channel: str, data: schema.SuppressionSchema) -> dict:
+    """Suppress addresses (unsubscribes, complaints, manual bounces) for a channel"""
+    added = get_suppression_list(channel).add(data.addresses)
+    return {"channel": channel, "added": added, "reason": data.reason}
+
+
+def get_suppression(channel: str, address: str) -> dict:
+    return {"channel": channel, "address": address, "suppressed": get_suppression_list(channel).contains(address)}
+
+
+def remove_suppression(channel: str, address: str) -> dict:
+    get_suppression_list(channel).remove([address])
+    return {"channel": channel, "address": address, "suppressed": False}
+
+
+def get_dead_letters(limit: int = 20) -> dict:
+    """Summary of the oldest dead-lettered retry batches"""
+    store = get_dead_letter_store()
+    return {
+        "total_batches": store.count(),
+        "batches": [
+            {
+                "dlq_id": entry["dlq_id"],
+                "campaign_id": entry["campaign_id"],
+                "recipients": len(entry["recipients"]["emails"]),
+                "attempts": entry["attempts"],
+                "last_error": entry["errors"][-1] if entry["errors"] else None,
+                "dead_lettered_at": datetime.fromtimestamp(entry["dead_lettered_at"]).isoformat(),
+            }
+            for entry in store.peek(limit)
+        ],
+    }
+
+
+def redrive_dead_letters(data: schema.RedriveSchema) -> dict:
+    """Move dead-lettered batches back into the retry path with a fresh attempt budget"""
+    entries = get_dead_letter_store().pop(data.limit, data.campaign_id)
+    recipients = 0
+    for entry in entries:
+        batch = entry["recipients"]
+        message = {
+            key: entry[key] for key in ("campaign_id", "subject", "body", "from_email", "from_name")
+        }
+        campaign = tasks.email_campaigns.get(entry["campaign_id"])
+        if campaign is not None:
+            campaign["dead_lettered"] = max(0, campaign.get("dead_lettered", 0) - len(batch["emails"]))
+            campaign["retry_pending"] = campaign.get("retry_pending", 0) + len(batch["emails"])
+        tasks.schedule_retries(message, batch["emails"], batch["names"], attempt=1)
+        recipients += len(batch["emails"])
+    return {"redriven_batches": len(entries), "recipients": recipients, "campaign_id": data.campaign_id}
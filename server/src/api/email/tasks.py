@@ -1,24 +1,116 @@
+import logging
+import os
 import random
 import uuid
 import time
 from datetime import datetime
-from typing import List, Dict
+from typing import Dict, List, Optional
 from celery import Task
 from src.celery_app import celery_app
-from . import schema
+from src.core.metrics import Counter, Histogram
+from src.core.queues import channel_queue
+from src.core.rollups import RollupRecorder
+from src.core.suppression import get_suppression_list
+from src.core.templating import compile_template
+from .audience import Recipients, release_payload
+from .retry import (
+    EMAIL_RETRIES, EMAIL_RETRY_MAX_ATTEMPTS, dead_letter_entry, get_dead_letter_store,
+    retry_batches, retry_delay,
+)
+
+logger = logging.getLogger(__name__)
 
 # In-memory storage for demo purposes
 email_campaigns: Dict[str, dict] = {}
 
+# Simulated provider latency for scheduled campaigns (seconds)
+CAMPAIGN_START_DELAY = float(os.getenv("CAMPAIGN_START_DELAY", "2"))
+CAMPAIGN_SEND_DELAY = float(os.getenv("CAMPAIGN_SEND_DELAY", "0.1"))
+
+EMAILS_PROCESSED = Counter(
+    "emails_processed_total", "Recipients processed by campaign tasks", ["task", "status"]
+)
+CAMPAIGN_SEND_RATE = Histogram(
+    "campaign_send_rate_per_second", "Recipients processed per second, per campaign", ["task"],
+    buckets=(1, 10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000, 500000),
+)
+
+
+def record_campaign_metrics(task_name: str, started: float, sent_count: int, failed_count: int) -> float:
+    """Record per-campaign throughput; returns the send rate (recipients/second)"""
+    elapsed = time.perf_counter() - started
+    processed = sent_count + failed_count
+    send_rate = processed / elapsed if elapsed > 0 else 0.0
+
+    EMAILS_PROCESSED.labels(task_name, "sent").inc(sent_count)
+    EMAILS_PROCESSED.labels(task_name, "failed").inc(failed_count)
+    CAMPAIGN_SEND_RATE.labels(task_name).observe(send_rate)
+    return round(send_rate, 2)
+
+
+# Simulated provider errors; only the last one is permanent (a hard bounce)
+SIMULATED_ERRORS = ["Mailbox temporarily unavailable", "Rate limited by receiving server", "Invalid email address"]
+PERMANENT_ERRORS = frozenset(["Invalid email address"])
+
+
+def deliver(email: str, name: Optional[str], content: str) -> dict:
+    """Simulate handing one message to the provider (75% success rate)"""
+    status = random.choice(["sent", "sent", "sent", "failed"])
+    return {
+        "email": email,
+        "name": name,
+        "status": status,
+        "message_id": f"msg_{uuid.uuid4().hex[:12]}" if status == "sent" else None,
+        "error": random.choice(SIMULATED_ERRORS) if status == "failed" else None,
+        "message_length": len(content),
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+def schedule_retries(message: dict, emails: List[str], names: List[Optional[str]], attempt: int) -> int:
+    """
+    Queue transiently failed recipients as retry batches for `attempt`.
+    `message` holds the campaign_id and the message fields. Returns the
+    number of batches.
+    """
+    batches = retry_batches(emails, names)
+    for batch in batches:
+        # Retries are background work: the regular queue, never the priority one
+        retry_email_batch_task.apply_async(
+            kwargs={**message, "recipients": batch, "attempt": attempt},
+            countdown=retry_delay(attempt),
+            queue=channel_queue("email"),
+        )
+    EMAIL_RETRIES.labels("scheduled").inc(len(emails))
+    return len(batches)
+
+
+def record_outcomes(campaign_id: str, rollup: RollupRecorder, bounced: List[str]) -> None:
+    """
+    Rollup and suppression writes after a delivery pass. Failed recipients
+    are already queued for retry or dead-lettered by then, so a store error
+    here is logged rather than failing the task.
+    """
+    try:
+        rollup.flush()
+    except Exception:
+        logger.exception("Could not flush campaign rollups", extra={"campaign_id": campaign_id})
+    try:
+        get_suppression_list("email").add(bounced)
+    except Exception:
+        logger.exception("Could not suppress bounced addresses", extra={
+            "campaign_id": campaign_id, "bounced": len(bounced),
+        })
+
 
 class EmailTask(Task):
-    """Custom task class with retry logic"""
+    """
+    Campaign task retried explicitly, and only while no message has gone
+    out. There is no autoretry: a whole-task retry after sends would send
+    to every recipient again.
+    """
 
-    autoretry_for = (Exception,)
-    retry_kwargs = {"max_retries": 3, "countdown": 60}
-    retry_backoff = True
-    retry_backoff_max = 600
-    retry_jitter = True
+    max_retries = 3
 
 
 @celery_app.task(bind=True, base=EmailTask, name="send_bulk_email_task")
@@ -29,8 +121,11 @@ def send_bulk_email_task(
     body: str,
     from_email: str,
     from_name: str,
-    recipients: List[Dict],
+    recipients: Dict[str, list],
 ) -> dict:
+    audience = Recipients.from_payload(recipients)
+    results = []
+
     try:
         # Update campaign status to processing
         email_campaigns[campaign_id] = {
@@ -38,7 +133,7 @@ def send_bulk_email_task(
             "subject": subject,
             "from_email": from_email,
             "from_name": from_name,
-            "total_recipients": len(recipients),
+            "total_recipients": len(audience),
             "sent_count": 0,
             "failed_count": 0,
             "created_at": datetime.now().isoformat(),
@@ -48,40 +143,48 @@ def send_bulk_email_task(
         }
 
         # Simulate sending emails
-        results = []
+        started = time.perf_counter()
         sent_count = 0
         failed_count = 0
-
-        for idx, recipient in enumerate(recipients):
+        # Hard bounces are suppressed for every later campaign; transient
+        # failures are retried in batches after the campaign pass
+        bounced = []
+        retry_emails: List[str] = []
+        retry_names: List[Optional[str]] = []
+
+        # Personalized bodies ({name}, {email}), rendered in batches as we go
+        contents = compile_template(body).iter_render(
+            {"name": audience.names, "email": audience.emails}, len(audience)
+        )
+
+        rollup = RollupRecorder(campaign_id, "email")
+        for idx, ((email, name), content) in enumerate(zip(audience, contents)):
             try:
-                # Simulate random success/failure (75% success rate)
-                status = random.choice(["sent", "sent", "sent", "failed"])
-
-                result = {
-                    "email": recipient["email"],
-                    "name": recipient["name"],
-                    "status": status,
-                    "message_id": f"msg_{uuid.uuid4().hex[:12]}"
-                    if status == "sent"
-                    else None,
-                    "error": "Invalid email address" if status == "failed" else None,
-                    "timestamp": datetime.now().isoformat(),
-                }
-
+                sent_at = time.perf_counter()
+                result = deliver(email, name, content)
+                latency = time.perf_counter() - sent_at
                 results.append(result)
 
-                if status == "sent":
+                if result["status"] == "sent":
                     sent_count += 1
+                    rollup.record("sent", latency)
                 else:
                     failed_count += 1
+                    if result["error"] in PERMANENT_ERRORS:
+                        bounced.append(email)
+                        rollup.record("bounced", latency)
+                    else:
+                        retry_emails.append(email)
+                        retry_names.append(name)
+                        rollup.record("failed", latency)
 
                 # Update progress periodically (every 10 emails or at the end)
-                if (idx + 1) % 10 == 0 or (idx + 1) == len(recipients):
+                if (idx + 1) % 10 == 0 or (idx + 1) == len(audience):
                     self.update_state(
                         state="PROGRESS",
                         meta={
                             "current": idx + 1,
-                            "total": len(recipients),
+                            "total": len(audience),
                             "sent_count": sent_count,
                             "failed_count": failed_count,
                             "status": "processing",
@@ -91,10 +194,12 @@ def send_bulk_email_task(
             except Exception as e:
                 # Handle individual email failures
                 failed_count += 1
+                retry_emails.append(email)
+                retry_names.append(name)
                 results.append(
                     {
-                        "email": recipient.get("email", "unknown"),
-                        "name": recipient.get("name", "unknown"),
+                        "email": email,
+                        "name": name,
                         "status": "failed",
                         "message_id": None,
                         "error": str(e),
@@ -102,30 +207,55 @@ def send_bulk_email_task(
                     }
                 )
 
+        # Hand transient failures off first, so nothing after this can drop them
+        retry_batch_count = 0
+        if retry_emails:
+            message = {
+                "campaign_id": campaign_id, "subject": subject, "body": body,
+                "from_email": from_email, "from_name": from_name,
+            }
+            retry_batch_count = schedule_retries(message, retry_emails, retry_names, attempt=1)
+
+        send_rate = record_campaign_metrics(self.name, started, sent_count, failed_count)
+        record_outcomes(campaign_id, rollup, bounced)
+
         # Update campaign with final results
         campaign_data = {
             "campaign_id": campaign_id,
             "subject": subject,
             "from_email": from_email,
             "from_name": from_name,
-            "total_recipients": len(recipients),
+            "total_recipients": len(audience),
             "sent_count": sent_count,
             "failed_count": failed_count,
+            "bounced_count": len(bounced),
+            "retry_pending": len(retry_emails),
+            "dead_lettered": 0,
             "created_at": email_campaigns[campaign_id]["created_at"],
             "completed_at": datetime.now().isoformat(),
             "status": "completed",
             "task_id": self.request.id,
+            "send_rate": send_rate,
             "results": results,
         }
 
         email_campaigns[campaign_id] = campaign_data
+        # Retry batches carry their recipients, so the stored audience can go
+        release_payload(recipients)
+        logger.info("Campaign completed", extra={
+            "campaign_id": campaign_id, "sent_count": sent_count,
+            "failed_count": failed_count, "send_rate": send_rate,
+            "retry_batches": retry_batch_count,
+        })
 
         return {
             "campaign_id": campaign_id,
             "status": "completed",
-            "total_recipients": len(recipients),
+            "total_recipients": len(audience),
             "sent_count": sent_count,
             "failed_count": failed_count,
+            "retry_pending": len(retry_emails),
+            "retry_batches": retry_batch_count,
             "task_id": self.request.id,
         }
 
@@ -140,28 +270,133 @@ def send_bulk_email_task(
                 }
             )
 
-        # Retry the task
-        raise self.retry(exc=e)
+        if not results:
+            # Nothing was sent yet, so the whole task can safely run again
+            raise self.retry(exc=e, countdown=retry_delay(self.request.retries + 1))
+
+        # Messages went out: retrying the task would send them again
+        logger.error("Campaign failed after sending", extra={
+            "campaign_id": campaign_id, "processed": len(results), "error": str(e),
+        })
+        try:
+            release_payload(recipients)
+        except Exception:
+            logger.exception("Could not release campaign payload", extra={"campaign_id": campaign_id})
+        return {
+            "campaign_id": campaign_id,
+            "status": "failed",
+            "total_recipients": len(audience),
+            "processed": len(results),
+            "error": str(e),
+            "task_id": self.request.id,
+        }
+
+
+@celery_app.task(bind=True, name="retry_email_batch_task")
+def retry_email_batch_task(
+    self,
+    campaign_id: str,
+    subject: str,
+    body: str,
+    from_email: str,
+    from_name: str,
+    recipients: Dict[str, list],
+    attempt: int,
+) -> dict:
+    """Resend one batch of transiently failed recipients; dead-letters it after the last attempt"""
+    audience = Recipients.from_payload(recipients)
+    contents = compile_template(body).iter_render(
+        {"name": audience.names, "email": audience.emails}, len(audience)
+    )
+
+    started = time.perf_counter()
+    sent_count = 0
+    bounced = []
+    retry_emails: List[str] = []
+    retry_names: List[Optional[str]] = []
+    errors: List[str] = []
+    rollup = RollupRecorder(campaign_id, "email")
+    for (email, name), content in zip(audience, contents):
+        sent_at = time.perf_counter()
+        result = deliver(email, name, content)
+        latency = time.perf_counter() - sent_at
+        if result["status"] == "sent":
+            sent_count += 1
+            rollup.record("sent", latency)
+        elif result["error"] in PERMANENT_ERRORS:
+            bounced.append(email)
+            rollup.record("bounced", latency)
+        else:
+            retry_emails.append(email)
+            retry_names.append(name)
+            errors.append(result["error"])
+            rollup.record("failed", latency)
+
+    dead_lettered = len(retry_emails) if attempt >= EMAIL_RETRY_MAX_ATTEMPTS else 0
+    message = {
+        "campaign_id": campaign_id, "subject": subject, "body": body,
+        "from_email": from_email, "from_name": from_name,
+    }
+    # The next attempt or the dead letter goes out before any bookkeeping
+    if dead_lettered:
+        store = get_dead_letter_store()
+        for batch in retry_batches(retry_emails, retry_names):
+            batch_errors, errors = errors[:len(batch["emails"])], errors[len(batch["emails"]):]
+            store.push(dead_letter_entry(message, batch, batch_errors, attempt))
+        EMAIL_RETRIES.labels("dead_lettered").inc(dead_lettered)
+    elif retry_emails:
+        schedule_retries(message, retry_emails, retry_names, attempt + 1)
+
+    record_campaign_metrics(self.name, started, sent_count, len(audience) - sent_count)
+    record_outcomes(campaign_id, rollup, bounced)
+    EMAIL_RETRIES.labels("recovered").inc(sent_count)
+
+    campaign = email_campaigns.get(campaign_id)
+    if campaign is not None:
+        # failed_count tracks recipients not (yet) delivered
+        campaign["sent_count"] += sent_count
+        campaign["failed_count"] -= sent_count
+        campaign["bounced_count"] = campaign.get("bounced_count", 0) + len(bounced)
+        campaign["retry_pending"] = max(0, campaign.get("retry_pending", 0) - len(audience) + len(retry_emails) - dead_lettered)
+        campaign["dead_lettered"] = campaign.get("dead_lettered", 0) + dead_lettered
+
+    release_payload(recipients)
+    logger.info("Retry batch delivered", extra={
+        "campaign_id": campaign_id, "attempt": attempt, "recipients": len(audience),
+        "sent_count": sent_count, "retrying": len(retry_emails) - dead_lettered,
+        "dead_lettered": dead_lettered,
+    })
+    return {
+        "campaign_id": campaign_id,
+        "attempt": attempt,
+        "recipients": len(audience),
+        "sent_count": sent_count,
+        "bounced_count": len(bounced),
+        "retrying": len(retry_emails) - dead_lettered,
+        "dead_lettered": dead_lettered,
+    }
 
 
 def get_task_status(task_id: str) -> dict:
     """Get the status of a Celery task"""
     task_result = celery_app.AsyncResult(task_id)
 
-    response = {"task_id": task_id, "status": task_result.state, "result": None}
+    # Each .state/.info access is a result-backend round-trip; read them once
+    state = task_result.state
+    response = {"task_id": task_id, "status": state, "result": None}
 
-    if task_result.state == "PENDING":
+    if state == "PENDING":
         response["result"] = {
             "status": "pending",
             "message": "Task is waiting to be processed",
         }
-    elif task_result.state == "PROGRESS":
+    elif state == "PROGRESS":
         response["result"] = task_result.info
-    elif task_result.state == "SUCCESS":
+    elif state == "SUCCESS":
         response["result"] = task_result.result
-    elif task_result.state == "FAILURE":
+    elif state == "FAILURE":
         response["result"] = {"status": "failed", "error": str(task_result.info)}
-    elif task_result.state == "RETRY":
+    elif state == "RETRY":
         response["result"] = {
             "status": "retrying",
             "message": "Task is being retried after a failure",
@@ -176,9 +411,11 @@ def schedule_campaign_task(
     campaign_id: str,
     scheduled_time: str,
     message: str,
-    recipients: List[Dict],
+    recipients: Dict[str, list],
 ) -> dict:
     """Scheduled campaign task that simulates bulk email processing"""
+    audience = Recipients.from_payload(recipients)
+
     try:
         # Update campaign status to processing
         if campaign_id in email_campaigns:
@@ -187,23 +424,31 @@ def schedule_campaign_task(
             email_campaigns[campaign_id]["processing_started_at"] = datetime.now().isoformat()
 
         # Simulate processing delay
-        time.sleep(2)
+        time.sleep(CAMPAIGN_START_DELAY)
 
         # Simulate sending emails to recipients
+        started = time.perf_counter()
         results = []
         sent_count = 0
         failed_count = 0
 
-        for idx, recipient in enumerate(recipients):
+        contents = compile_template(message).iter_render(
+            {"name": audience.names, "email": audience.emails}, len(audience)
+        )
+
+        rollup = RollupRecorder(campaign_id, "email")
+        for idx, ((email, name), content) in enumerate(zip(audience, contents)):
+            sent_at = time.perf_counter()
             # Simulate random success/failure (90% success rate for demo)
             status = random.choice(["sent"] * 9 + ["failed"])
 
             result = {
-                "email": recipient["email"],
-                "name": recipient["name"],
+                "email": email,
+                "name": name,
                 "status": status,
                 "message_id": f"sim_{uuid.uuid4().hex[:12]}" if status == "sent" else None,
                 "error": "Simulated delivery failure" if status == "failed" else None,
+                "message_length": len(content),
                 "timestamp": datetime.now().isoformat(),
             }
 
@@ -215,12 +460,12 @@ def schedule_campaign_task(
                 failed_count += 1
 
             # Update progress
-            if (idx + 1) % 5 == 0 or (idx + 1) == len(recipients):
+            if (idx + 1) % 5 == 0 or (idx + 1) == len(audience):
                 self.update_state(
                     state="PROGRESS",
                     meta={
                         "current": idx + 1,
-                        "total": len(recipients),
+                        "total": len(audience),
                         "sent_count": sent_count,
                         "failed_count": failed_count,
                         "status": "processing",
@@ -228,7 +473,11 @@ def schedule_campaign_task(
                 )
 
             # Simulate processing time per email
-            time.sleep(0.1)
+            time.sleep(CAMPAIGN_SEND_DELAY)
+            rollup.record(status, time.perf_counter() - sent_at)
+
+        send_rate = record_campaign_metrics(self.name, started, sent_count, failed_count)
+        rollup.flush()
 
         # Update campaign with final results
         if campaign_id in email_campaigns:
@@ -237,13 +486,19 @@ def schedule_campaign_task(
                 "failed_count": failed_count,
                 "completed_at": datetime.now().isoformat(),
                 "status": "completed",
+                "send_rate": send_rate,
                 "results": results,
             })
+        release_payload(recipients)
+        logger.info("Campaign completed", extra={
+            "campaign_id": campaign_id, "sent_count": sent_count,
+            "failed_count": failed_count, "send_rate": send_rate,
+        })
 
         return {
             "campaign_id": campaign_id,
             "status": "completed",
-            "total_recipients": len(recipients),
+            "total_recipients": len(audience),
             "sent_count": sent_count,
             "failed_count": failed_count,
             "task_id": self.request.id,
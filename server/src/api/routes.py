@@ -1,14 +1,44 @@
-from fastapi import FastAPI
+import importlib
+import logging
+import os
+from typing import List
 
-from .source.route import source_routes
-from .stream.route import stream_routes
-from .email.route import email_routes
+from fastapi import FastAPI, Response
+from src.core import metrics
 
-def register_routes(server: FastAPI) -> None:
+logger = logging.getLogger(__name__)
+
+# Routers by deployment role, imported only for the roles served. APP_ROLE
+# takes one role or a comma-separated list, e.g. "stream" or "email,source".
+ROLE_ROUTERS = {
+    "stream": ["src.api.stream.route:stream_routes"],
+    "source": ["src.api.source.route:source_routes"],
+    "email": ["src.api.email.route:email_routes", "src.api.channels.route:channel_routes"],
+}
+ROLE_ROUTERS["all"] = [router for routers in ROLE_ROUTERS.values() for router in routers]
+
+APP_ROLE = os.getenv("APP_ROLE", "all")
+
+
+def role_routers(role: str = APP_ROLE) -> List[str]:
+    routers: List[str] = []
+    for name in (part.strip() for part in role.split(",") if part.strip()):
+        if name not in ROLE_ROUTERS:
+            raise ValueError(f"Unknown APP_ROLE {name!r}; expected one of {', '.join(ROLE_ROUTERS)}")
+        routers += [router for router in ROLE_ROUTERS[name] if router not in routers]
+    return routers
+
+
+def register_routes(server: FastAPI, role: str = APP_ROLE) -> None:
     @server.get("/health")
     async def health():
-        return {"status": "ok"}
+        return {"status": "ok", "role": role}
+
+    @server.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics():
+        return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
 
-    server.include_router(source_routes)
-    server.include_router(stream_routes)
-    server.include_router(email_routes)
+    for router in role_routers(role):
+        module, attr = router.split(":")
+        server.include_router(getattr(importlib.import_module(module), attr))
+    logger.debug("Routes registered", extra={"role": role})
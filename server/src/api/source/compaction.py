@@ -0,0 +1,154 @@
+"""
+Compaction of scraped website blocks before they reach the generator.
+
+Three passes, cheapest first:
+
+1. Blocks are deduplicated by a hash of their normalized content
+   (case, whitespace and punctuation folded). List items already seen in
+   another list, or repeated as a link's text, are dropped, and so are
+   lists left empty.
+2. For crawls, blocks that repeat on many pages (nav, footer, cookie
+   banners) are collapsed into one "common_blocks" list.
+3. A byte budget is enforced by rank: headings first, then paragraphs,
+   then lists, then links. Blocks are kept in document order.
+"""
+import hashlib
+import os
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.core.metrics import Histogram
+from src.core.serialization import dumps_bytes
+
+# Serialized bytes of website data handed to the generator (~4 bytes per token)
+SOURCE_BYTE_BUDGET = int(os.getenv("SOURCE_BYTE_BUDGET", "16000"))
+# A block on at least this share of crawled pages (and on 2 or more) is boilerplate
+BOILERPLATE_MIN_SHARE = float(os.getenv("BOILERPLATE_MIN_SHARE", "0.5"))
+
+SOURCE_COMPACTION_RATIO = Histogram(
+    "source_compaction_ratio", "Compacted size of website data as a share of the scraped size",
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0),
+)
+
+# Lower ranks survive the budget first
+TAG_RANK = {"h1": 0, "h2": 1, "h3": 2, "h4": 2, "h5": 2, "h6": 2, "p": 3, "ul": 4, "ol": 4, "a": 5}
+
+_FOLD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize(text: str) -> str:
+    return _FOLD.sub(" ", text.lower()).strip()
+
+
+def block_key(block: dict) -> str:
+    """Content hash of a block, ignoring case, whitespace and punctuation"""
+    if "items" in block:
+        content = "\x1f".join(normalize(item) for item in block["items"])
+    else:
+        content = normalize(block.get("text", ""))
+        if block["tag"] == "a":
+            content += "\x1f" + block.get("href", "")
+    kind = "list" if block["tag"] in ("ul", "ol") else block["tag"]
+    return hashlib.blake2b(f"{kind}\x1e{content}".encode(), digest_size=12).hexdigest()
+
+
+def dedupe_blocks(blocks: List[dict], seen: Optional[Set[str]] = None,
+                  seen_items: Optional[Set[str]] = None) -> List[dict]:
+    """Drop repeated blocks and list items; `seen` sets can be shared across pages"""
+    seen = set() if seen is None else seen
+    seen_items = set() if seen_items is None else seen_items
+    # traverse() emits both a nav list and its links; the link block carries the href
+    link_texts = {normalize(block["text"]) for block in blocks if block["tag"] == "a"}
+    out = []
+    for block in blocks:
+        if "items" in block:
+            items = []
+            for item in block["items"]:
+                key = normalize(item)
+                if key and key not in seen_items and key not in link_texts:
+                    seen_items.add(key)
+                    items.append(item)
+            if not items:
+                continue
+            if len(items) != len(block["items"]):
+                block = {**block, "items": items}
+        key = block_key(block)
+        if key in seen:
+            continue
+        seen.add(key)
+        out.append(block)
+    return out
+
+
+def apply_budget(blocks: List[dict], budget: int) -> List[dict]:
+    """Keep the highest-ranked blocks that fit in `budget` bytes, in document order"""
+    # Each block also costs its ", " separator in the serialized list
+    sizes = [len(dumps_bytes(block)) + 2 for block in blocks]
+    if sum(sizes) <= budget:
+        return blocks
+    order = sorted(range(len(blocks)), key=lambda idx: (TAG_RANK.get(blocks[idx]["tag"], 6), idx))
+    keep = []
+    used = 0
+    for idx in order:
+        if used + sizes[idx] <= budget:
+            keep.append(idx)
+            used += sizes[idx]
+    return [blocks[idx] for idx in sorted(keep)]
+
+
+def compact_blocks(blocks: List[dict], budget: int = SOURCE_BYTE_BUDGET) -> List[dict]:
+    """Compact a single page scraped by scrape_website"""
+    before = len(dumps_bytes(blocks))
+    compacted = apply_budget(dedupe_blocks(blocks), budget)
+    if before:
+        SOURCE_COMPACTION_RATIO.observe(len(dumps_bytes(compacted)) / before)
+    return compacted
+
+
+def compact_crawl(crawl: dict, budget: int = SOURCE_BYTE_BUDGET) -> dict:
+    """Compact a crawl_website result: common boilerplate once, then per-page content"""
+    pages = crawl["pages"]
+    before = len(dumps_bytes(pages))
+
+    # Blocks repeated across pages, counted once per page
+    page_keys: List[List[Tuple[str, dict]]] = []
+    counts: Dict[str, int] = {}
+    for page in pages:
+        keyed = [(block_key(block), block) for block in page["blocks"]]
+        page_keys.append(keyed)
+        for key in {key for key, _ in keyed}:
+            counts[key] = counts.get(key, 0) + 1
+    threshold = max(2, BOILERPLATE_MIN_SHARE * len(pages))
+    boilerplate = {key for key, count in counts.items() if count >= threshold}
+
+    seen: Set[str] = set()
+    seen_items: Set[str] = set()
+    common: List[dict] = []
+    compacted_pages = []
+    for page, keyed in zip(pages, page_keys):
+        content = [block for key, block in keyed if key not in boilerplate]
+        common += [block for key, block in keyed if key in boilerplate and key not in seen]
+        seen.update(key for key, _ in keyed if key in boilerplate)
+        compacted_pages.append({**page, "blocks": content})
+
+    # Items of collapsed boilerplate lists are not repeated in page lists
+    common = dedupe_blocks(common, set(), seen_items)
+
+    # Page content gets the budget first; boilerplate only fills what is left
+    for page in compacted_pages:
+        page["blocks"] = dedupe_blocks(page["blocks"], seen, seen_items)
+    kept = apply_budget([block for page in compacted_pages for block in page["blocks"]], budget)
+    kept_ids = {id(block) for block in kept}
+    for page in compacted_pages:
+        page["blocks"] = [block for block in page["blocks"] if id(block) in kept_ids]
+    remaining = budget - len(dumps_bytes(kept))
+    common = apply_budget(common, max(0, remaining))
+
+    result = {
+        **crawl,
+        "common_blocks": common,
+        "pages": [page for page in compacted_pages if page["blocks"]],
+    }
+    if before:
+        SOURCE_COMPACTION_RATIO.observe(len(dumps_bytes(result["pages"]) + dumps_bytes(common)) / before)
+    return result
@@ -0,0 +1,323 @@
+"""
+Bounded crawl of a website for the "website" data source.
+
+Starting from one URL, the crawler follows the same-origin links that
+traverse() already extracts as "a" blocks, breadth first. It also seeds
+from the site's sitemap.xml and honours robots.txt (rules and
+Crawl-delay). Pages are fetched concurrently, with a per-host connection
+cap and a minimum gap between requests to the same host. Duplicates are
+dropped by normalized URL, by the page's canonical URL and by a hash of
+its extracted content, so "/" and "/index.html" count once.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+import xml.etree.ElementTree as ElementTree
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urldefrag, urljoin, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+
+from src.core.lazy import lazy_import
+from src.core.metrics import Counter
+from src.core.profiling import span, traced
+from src.core.serialization import dumps_bytes
+from .service import parse_page
+
+httpx = lazy_import("httpx")
+
+logger = logging.getLogger(__name__)
+
+CRAWL_MAX_PAGES = int(os.getenv("CRAWL_MAX_PAGES", "20"))
+CRAWL_MAX_DEPTH = int(os.getenv("CRAWL_MAX_DEPTH", "2"))
+# Upper bounds on what a request may ask for
+CRAWL_PAGES_LIMIT = 500
+CRAWL_DEPTH_LIMIT = 10
+# Pages fetched at once, overall and per host
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "8"))
+CRAWL_HOST_CONCURRENCY = int(os.getenv("CRAWL_HOST_CONCURRENCY", "2"))
+# Minimum seconds between requests to one host; robots.txt Crawl-delay wins if larger
+CRAWL_DELAY = float(os.getenv("CRAWL_DELAY", "0"))
+CRAWL_USER_AGENT = os.getenv("CRAWL_USER_AGENT", "MarkopoloBot/1.0")
+CRAWL_TIMEOUT = float(os.getenv("CRAWL_TIMEOUT", "15"))
+# Sitemap entries used as extra seeds
+CRAWL_SITEMAP_LIMIT = int(os.getenv("CRAWL_SITEMAP_LIMIT", "500"))
+
+CRAWL_PAGES = Counter(
+    "crawl_pages_total", "Crawled URLs by outcome", ["outcome"]
+)
+
+SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str, base: Optional[str] = None) -> Optional[str]:
+    """Absolute http(s) URL without fragment, default port or empty path"""
+    url, _ = urldefrag(urljoin(base, url) if base else url)
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+    host = parts.hostname.lower()
+    if parts.port and parts.port != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{parts.port}"
+    return urlunsplit((scheme, host, parts.path or "/", parts.query, ""))
+
+
+def origin_of(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def parse_crawl_delay(lines: List[str], user_agent: str) -> Optional[float]:
+    """
+    Crawl-delay for `user_agent`, matched the way RobotFileParser matches
+    groups. RobotFileParser only reads whole seconds; fractions are common.
+    """
+    agent = user_agent.split("/")[0].lower()
+    delays: Dict[str, float] = {}
+    group: List[str] = []
+    in_rules = False
+    for raw in lines:
+        line = raw.split("#", 1)[0].strip()
+        if ":" not in line:
+            continue
+        key, value = (part.strip() for part in line.split(":", 1))
+        key = key.lower()
+        if key == "user-agent":
+            if in_rules:
+                group, in_rules = [], False
+            group.append(value.lower())
+            continue
+        in_rules = True
+        if key == "crawl-delay":
+            try:
+                delay = float(value)
+            except ValueError:
+                continue
+            for name in group:
+                delays.setdefault(name, delay)
+    for name, delay in delays.items():
+        if name != "*" and name in agent:
+            return delay
+    return delays.get("*")
+
+
+class HostPolicy:
+    """Per-host politeness: a connection cap and a minimum gap between requests"""
+
+    def __init__(self, concurrency: int, delay: float):
+        self.delay = delay
+        self._slots = asyncio.Semaphore(concurrency)
+        self._lock = asyncio.Lock()
+        self._next_request = 0.0
+
+    async def __aenter__(self):
+        await self._slots.acquire()
+        if self.delay > 0:
+            async with self._lock:
+                wait = self._next_request - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._next_request = time.monotonic() + self.delay
+        return self
+
+    async def __aexit__(self, *exc):
+        self._slots.release()
+
+
+class Crawler:
+    def __init__(
+        self,
+        start_url: str,
+        max_pages: int = CRAWL_MAX_PAGES,
+        max_depth: int = CRAWL_MAX_DEPTH,
+        concurrency: int = CRAWL_CONCURRENCY,
+    ):
+        start = normalize_url(start_url)
+        if start is None:
+            raise ValueError(f"Cannot crawl {start_url!r}: not an http(s) URL")
+        self.start_url = start
+        self.origin = origin_of(start)
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self._fetch_slots = asyncio.Semaphore(concurrency)
+        self._hosts: Dict[str, HostPolicy] = {}
+        self._robots: Optional[RobotFileParser] = None
+        self._delay = CRAWL_DELAY
+
+        self.pages: List[dict] = []
+        self._seen_urls: Set[str] = set()
+        self._seen_hashes: Set[str] = set()
+        self.stats = {"fetched": 0, "robots_blocked": 0, "duplicates": 0, "errors": 0}
+
+    def _host(self, url: str) -> HostPolicy:
+        host = urlsplit(url).netloc
+        policy = self._hosts.get(host)
+        if policy is None:
+            policy = self._hosts[host] = HostPolicy(CRAWL_HOST_CONCURRENCY, self._delay)
+        return policy
+
+    def _same_origin(self, url: str) -> bool:
+        return origin_of(url) == self.origin
+
+    def _allowed(self, url: str) -> bool:
+        return self._robots is None or self._robots.can_fetch(CRAWL_USER_AGENT, url)
+
+    async def _get(self, client: httpx.AsyncClient, url: str) -> httpx.Response:
+        async with self._fetch_slots, self._host(url):
+            return await client.get(url)
+
+    async def _load_robots(self, client: httpx.AsyncClient) -> List[str]:
+        """Parse robots.txt; returns the sitemap URLs it lists"""
+        try:
+            response = await self._get(client, f"{self.origin}/robots.txt")
+        except httpx.HTTPError:
+            return []
+        if response.status_code != 200:
+            return []
+
+        lines = response.text.splitlines()
+        robots = RobotFileParser()
+        robots.parse(lines)
+        self._robots = robots
+        crawl_delay = parse_crawl_delay(lines, CRAWL_USER_AGENT)
+        if crawl_delay:
+            self._delay = max(self._delay, float(crawl_delay))
+            # Fetching robots.txt already created this origin's policy
+            for policy in self._hosts.values():
+                policy.delay = max(policy.delay, self._delay)
+        # Sitemap lines are meant to be absolute; resolve relative ones leniently
+        return [urljoin(self.origin + "/", sitemap) for sitemap in robots.site_maps() or []]
+
+    async def _load_sitemaps(self, client: httpx.AsyncClient, sitemaps: List[str]) -> List[str]:
+        """Page URLs listed in the sitemaps, following one level of sitemap index"""
+        urls: List[str] = []
+        pending = list(sitemaps) or [f"{self.origin}/sitemap.xml"]
+        nested = 0
+        while pending and len(urls) < CRAWL_SITEMAP_LIMIT:
+            sitemap = pending.pop(0)
+            try:
+                response = await self._get(client, sitemap)
+                if response.status_code != 200:
+                    continue
+                root = ElementTree.fromstring(response.content)
+            except (httpx.HTTPError, ElementTree.ParseError):
+                continue
+
+            locs = [(loc.text or "").strip() for loc in root.iter(f"{SITEMAP_NS}loc")]
+            if root.tag == f"{SITEMAP_NS}sitemapindex":
+                if nested == 0:
+                    pending += [urljoin(sitemap, loc) for loc in locs if loc]
+                nested += 1
+                continue
+            urls += [urljoin(sitemap, loc) for loc in locs if loc]
+        return urls[:CRAWL_SITEMAP_LIMIT]
+
+    def _enqueue(self, url: Optional[str], frontier: List[str]) -> None:
+        if url is None or url in self._seen_urls or not self._same_origin(url):
+            return
+        self._seen_urls.add(url)
+        if not self._allowed(url):
+            self.stats["robots_blocked"] += 1
+            CRAWL_PAGES.labels("robots_blocked").inc()
+            return
+        frontier.append(url)
+
+    async def _visit(self, client: httpx.AsyncClient, url: str, depth: int) -> Optional[Tuple[dict, List[str]]]:
+        """Fetch and parse one page; None for errors, non-HTML responses and duplicates"""
+        try:
+            with span("crawl_fetch"):
+                response = await self._get(client, url)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            self.stats["errors"] += 1
+            CRAWL_PAGES.labels("error").inc()
+            logger.info("Crawl fetch failed", extra={"url": url, "error": str(e)})
+            return None
+
+        self.stats["fetched"] += 1
+        if "html" not in response.headers.get("content-type", "html"):
+            CRAWL_PAGES.labels("skipped").inc()
+            return None
+
+        final_url = normalize_url(str(response.url)) or url
+        blocks, canonical = parse_page(response.text)
+        canonical = normalize_url(canonical, final_url) if canonical else None
+
+        # Redirects and canonical links that point at an already seen URL
+        aliases = {u for u in (final_url, canonical) if u and u != url and self._same_origin(u)}
+        digest = hashlib.blake2b(dumps_bytes(blocks), digest_size=16).hexdigest()
+        if aliases & self._seen_urls or digest in self._seen_hashes:
+            self.stats["duplicates"] += 1
+            CRAWL_PAGES.labels("duplicate").inc()
+            return None
+        self._seen_urls.update(aliases)
+        self._seen_hashes.add(digest)
+
+        links = [
+            normalize_url(block["href"], final_url)
+            for block in blocks
+            if block["tag"] == "a"
+        ]
+        CRAWL_PAGES.labels("ok").inc()
+        return {"url": canonical or final_url, "depth": depth, "blocks": blocks}, links
+
+    @traced("crawl_website")
+    async def run(self) -> dict:
+        started = time.perf_counter()
+        async with httpx.AsyncClient(
+            timeout=CRAWL_TIMEOUT,
+            follow_redirects=True,
+            headers={"User-Agent": CRAWL_USER_AGENT},
+        ) as client:
+            sitemaps = await self._load_robots(client)
+
+            frontier: List[str] = []
+            self._enqueue(self.start_url, frontier)
+            sitemap_seeds: List[str] = []
+            if self.max_depth > 0:
+                for url in await self._load_sitemaps(client, sitemaps):
+                    self._enqueue(normalize_url(url), sitemap_seeds)
+
+            depth = 0
+            while frontier and depth <= self.max_depth and len(self.pages) < self.max_pages:
+                next_frontier: List[str] = sitemap_seeds if depth == 0 else []
+                while frontier and len(self.pages) < self.max_pages:
+                    # Never fetch more than the pages still allowed
+                    room = self.max_pages - len(self.pages)
+                    wave, frontier = frontier[:room], frontier[room:]
+                    results = await asyncio.gather(*(self._visit(client, url, depth) for url in wave))
+                    for result in results:
+                        if result is None or len(self.pages) >= self.max_pages:
+                            continue
+                        page, links = result
+                        self.pages.append(page)
+                        if depth < self.max_depth:
+                            for link in links:
+                                self._enqueue(link, next_frontier)
+                frontier = next_frontier
+                depth += 1
+
+        logger.info("Crawl finished", extra={"url": self.start_url, "pages": len(self.pages), **self.stats})
+        return {
+            "url": self.start_url,
+            "pages": self.pages,
+            "stats": {
+                **self.stats,
+                "pages": len(self.pages),
+                "seconds": round(time.perf_counter() - started, 3),
+            },
+        }
+
+
+async def crawl_website(
+    url: str,
+    max_pages: int = CRAWL_MAX_PAGES,
+    max_depth: int = CRAWL_MAX_DEPTH,
+) -> dict:
+    """Crawl up to max_pages same-origin pages, at most max_depth links from url"""
+    return await Crawler(url, max_pages=max_pages, max_depth=max_depth).run()
@@ -0,0 +1,201 @@
+"""
+Local stand-in for the parts of the Facebook Graph API used by the
+facebook_page source: page fields, and a page's posts with cursor
+pagination, field selection and since/until windows.
+
+Run it and point the source at it:
+
+    uvicorn src.api.source.graph_stub:app --port 9100
+    FACEBOOK_GRAPH_URL=http://localhost:9100 uvicorn src.main:app
+
+Each page has FACEBOOK_STUB_POSTS deterministic posts (seeded by page id)
+spread over the last FACEBOOK_STUB_DAYS days. POST /{version}/{page_id}/feed
+publishes a new post, which is what incremental sync picks up.
+FACEBOOK_STUB_LATENCY adds a delay per request. The same functions back the
+in-process SimulatedGraphProvider, so behaviour matches without a server.
+"""
+import asyncio
+import base64
+import bisect
+import hashlib
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from pydantic import BaseModel
+
+from .service import PAGE_NAMES, POST_TEMPLATES
+
+FACEBOOK_STUB_POSTS = int(os.getenv("FACEBOOK_STUB_POSTS", "2000"))
+FACEBOOK_STUB_DAYS = int(os.getenv("FACEBOOK_STUB_DAYS", "365"))
+FACEBOOK_STUB_LATENCY = float(os.getenv("FACEBOOK_STUB_LATENCY", "0"))
+
+# Graph caps page sizes at 100
+MAX_LIMIT = 100
+PAGE_FIELDS = ("id", "name", "fan_count", "followers_count", "category", "is_verified", "created_time")
+POST_FIELDS = ("id", "message", "created_time", "reactions", "comments", "shares")
+DEFAULT_PAGE_FIELDS = "id,name,fan_count"
+DEFAULT_POST_FIELDS = "id,message,created_time"
+
+
+def graph_time(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S+0000")
+
+
+def encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(str(offset).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise ValueError(f"Invalid cursor {cursor!r}")
+
+
+class StubPage:
+    """One page's data: fields plus posts kept oldest first"""
+
+    def __init__(self, page_id: str, posts: int, days: int):
+        rng = random.Random(hashlib.blake2b(page_id.encode(), digest_size=8).digest())
+        now = time.time()
+        self.lock = threading.Lock()
+        self.page_id = page_id
+        self.name = rng.choice(PAGE_NAMES)
+        self.fields = {
+            "id": page_id,
+            "name": self.name,
+            "fan_count": rng.randint(1000, 50000),
+            "followers_count": rng.randint(800, 45000),
+            "category": rng.choice(["Business", "Entertainment", "Education", "Health", "Technology"]),
+            "is_verified": rng.random() < 0.5,
+            "created_time": graph_time(now - rng.randint(365, 2000) * 86400),
+        }
+        times = sorted(now - rng.uniform(0, days * 86400) for _ in range(posts))
+        self.times: List[float] = []
+        self.posts: List[dict] = []
+        for index, created in enumerate(times):
+            self._append(f"{page_id}_{index + 1}", rng.choice(POST_TEMPLATES).replace("{page_name}", self.name),
+                         created, rng)
+
+    def _append(self, post_id: str, message: str, created: float, rng: random.Random) -> dict:
+        post = {
+            "id": post_id,
+            "message": message,
+            "created_time": graph_time(created),
+            "reactions": {"summary": {"total_count": rng.randint(10, 500)}},
+            "comments": {"summary": {"total_count": rng.randint(2, 50)}},
+            "shares": {"count": rng.randint(1, 25)},
+        }
+        self.times.append(created)
+        self.posts.append(post)
+        return post
+
+    def publish(self, message: str) -> dict:
+        with self.lock:
+            created = max(time.time(), self.times[-1] + 1 if self.times else 0)
+            return self._append(f"{self.page_id}_{len(self.posts) + 1}", message, created, random.Random())
+
+
+@lru_cache(maxsize=256)
+def get_stub_page(page_id: str) -> StubPage:
+    return StubPage(page_id, FACEBOOK_STUB_POSTS, FACEBOOK_STUB_DAYS)
+
+
+def select(record: dict, fields: str, allowed) -> dict:
+    wanted = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in wanted if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return {field: record[field] for field in wanted}
+
+
+def page_info(page_id: str, fields: str = DEFAULT_PAGE_FIELDS) -> dict:
+    return select(get_stub_page(page_id).fields, fields, PAGE_FIELDS)
+
+
+def list_posts(
+    page_id: str,
+    fields: str = DEFAULT_POST_FIELDS,
+    limit: int = 25,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    after: Optional[str] = None,
+) -> dict:
+    """
+    Posts newest first, created at or after `since` and before `until`
+    (unix seconds). The response is a Graph-style {"data": [...], "paging": ...} envelope.
+    """
+    page = get_stub_page(page_id)
+    limit = max(1, min(limit, MAX_LIMIT))
+    with page.lock:
+        low = bisect.bisect_left(page.times, since) if since is not None else 0
+        high = bisect.bisect_left(page.times, until) if until is not None else len(page.times)
+        # Offsets count back from the newest post of the window
+        offset = decode_cursor(after) if after else 0
+        end = high - offset
+        start = max(low, end - limit)
+        window = page.posts[start:end] if end > low else []
+    data = [select(post, fields, POST_FIELDS) for post in reversed(window)]
+    paging: Dict[str, object] = {}
+    if data:
+        paging["cursors"] = {"before": encode_cursor(offset), "after": encode_cursor(offset + len(data))}
+        if start > low:
+            paging["next"] = encode_cursor(offset + len(data))
+    return {"data": data, "paging": paging}
+
+
+app = FastAPI(title="Facebook Graph API stub")
+
+
+class FeedPost(BaseModel):
+    message: str
+
+
+def _check_token(request: Request) -> None:
+    # Any non-empty token is accepted, but one must be sent, as with Graph
+    if not request.query_params.get("access_token") and "authorization" not in request.headers:
+        raise HTTPException(status_code=400, detail={"error": {"message": "An access token is required"}})
+
+
+@app.get("/{version}/{page_id}")
+async def get_page(request: Request, version: str, page_id: str, fields: str = DEFAULT_PAGE_FIELDS):
+    _check_token(request)
+    await asyncio.sleep(FACEBOOK_STUB_LATENCY)
+    try:
+        return page_info(page_id, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail={"error": {"message": str(e)}})
+
+
+@app.get("/{version}/{page_id}/posts")
+async def get_posts(
+    request: Request,
+    version: str,
+    page_id: str,
+    fields: str = DEFAULT_POST_FIELDS,
+    limit: int = 25,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    after: Optional[str] = None,
+):
+    _check_token(request)
+    await asyncio.sleep(FACEBOOK_STUB_LATENCY)
+    try:
+        result = list_posts(page_id, fields, limit, since, until, after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail={"error": {"message": str(e)}})
+    if "next" in result["paging"]:
+        result["paging"]["next"] = str(request.url.include_query_params(after=result["paging"]["next"]))
+    return result
+
+
+@app.post("/{version}/{page_id}/feed")
+async def publish_post(request: Request, version: str, page_id: str, data: FeedPost):
+    _check_token(request)
+    return {"id": get_stub_page(page_id).publish(data.message)["id"]}
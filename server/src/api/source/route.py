@@ -1,20 +1,58 @@
-from fastapi import APIRouter
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import iterate_in_threadpool
+from src.core.admission import admission, admit_stream, hold
+from src.core.serialization import json_response
 from . import schema, service
+from .compaction import compact_blocks, compact_crawl
+from .crawler import crawl_website
+from .facebook import fetch_facebook_page
+from .synthetic import iter_ndjson, synthetic_crm
 
 source_routes = APIRouter(prefix="/source", tags=["Source"])
 
+# Scrapes, crawls and exports share one adaptive concurrency limit per worker
+admitted = [Depends(admission("source"))]
 
-@source_routes.post("/website")
+
+@source_routes.post("/website", dependencies=admitted)
 async def get_website_data(data: schema.WebsiteSchema):
-    # return { "message": "website"}
-    return await service.scrape_website(data.url)
+    if data.crawl:
+        result = await crawl_website(data.url, data.max_pages, data.max_depth)
+        return json_response(compact_crawl(result) if data.compact else result)
+    blocks = await service.scrape_website(data.url)
+    return json_response(compact_blocks(blocks) if data.compact else blocks)
 
 
-@source_routes.post("/facebook_page")
+@source_routes.post("/facebook_page", dependencies=admitted)
 async def get_facebook_page_data(data: schema.FacebookPageSchema):
-    return service.get_facebook_page_mock_data(data.url)
+    try:
+        result = await fetch_facebook_page(data.url, data.max_posts, data.since, data.until)
+    except ValueError as e:
+        return json_response({"error": str(e), "url": data.url}, status_code=422)
+    return json_response(result)
+
+
+@source_routes.post("/crm", dependencies=admitted)
+async def get_crm_data(data: Optional[schema.CrmSchema] = None):
+    if data is not None and data.size is not None:
+        return json_response(await asyncio.to_thread(synthetic_crm, data.size, data.seed))
+    return json_response(service.get_crm_mock_data())
 
 
-@source_routes.post("/crm")
-async def get_crm_data():
-    return service.get_crm_mock_data()
+@source_routes.post("/synthetic/export")
+async def export_synthetic_data(data: schema.SyntheticExportSchema):
+    # A dependency's permit would be released before the body is generated,
+    # so the export holds its own until the last chunk is sent
+    permit = await admit_stream("source")
+    # Each chunk is generated in Starlette's threadpool, off the event loop
+    chunks = iterate_in_threadpool(iter_ndjson(data.kind, data.size, data.seed))
+    return StreamingResponse(
+        hold(permit, chunks),
+        media_type="application/x-ndjson",
+        # Also frees the permit if the client leaves before the body starts
+        background=BackgroundTask(permit.release) if permit else None,
+    )
@@ -1,8 +1,32 @@
-from pydantic import BaseModel
+from datetime import datetime
+from typing import Literal, Optional
+from pydantic import BaseModel, Field
+from .crawler import CRAWL_DEPTH_LIMIT, CRAWL_MAX_DEPTH, CRAWL_MAX_PAGES, CRAWL_PAGES_LIMIT
+from .facebook import FACEBOOK_MAX_POSTS, FACEBOOK_POSTS_LIMIT
+from .synthetic import SYNTHETIC_INLINE_MAX, SYNTHETIC_MAX_SIZE
 
 class WebsiteSchema(BaseModel):
   url: str
+  # Follow same-origin links instead of scraping only this page
+  crawl: bool = False
+  max_pages: int = Field(CRAWL_MAX_PAGES, ge=1, le=CRAWL_PAGES_LIMIT)
+  max_depth: int = Field(CRAWL_MAX_DEPTH, ge=0, le=CRAWL_DEPTH_LIMIT)
+  # Deduplicate blocks and trim to SOURCE_BYTE_BUDGET, as the chat pipeline does
+  compact: bool = False
   
 class FacebookPageSchema(BaseModel):
   url: str
-  
\ No newline at end of file
+  max_posts: int = Field(FACEBOOK_MAX_POSTS, ge=1, le=FACEBOOK_POSTS_LIMIT)
+  # Only posts created in this window; without `until` results are cached and synced incrementally
+  since: Optional[datetime] = None
+  until: Optional[datetime] = None
+  
+class CrmSchema(BaseModel):
+  # With `size`, seeded synthetic customers instead of the small mock set
+  size: Optional[int] = Field(None, ge=0, le=SYNTHETIC_INLINE_MAX)
+  seed: int = 0
+
+class SyntheticExportSchema(BaseModel):
+  kind: Literal["crm", "facebook_posts", "audience"] = "crm"
+  size: int = Field(1000, ge=0, le=SYNTHETIC_MAX_SIZE)
+  seed: int = 0
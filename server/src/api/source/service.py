@@ -1,8 +1,18 @@
-import httpx
-from bs4 import BeautifulSoup, NavigableString, Tag
 import re
+import time
 from datetime import datetime, timedelta
 import random
+from src.core.lazy import lazy_import
+from src.core.metrics import Histogram
+from src.core.profiling import span, traced
+
+# Scraper dependencies load with the first scrape
+httpx = lazy_import("httpx")
+bs4 = lazy_import("bs4")
+
+SCRAPE_PARSE_SECONDS = Histogram(
+    "scrape_parse_seconds", "Time to parse a fetched page into content blocks"
+)
 
 REMOVE_PATTERNS = [
     r"\b\d{1,2}:\d{2}(?:\s?(?:AM|PM))?\b",  # timestamps like 12:30, 8:45 PM
@@ -17,12 +27,29 @@ def clean_text(text: str) -> str:
         text = re.sub(pattern, "", text)
     return text.strip()
 
+@traced()
 async def scrape_website(url: str) -> list[dict]:
-    async with httpx.AsyncClient(timeout=15.0, follow_redirects=True) as client:
-        response = await client.get(url)
-        response.raise_for_status()
+    with span("fetch"):
+        async with httpx.AsyncClient(timeout=15.0, follow_redirects=True) as client:
+            response = await client.get(url)
+            response.raise_for_status()
+
+    blocks, _ = parse_page(response.text)
+    return blocks
+
+
+def parse_page(html: str) -> tuple[list[dict], str | None]:
+    """Content blocks of a page, and its <link rel="canonical"> href if any"""
+    parse_started = time.perf_counter()
+    with span("beautifulsoup"):
+        soup = bs4.BeautifulSoup(html, "html.parser")
+    NavigableString, Tag = bs4.NavigableString, bs4.Tag
 
-    soup = BeautifulSoup(response.text, "html.parser")
+    canonical = None
+    for link in soup.find_all("link", href=True):
+        if "canonical" in (link.get("rel") or []):
+            canonical = link["href"]
+            break
 
     # Remove unwanted tags completely
     for tag in soup(["script", "style", "noscript", "svg", "img", "picture"]):
@@ -65,50 +92,53 @@ async def scrape_website(url: str) -> list[dict]:
         for child in node.children:
             traverse(child)
 
-    traverse(soup.body or soup)
+    with span("traverse"):
+        traverse(soup.body or soup)
+    SCRAPE_PARSE_SECONDS.observe(time.perf_counter() - parse_started)
 
-    return json_data
+    return json_data, canonical
+
+
+PAGE_NAMES = [
+    "TechStartup Hub", "Local Coffee Shop", "Fitness Revolution", "Art Gallery Downtown",
+    "Green Garden Center", "Fashion Forward", "Food Truck Paradise", "Music Venue Live",
+    "Pet Care Center", "Educational Academy", "Travel Adventures", "Home Decor Studio"
+]
+
+POST_TEMPLATES = [
+    "Just launched our new product! 🚀",
+    "Thanks to all our amazing customers!",
+    "Behind the scenes at {page_name}",
+    "Weekend special offer - don't miss out!",
+    "Customer spotlight: Amazing feedback!",
+    "New team member joining us today!",
+    "Celebrating another milestone 🎉",
+    "Check out our latest project",
+    "Community event this Saturday!",
+    "Featured in local news today",
+    "Summer sale starts tomorrow!",
+    "Happy Monday motivation",
+    "Throwback to when we started",
+    "Collaboration announcement",
+    "Workshop registration now open",
+    "Client success story",
+    "Industry insights and trends",
+    "Seasonal menu updates",
+    "Employee of the month",
+    "Partnership announcement"
+]
 
 
 def get_facebook_page_mock_data(url: str) -> dict:
     """Generate mock Facebook page data"""
-    page_names = [
-        "TechStartup Hub", "Local Coffee Shop", "Fitness Revolution", "Art Gallery Downtown",
-        "Green Garden Center", "Fashion Forward", "Food Truck Paradise", "Music Venue Live",
-        "Pet Care Center", "Educational Academy", "Travel Adventures", "Home Decor Studio"
-    ]
-
-    page_name = random.choice(page_names)
+    page_name = random.choice(PAGE_NAMES)
     creation_date = datetime.now() - timedelta(days=random.randint(365, 2000))
 
     # Generate 20 mock posts
     posts = []
-    post_templates = [
-        "Just launched our new product! 🚀",
-        "Thanks to all our amazing customers!",
-        "Behind the scenes at {page_name}",
-        "Weekend special offer - don't miss out!",
-        "Customer spotlight: Amazing feedback!",
-        "New team member joining us today!",
-        "Celebrating another milestone 🎉",
-        "Check out our latest project",
-        "Community event this Saturday!",
-        "Featured in local news today",
-        "Summer sale starts tomorrow!",
-        "Happy Monday motivation",
-        "Throwback to when we started",
-        "Collaboration announcement",
-        "Workshop registration now open",
-        "Client success story",
-        "Industry insights and trends",
-        "Seasonal menu updates",
-        "Employee of the month",
-        "Partnership announcement"
-    ]
-
     for i in range(20):
         post_date = datetime.now() - timedelta(days=random.randint(1, 90))
-        post_content = random.choice(post_templates).replace("{page_name}", page_name)
+        post_content = random.choice(POST_TEMPLATES).replace("{page_name}", page_name)
 
         posts.append({
             "id": f"post_{i+1}",
@@ -133,31 +163,32 @@ def get_facebook_page_mock_data(url: str) -> dict:
     }
 
 
+FIRST_NAMES = [
+    "John", "Sarah", "Michael", "Emma", "David", "Lisa", "James", "Jessica",
+    "Robert", "Ashley", "William", "Amanda", "Christopher", "Jennifer", "Daniel",
+    "Nicole", "Matthew", "Michelle", "Anthony", "Stephanie", "Mark", "Elizabeth"
+]
+
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis",
+    "Rodriguez", "Martinez", "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson",
+    "Thomas", "Taylor", "Moore", "Jackson", "Martin", "Lee", "Thompson"
+]
+
+PRODUCTS = [
+    "Premium Subscription", "Basic Plan", "Pro Software License", "Consulting Service",
+    "Training Course", "Mobile App", "Hardware Device", "Support Package",
+    "Custom Development", "Data Analytics Tool", "Cloud Storage", "Security Suite"
+]
+
+
 def get_crm_mock_data() -> dict:
     """Generate mock CRM customer data"""
-    first_names = [
-        "John", "Sarah", "Michael", "Emma", "David", "Lisa", "James", "Jessica",
-        "Robert", "Ashley", "William", "Amanda", "Christopher", "Jennifer", "Daniel",
-        "Nicole", "Matthew", "Michelle", "Anthony", "Stephanie", "Mark", "Elizabeth"
-    ]
-
-    last_names = [
-        "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis",
-        "Rodriguez", "Martinez", "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson",
-        "Thomas", "Taylor", "Moore", "Jackson", "Martin", "Lee", "Thompson"
-    ]
-
-    products = [
-        "Premium Subscription", "Basic Plan", "Pro Software License", "Consulting Service",
-        "Training Course", "Mobile App", "Hardware Device", "Support Package",
-        "Custom Development", "Data Analytics Tool", "Cloud Storage", "Security Suite"
-    ]
-
     customers = []
 
     for i in range(15):  # Generate 15 customers
-        first_name = random.choice(first_names)
-        last_name = random.choice(last_names)
+        first_name = random.choice(FIRST_NAMES)
+        last_name = random.choice(LAST_NAMES)
         email = f"{first_name.lower()}.{last_name.lower()}@{random.choice(['gmail.com', 'yahoo.com', 'company.com', 'outlook.com'])}"
 
         # Generate order history (2-8 orders per customer)
@@ -166,7 +197,7 @@ def get_crm_mock_data() -> dict:
 
         for j in range(num_orders):
             order_date = datetime.now() - timedelta(days=random.randint(1, 365))
-            product = random.choice(products)
+            product = random.choice(PRODUCTS)
             amount = round(random.uniform(29.99, 999.99), 2)
 
             order_history.append({
@@ -0,0 +1,233 @@
+"""
+Seeded synthetic CRM, Facebook and audience data at production volumes.
+
+Output has the same shape as get_crm_mock_data and
+get_facebook_page_mock_data, but at any size, and it is reproducible: the
+same (size, seed) always gives the same records. Records are generated in
+chunks of SYNTHETIC_CHUNK_SIZE. Each chunk draws from its own RNG, seeded
+by (seed, kind, chunk index), and samples whole columns at once
+(random.choices over names, products, day offsets and amounts) instead of
+making several random calls per record. Chunks can be streamed out one by
+one, or concatenated for a data source. Concatenated output is held in
+memory, so it is capped at SYNTHETIC_INLINE_MAX records; only the
+streamed export goes up to SYNTHETIC_MAX_SIZE.
+
+Dates are day offsets from SYNTHETIC_ANCHOR_DATE rather than from now, so
+output does not drift between runs.
+"""
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List
+
+from src.core.serialization import dumps_bytes
+from .service import FIRST_NAMES, LAST_NAMES, PAGE_NAMES, POST_TEMPLATES, PRODUCTS
+
+SYNTHETIC_CHUNK_SIZE = int(os.getenv("SYNTHETIC_CHUNK_SIZE", "10000"))
+SYNTHETIC_MAX_SIZE = int(os.getenv("SYNTHETIC_MAX_SIZE", "10000000"))
+# Largest size built in memory (crm and facebook_page sources, /source/crm)
+SYNTHETIC_INLINE_MAX = int(os.getenv("SYNTHETIC_INLINE_MAX", "100000"))
+SYNTHETIC_ANCHOR_DATE = datetime.fromisoformat(os.getenv("SYNTHETIC_ANCHOR_DATE", "2025-01-01"))
+
+DOMAINS = ["gmail.com", "yahoo.com", "company.com", "outlook.com"]
+CUSTOMER_STATUSES = ["active", "inactive", "vip", "new"]
+CONTACTS = ["email", "phone", "sms"]
+ORDER_STATUSES = ["completed", "pending", "shipped", "delivered"]
+CATEGORIES = ["Business", "Entertainment", "Education", "Health", "Technology"]
+
+# ISO dates for every day offset used, formatted once
+_DAYS = [(SYNTHETIC_ANCHOR_DATE - timedelta(days=offset)).isoformat() for offset in range(2001)]
+_ORDER_DAYS = range(1, 366)
+_REGISTRATION_DAYS = range(30, 731)
+_POST_DAYS = range(1, 366)
+_ORDER_COUNTS = range(2, 9)
+_QUANTITIES = range(1, 6)
+_AMOUNT_CENTS = range(2999, 100000)
+
+
+def check_size(size: int, limit: int = SYNTHETIC_MAX_SIZE) -> int:
+    if not 0 <= size <= limit:
+        raise ValueError(f"Synthetic size must be between 0 and {limit}, got {size}")
+    return size
+
+
+def _rng(seed: int, kind: str, chunk: int) -> random.Random:
+    # String seeds hash with SHA-512, so they are stable across processes
+    return random.Random(f"{seed}:{kind}:{chunk}")
+
+
+def _chunks(size: int, chunk_size: int) -> Iterator[tuple]:
+    for chunk, start in enumerate(range(0, check_size(size), chunk_size)):
+        yield chunk, start, min(chunk_size, size - start)
+
+
+def customer_chunk(seed: int, chunk: int, start: int, count: int) -> List[dict]:
+    """Customers start..start+count, each with 2-8 orders, newest first"""
+    rng = _rng(seed, "crm", chunk)
+    choices = rng.choices
+    firsts = choices(FIRST_NAMES, k=count)
+    lasts = choices(LAST_NAMES, k=count)
+    domains = choices(DOMAINS, k=count)
+    statuses = choices(CUSTOMER_STATUSES, k=count)
+    contacts = choices(CONTACTS, k=count)
+    registered = choices(_REGISTRATION_DAYS, k=count)
+    phones = zip(choices(range(200, 1000), k=count), choices(range(100, 1000), k=count),
+                 choices(range(1000, 10000), k=count))
+    order_counts = choices(_ORDER_COUNTS, k=count)
+
+    total = sum(order_counts)
+    products = choices(PRODUCTS, k=total)
+    order_statuses = choices(ORDER_STATUSES, k=total)
+    order_days = choices(_ORDER_DAYS, k=total)
+    quantities = choices(_QUANTITIES, k=total)
+    amounts = [cents / 100 for cents in choices(_AMOUNT_CENTS, k=total)]
+
+    customers = []
+    offset = 0
+    for i, (first, last, domain, status, contact, reg_day, (area, prefix, line), orders) in enumerate(
+        zip(firsts, lasts, domains, statuses, contacts, registered, phones, order_counts)
+    ):
+        number = start + i
+        # Newest first: smallest day offset first
+        order_ids = sorted(range(offset, offset + orders), key=order_days.__getitem__)
+        history = [
+            {
+                "order_id": f"ORD-{number}-{k}",
+                "date": _DAYS[order_days[o]],
+                "product": products[o],
+                "amount": amounts[o],
+                "status": order_statuses[o],
+                "quantity": quantities[o],
+            }
+            for k, o in enumerate(order_ids)
+        ]
+        offset += orders
+        customers.append({
+            "customer_id": f"CUST-{1000 + number}",
+            "name": f"{first} {last}",
+            # The customer number keeps addresses unique at any size
+            "email": f"{first.lower()}.{last.lower()}{number}@{domain}",
+            "phone_number": f"+1-{area}-{prefix}-{line}",
+            "registration_date": _DAYS[reg_day],
+            "total_orders": orders,
+            "total_spent": round(sum(amounts[o] for o in order_ids), 2),
+            "last_order_date": history[0]["date"],
+            "customer_status": status,
+            "preferred_contact": contact,
+            "order_history": history,
+        })
+    return customers
+
+
+def iter_customers(size: int, seed: int = 0, chunk_size: int = SYNTHETIC_CHUNK_SIZE) -> Iterator[List[dict]]:
+    for chunk, start, count in _chunks(size, chunk_size):
+        yield customer_chunk(seed, chunk, start, count)
+
+
+def synthetic_crm(size: int, seed: int = 0) -> dict:
+    """get_crm_mock_data's shape with `size` customers"""
+    check_size(size, SYNTHETIC_INLINE_MAX)
+    customers = [customer for chunk in iter_customers(size, seed) for customer in chunk]
+    customers.sort(key=lambda customer: customer["total_spent"], reverse=True)
+    revenue = sum(customer["total_spent"] for customer in customers)
+    orders = sum(customer["total_orders"] for customer in customers)
+    statuses: Dict[str, int] = {}
+    for customer in customers:
+        statuses[customer["customer_status"]] = statuses.get(customer["customer_status"], 0) + 1
+    return {
+        "total_customers": len(customers),
+        "customers": customers,
+        "summary": {
+            "total_revenue": round(revenue, 2),
+            "avg_order_value": round(revenue / orders, 2) if orders else 0.0,
+            "active_customers": statuses.get("active", 0),
+            "vip_customers": statuses.get("vip", 0),
+        },
+        "synthetic": {"size": size, "seed": seed},
+    }
+
+
+def page_name(seed: int) -> str:
+    return _rng(seed, "page", 0).choice(PAGE_NAMES)
+
+
+def post_chunk(seed: int, chunk: int, start: int, count: int) -> List[dict]:
+    rng = _rng(seed, "posts", chunk)
+    choices = rng.choices
+    name = page_name(seed)
+    templates = [template.replace("{page_name}", name) for template in POST_TEMPLATES]
+    return [
+        {
+            "id": f"post_{start + i + 1}",
+            "content": content,
+            "date": _DAYS[day],
+            "likes": likes,
+            "comments": comments,
+            "shares": shares,
+        }
+        for i, (content, day, likes, comments, shares) in enumerate(zip(
+            choices(templates, k=count), choices(_POST_DAYS, k=count), choices(range(10, 501), k=count),
+            choices(range(2, 51), k=count), choices(range(1, 26), k=count),
+        ))
+    ]
+
+
+def iter_posts(size: int, seed: int = 0, chunk_size: int = SYNTHETIC_CHUNK_SIZE) -> Iterator[List[dict]]:
+    for chunk, start, count in _chunks(size, chunk_size):
+        yield post_chunk(seed, chunk, start, count)
+
+
+def synthetic_facebook_page(url: str, size: int, seed: int = 0) -> dict:
+    """get_facebook_page_mock_data's shape with `size` posts"""
+    check_size(size, SYNTHETIC_INLINE_MAX)
+    rng = _rng(seed, "page", 1)
+    posts = [post for chunk in iter_posts(size, seed) for post in chunk]
+    followers = rng.randint(800, 45000)
+    engagement = sum(post["likes"] + post["comments"] + post["shares"] for post in posts)
+    return {
+        "page_name": page_name(seed),
+        "url": url,
+        "likes": rng.randint(1000, 50000),
+        "followers": followers,
+        "creation_date": _DAYS[rng.randrange(365, 2001)],
+        "category": rng.choice(CATEGORIES),
+        "verified": rng.random() < 0.5,
+        "posts": posts,
+        "total_posts": len(posts),
+        "avg_engagement": round(engagement / len(posts) / followers * 100, 2) if posts else 0.0,
+        "synthetic": {"size": size, "seed": seed},
+    }
+
+
+def audience_chunk(seed: int, chunk: int, start: int, count: int) -> Dict[str, list]:
+    """Columnar email audience (the /email/bulk payload shape) with unique addresses"""
+    rng = _rng(seed, "audience", chunk)
+    firsts = rng.choices(FIRST_NAMES, k=count)
+    lasts = rng.choices(LAST_NAMES, k=count)
+    domains = rng.choices(DOMAINS, k=count)
+    return {
+        "emails": [
+            f"{first.lower()}.{last.lower()}{start + i}@{domain}"
+            for i, (first, last, domain) in enumerate(zip(firsts, lasts, domains))
+        ],
+        "names": [f"{first} {last}" for first, last in zip(firsts, lasts)],
+    }
+
+
+def iter_audience(size: int, seed: int = 0, chunk_size: int = SYNTHETIC_CHUNK_SIZE) -> Iterator[Dict[str, list]]:
+    for chunk, start, count in _chunks(size, chunk_size):
+        yield audience_chunk(seed, chunk, start, count)
+
+
+def iter_ndjson(kind: str, size: int, seed: int = 0) -> Iterator[bytes]:
+    """Newline-delimited JSON export, one chunk of records per yielded block"""
+    if kind == "audience":
+        for chunk in iter_audience(size, seed):
+            yield b"".join(
+                dumps_bytes({"email": email, "name": name}) + b"\n"
+                for email, name in zip(chunk["emails"], chunk["names"])
+            )
+        return
+    chunks = {"crm": iter_customers, "facebook_posts": iter_posts}[kind](size, seed)
+    for chunk in chunks:
+        yield b"".join(dumps_bytes(record) + b"\n" for record in chunk)
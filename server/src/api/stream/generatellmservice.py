@@ -1,11 +1,19 @@
-from typing import List
+from typing import List, Optional
 from . import schema
 from datetime import datetime
+from src.core.profiling import traced
 
+@traced()
 def generate_comprehensive_response(
-    message: str, data_sources: List[schema.DataSource], channels: List[str] = None
+    message: str,
+    data_sources: List[schema.DataSource],
+    channels: List[str] = None,
+    context: Optional[List[dict]] = None,
 ) -> str:
-    """Generate a comprehensive response based on input parameters with actionable data"""
+    """
+    Generate a comprehensive response based on input parameters with actionable data.
+    `context` holds the source fragments retrieved as relevant to the message.
+    """
 
     # Generate actionable content for each channel
     actionable_blocks = []
@@ -82,6 +90,22 @@ def generate_comprehensive_response(
         except Exception:
             data_source_names = "various sources"
 
+    context_summary = ""
+    if context:
+        lines = []
+        for fragment in context:
+            data = fragment["data"]
+            if isinstance(data, list):
+                text = " ".join(block.get("text", " ".join(block.get("items", []))) for block in data)
+            elif "content" in data:
+                text = data["content"]
+            elif "name" in data:
+                text = f"{data['name']} ({data.get('customer_status', 'customer')})"
+            else:
+                text = ", ".join(f"{key}: {value}" for key, value in data.items() if not isinstance(value, (list, dict)))
+            lines.append(f"- [{fragment['source']}] {text[:120]}")
+        context_summary = "\nMost relevant data for your question:\n" + "\n".join(lines) + "\n"
+
     response = f"""
 This is a simulated AI assistant that can help you with various tasks including:
 
@@ -98,7 +122,7 @@ This streaming response is designed to simulate a real AI assistant that can:
 - Adapt responses based on available context
 - Stream information as it becomes available
 - Extract actionable insights from conversations
-{actionable_content}
+{context_summary}{actionable_content}
 Thank you for your query, and I'm here to help with any follow-up questions or additional analysis you might need.
     """.strip()
 
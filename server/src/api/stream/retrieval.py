@@ -0,0 +1,204 @@
+"""
+Relevance retrieval over fetched source data for the chat prompt.
+
+The processed sources (website blocks or crawled pages, CRM customers,
+Facebook posts) are split into small text fragments, and an in-memory BM25
+inverted index is built over them. Only the top-K fragments for the user's
+message that fit a byte budget are passed to the generator, not every
+fetched blob. A SourceIndex is plain data, so it can be kept and reused
+across the turns of a conversation.
+"""
+import heapq
+import math
+import os
+import re
+from collections import Counter as TermCounter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.core.metrics import Histogram
+from src.core.profiling import span
+from src.core.serialization import dumps_bytes
+
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "8"))
+RETRIEVAL_BYTE_BUDGET = int(os.getenv("RETRIEVAL_BYTE_BUDGET", "8000"))
+
+# Standard Okapi BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+CONTEXT_BYTES = Histogram(
+    "chat_context_bytes", "Serialized size of source data vs. the context selected from it", ["stage"],
+    buckets=(1000, 4000, 16000, 64000, 256000, 1000000, 4000000, 16000000),
+)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how i in is it its me my of on or our "
+    "should that the their them they this to us was we what when which who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    # Plural "s" is folded so "posts" matches "post"
+    return [
+        token[:-1] if len(token) > 3 and token.endswith("s") and not token.endswith("ss") else token
+        for token in _TOKEN.findall(text.lower())
+        if token not in STOPWORDS
+    ]
+
+
+def website_fragments(website_data) -> Iterable[dict]:
+    """One fragment per heading section of each page"""
+    if isinstance(website_data, dict):
+        pages = [(page.get("url"), page["blocks"]) for page in website_data.get("pages", [])]
+        pages.append((website_data.get("url"), website_data.get("common_blocks", [])))
+    else:
+        pages = [(None, website_data or [])]
+
+    for url, blocks in pages:
+        section: List[dict] = []
+        for block in blocks:
+            if block["tag"].startswith("h") and section:
+                yield _section_fragment(url, section)
+                section = []
+            section.append(block)
+        if section:
+            yield _section_fragment(url, section)
+
+
+def _section_fragment(url: Optional[str], blocks: List[dict]) -> dict:
+    text = " ".join(
+        " ".join(block["items"]) if "items" in block else block.get("text", "")
+        for block in blocks
+    )
+    return {"source": "website", "ref": url, "text": text, "data": blocks}
+
+
+def crm_fragments(crm_data: dict) -> Iterable[dict]:
+    for customer in crm_data.get("customers", []):
+        products = " ".join(order["product"] for order in customer.get("order_history", []))
+        text = (
+            f"{customer['name']} {customer['email']} {customer['customer_status']} customer "
+            f"prefers {customer['preferred_contact']} spent {customer['total_spent']} "
+            f"orders {products}"
+        )
+        yield {"source": "crm", "ref": customer["customer_id"], "text": text, "data": customer}
+    if "summary" in crm_data:
+        summary = crm_data["summary"]
+        yield {
+            "source": "crm",
+            "ref": "summary",
+            "text": "customer summary revenue average order value active vip customers",
+            "data": summary,
+        }
+
+
+def facebook_fragments(facebook_data: dict) -> Iterable[dict]:
+    page = {key: value for key, value in facebook_data.items() if key != "posts"}
+    yield {
+        "source": "facebook_page",
+        "ref": facebook_data.get("url"),
+        "text": f"{page.get('page_name', '')} facebook page {page.get('category', '')} followers likes engagement",
+        "data": page,
+    }
+    for post in facebook_data.get("posts", []):
+        yield {"source": "facebook_page", "ref": post["id"], "text": f"{post['content']} post", "data": post}
+
+
+FRAGMENT_BUILDERS = {
+    "website_data": website_fragments,
+    "crm_data": crm_fragments,
+    "facebook_data": facebook_fragments,
+}
+
+
+class SourceIndex:
+    """BM25 inverted index over the fragments of one set of processed sources"""
+
+    __slots__ = ("fragments", "postings", "lengths", "avg_length", "idf", "source_bytes")
+
+    def __init__(self, fragments: List[dict], source_bytes: int = 0):
+        self.fragments = fragments
+        self.source_bytes = source_bytes
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.lengths: List[int] = []
+        for doc_id, fragment in enumerate(fragments):
+            terms = tokenize(fragment["text"])
+            self.lengths.append(len(terms))
+            for term, count in TermCounter(terms).items():
+                self.postings.setdefault(term, []).append((doc_id, count))
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        total = len(fragments)
+        self.idf = {
+            term: math.log(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    @classmethod
+    def build(cls, processed_data: dict) -> "SourceIndex":
+        """Index the output of get_data_from_tools"""
+        with span("retrieval_index"):
+            fragments = [
+                fragment
+                for key, builder in FRAGMENT_BUILDERS.items()
+                if processed_data.get(key)
+                for fragment in builder(processed_data[key])
+            ]
+            # Sized per fragment: one dumps over large sources holds the GIL
+            # long enough to stall the event loop while this runs in a thread
+            source_bytes = sum(len(dumps_bytes(fragment["data"])) for fragment in fragments)
+            CONTEXT_BYTES.labels("sources").observe(source_bytes)
+            return cls(fragments, source_bytes)
+
+    def __len__(self) -> int:
+        return len(self.fragments)
+
+    def scores(self, query: str) -> Dict[int, float]:
+        scores: Dict[int, float] = {}
+        avg_length = self.avg_length or 1.0
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = self.idf[term]
+            for doc_id, tf in docs:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, query: str, k: int = RETRIEVAL_TOP_K, budget: int = RETRIEVAL_BYTE_BUDGET) -> List[dict]:
+        """
+        Top-k fragments for the query that fit in `budget` serialized bytes,
+        best first. With no matching terms, the first fragment of each
+        source is returned as an overview.
+        """
+        with span("retrieval_search"):
+            scores = self.scores(query)
+            if scores:
+                # A few spare candidates in case the best ones overflow the budget
+                ranked = heapq.nlargest(k * 4, scores.items(), key=lambda item: item[1])
+            else:
+                firsts: Dict[str, int] = {}
+                for doc_id, fragment in enumerate(self.fragments):
+                    firsts.setdefault(fragment["source"], doc_id)
+                ranked = [(doc_id, 0.0) for doc_id in firsts.values()]
+
+            selected = []
+            used = 0
+            for doc_id, score in ranked:
+                fragment = self.fragments[doc_id]
+                item = {
+                    "source": fragment["source"],
+                    "ref": fragment["ref"],
+                    "score": round(score, 4),
+                    "data": fragment["data"],
+                }
+                size = len(dumps_bytes(item))
+                if used + size > budget:
+                    continue
+                selected.append(item)
+                used += size
+                if len(selected) >= k:
+                    break
+            CONTEXT_BYTES.labels("context").observe(used)
+            return selected
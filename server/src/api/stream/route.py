@@ -1,6 +1,10 @@
-from typing import List
-from fastapi import APIRouter, Request
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header
 from sse_starlette.sse import EventSourceResponse
+from src.core.admission import admission, admit_stream
+from src.core.backpressure import deliver
+from src.core.serialization import json_response
+from src.core.sse import instrument_stream
 from . import schema, service
 
 stream_routes = APIRouter(
@@ -10,18 +14,32 @@ stream_routes = APIRouter(
 
 
 @stream_routes.post("/chat")
-async def stream_chat_response(request: Request, data: schema.ChatSchema):
+async def stream_chat_response(
+    data: schema.ChatSchema,
+    last_event_id: Optional[str] = Header(default=None),
+):
     """
     Stream chat response using Server-Sent Events (SSE)
     Streams a comprehensive response over approximately 20 seconds
 
     This endpoint establishes the SSE connection and returns the event stream.
+    Reconnect with the Last-Event-ID header to resume an interrupted stream.
+    Answers 503 with Retry-After when the worker is saturated; resuming a
+    live stream runs no pipeline work and is never rejected.
     """
-    return EventSourceResponse(service.chat_stream_generator(request, data))
+    buffer, after = service.find_chat_stream(last_event_id)
+    if buffer is None:
+        # The permit bounds running pipelines, not connected clients: the
+        # producer holds it until the pipeline ends, even if the client leaves
+        buffer = service.start_chat_stream(data, await admit_stream("chat"))
+    events = service.chat_stream_generator(buffer, after)
+    return EventSourceResponse(
+        instrument_stream("chat", deliver("chat", events, coalesce=service.coalesce_chunks))
+    )
 
 
-@stream_routes.post("/tools")
-async def stream_tool_response(data: List[schema.DataSource]):
+@stream_routes.post("/tools", dependencies=[Depends(admission("source"))])
+async def stream_tool_response(data: List[schema.DataSource], compact: bool = False):
     """
     Process data from multiple sources and return combined results.
     
@@ -30,6 +48,8 @@ async def stream_tool_response(data: List[schema.DataSource]):
             - name: Type of data source ('crm', 'website', or 'facebook_page')
             - data: Dictionary containing source-specific parameters
                 - For 'website' and 'facebook_page', include 'url' in the data
+        compact: Deduplicate website blocks and trim them to SOURCE_BYTE_BUDGET,
+            as the chat pipeline does
                 
     Returns:
         Dictionary containing:
@@ -39,4 +59,4 @@ async def stream_tool_response(data: List[schema.DataSource]):
     if not isinstance(data, list):
         data = [data]  # Convert single item to list for backward compatibility
         
-    return await service.get_data_from_tools(data)
+    return json_response(await service.get_data_from_tools(data, compact=compact))
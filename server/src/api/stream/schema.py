@@ -2,14 +2,20 @@ from pydantic import BaseModel
 from typing import Dict, List, Optional, Any
 import re
 import json
+import logging
+from src.core.profiling import traced
+
+logger = logging.getLogger(__name__)
 
 class DataSource(BaseModel):
     name: str
     data: Dict = {}
 
 class Audience(BaseModel):
-    email: str
-    name: str
+    # Email campaigns address by email, SMS and WhatsApp by E.164 phone
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    name: Optional[str] = None
 
 class ActionableData(BaseModel):
     time: str
@@ -25,7 +31,10 @@ class ChatSchema(BaseModel):
     message: str
     data_source: List[DataSource]
     channel: List[str] | None = None
+    # Reuse the fetched sources of an earlier turn; returned in the start event
+    session_id: Optional[str] = None
 
+@traced()
 def parse_actionable_content(text: str) -> ParsedResponse:
     """
     Parse text content to extract actionable data patterns.
@@ -64,7 +73,7 @@ def parse_actionable_content(text: str) -> ParsedResponse:
 
         except (json.JSONDecodeError, Exception) as e:
             # If parsing fails, return original text
-            print(f"Failed to parse actionable content: {e}")
+            logger.warning("Failed to parse actionable content", extra={"error": str(e)})
             return ParsedResponse(text_content=text)
 
     return ParsedResponse(text_content=text)
@@ -1,43 +1,167 @@
 import asyncio
-import json
+import logging
+import os
 import random
+import time
 from datetime import datetime
-from typing import List
-from fastapi import Request
+from typing import List, Optional, Set, Tuple
+from src.core.admission import Permit
+from src.core.metrics import Histogram
+from src.core.profiling import span, traced
+from src.core.replay import ReplayBuffer, ReplayRegistry, parse_event_id
+from src.core.serialization import dumps, loads
 from . import schema
+from ..source.compaction import compact_blocks, compact_crawl
+from ..source.crawler import (
+    CRAWL_DEPTH_LIMIT, CRAWL_MAX_DEPTH, CRAWL_MAX_PAGES, CRAWL_PAGES_LIMIT, crawl_website,
+)
+from ..source.facebook import FACEBOOK_MAX_POSTS, FACEBOOK_POSTS_LIMIT, fetch_facebook_page
+from ..source.synthetic import SYNTHETIC_INLINE_MAX, check_size, synthetic_crm, synthetic_facebook_page
 from ..source.service import (
     scrape_website,
-    get_facebook_page_mock_data,
     get_crm_mock_data,
 )
 from .generatellmservice import generate_comprehensive_response
+from .session import SESSION_LOOKUPS, Session, get_session_store, new_session_id, sources_key
+
+logger = logging.getLogger(__name__)
+
+# Average pause between streamed chunks (seconds)
+CHAT_CHUNK_DELAY = float(os.getenv("CHAT_CHUNK_DELAY", str(10 / 60)))
+
+SOURCE_FETCH_SECONDS = Histogram(
+    "source_fetch_seconds", "Time to fetch one data source", ["source", "outcome"]
+)
+
+# Replay buffers of recent chat streams, for Last-Event-ID resumption
+chat_streams = ReplayRegistry()
+
+# Strong references to running producers (the event loop only keeps weak ones)
+_producers: Set[asyncio.Task] = set()
+
 
+def find_chat_stream(last_event_id: Optional[str]) -> Tuple[Optional[ReplayBuffer], int]:
+    """The live stream a Last-Event-ID reconnect resumes, and the event id to resume after"""
+    resume = parse_event_id(last_event_id)
+    buffer = chat_streams.get(resume[0]) if resume else None
+    if buffer is None:
+        if resume:
+            logger.info("Cannot resume unknown or expired chat stream", extra={"stream_id": resume[0]})
+        return None, 0
+    return buffer, resume[1]
 
-async def chat_stream_generator(request: Request, chat_data: schema.ChatSchema):
+
+def start_chat_stream(chat_data: schema.ChatSchema, permit: Optional[Permit] = None) -> ReplayBuffer:
+    """
+    Start the chat pipeline in the background, producing into a new replay
+    buffer. The pipeline owns `permit` and releases it when it finishes,
+    whether or not any client is still following.
+    """
+    buffer = chat_streams.create()
+    producer = asyncio.create_task(produce_chat_stream(buffer, chat_data, permit))
+    _producers.add(producer)
+    producer.add_done_callback(_producers.discard)
+    return buffer
+
+
+async def chat_stream_generator(buffer: ReplayBuffer, after: int = 0):
     """
     Generates server-sent events with chat response content over 10 seconds.
-    The loop will stop if the client disconnects.
+
+    The response is produced in the background into a replay buffer and this
+    generator follows it from after event `after`, so a reconnect carrying
+    the Last-Event-ID of a known stream resumes instead of re-running the
+    pipeline.
     """
+    async for event in buffer.follow(after):
+        yield event
 
-    # Check if the client has disconnected
-    if await request.is_disconnected():
-        print("Chat client disconnected.")
-        return
-    
-    # Process data from tools
-    print("Processing data from tools...")
-    processed_data = await get_data_from_tools(chat_data.data_source)
+
+def coalesce_chunks(queued: dict, incoming: dict) -> Optional[dict]:
+    """
+    Merge two chunk events so a slow client receives one larger chunk.
+    The merged event keeps the newer id, so resuming after it stays exact.
+    """
+    queued_data, incoming_data = loads(queued["data"]), loads(incoming["data"])
+    if queued_data.get("type") != "chunk" or incoming_data.get("type") != "chunk":
+        return None
+    incoming_data["content"] = f"{queued_data['content']} {incoming_data['content']}"
+    return {**incoming, "data": dumps(incoming_data)}
+
+
+async def produce_chat_stream(
+    buffer: ReplayBuffer, chat_data: schema.ChatSchema, permit: Optional[Permit] = None
+) -> None:
+    """
+    Run the chat pipeline to completion, recording every event in the buffer.
+    The admission permit is held until the pipeline ends; the delay to the
+    first event is its latency signal.
+    """
+    failed = False
+    try:
+        async for data in chat_events(chat_data, buffer.stream_id):
+            if permit is not None:
+                permit.observe()
+            buffer.append(data)
+    except Exception as e:
+        failed = True
+        logger.exception("Chat stream failed", extra={"stream_id": buffer.stream_id})
+        buffer.append({
+            "type": "error",
+            "message": str(e),
+            "timestamp": datetime.now().isoformat(),
+        })
+    finally:
+        buffer.finish()
+        if permit is not None:
+            permit.release(failed)
+
+
+async def chat_events(chat_data: schema.ChatSchema, stream_id: str):
+    """Chat response events, paced to spread over the stream duration"""
+    # Follow-up turns reuse the session's sources and index instead of refetching
+    store = get_session_store()
+    key = sources_key(chat_data.data_source)
+    session = await store.get(chat_data.session_id) if chat_data.session_id else None
+    if session is not None and session.sources_key == key:
+        SESSION_LOOKUPS.labels("hit").inc()
+    else:
+        if chat_data.session_id is None:
+            outcome = "new"
+        else:
+            outcome = "miss" if session is None else "sources_changed"
+        SESSION_LOOKUPS.labels(outcome).inc()
+
+        # Process data from tools
+        # Website blocks are deduplicated and trimmed to the byte budget before generation
+        processed_data = await get_data_from_tools(chat_data.data_source, compact=True)
+        # Indexing large sources takes seconds; keep it off the event loop
+        session = await asyncio.to_thread(
+            Session,
+            chat_data.session_id or new_session_id(),
+            key,
+            processed_data,
+            turns=session.turns if session is not None else None,
+        )
+
+    # Only the fragments relevant to the message go to the generator
+    context = session.index.search(chat_data.message)
 
     # Generate the comprehensive response
     long_response = generate_comprehensive_response(
         message=chat_data.message,
-        data_sources=processed_data,
+        data_sources=chat_data.data_source,
         channels=chat_data.channel,
+        context=context,
     )
 
     # Parse the response to extract actionable content
     parsed_response = schema.parse_actionable_content(long_response)
 
+    session.add_turn("user", chat_data.message)
+    session.add_turn("assistant", parsed_response.text_content)
+    await store.put(session)
+
     # Split the clean text into chunks for streaming
     words = parsed_response.text_content.split(" ")
     total_words = len(words)
@@ -46,15 +170,18 @@ async def chat_stream_generator(request: Request, chat_data: schema.ChatSchema):
     # Send start event with actionable data if present
     start_data = {
         "type": "start",
+        "stream_id": stream_id,
+        "session_id": session.session_id,
+        "turn": sum(1 for turn in session.turns if turn["role"] == "user"),
         "message": "Starting response stream...",
         "timestamp": datetime.now().isoformat(),
         "total_words": total_words,
     }
 
     if parsed_response.actionable_data:
-        start_data["actionable_data"] = parsed_response.actionable_data.dict()
+        start_data["actionable_data"] = parsed_response.actionable_data.model_dump()
 
-    yield {"data": json.dumps(start_data)}
+    yield start_data
 
     # Stream the response in chunks
     current_chunk = ""
@@ -62,11 +189,6 @@ async def chat_stream_generator(request: Request, chat_data: schema.ChatSchema):
     chunk_number = 0
 
     for i, word in enumerate(words):
-        # Check if client disconnected during streaming
-        if await request.is_disconnected():
-            print("Chat client disconnected during streaming.")
-            break
-
         current_chunk += word + " "
         word_count += 1
 
@@ -81,7 +203,7 @@ async def chat_stream_generator(request: Request, chat_data: schema.ChatSchema):
                 "timestamp": datetime.now().isoformat(),
             }
 
-            yield {"data": json.dumps(chunk_data)}
+            yield chunk_data
 
             # Reset for next chunk
             current_chunk = ""
@@ -90,10 +212,11 @@ async def chat_stream_generator(request: Request, chat_data: schema.ChatSchema):
             # Wait to spread over 20 seconds (except for the last chunk)
             if i < len(words) - 1:
                 # Add some randomness to make it feel more natural
-                base_delay = 10 / 60  # ~60 chunks over 20 seconds
+                base_delay = CHAT_CHUNK_DELAY  # ~60 chunks over 20 seconds by default
                 random_factor = random.uniform(0.8, 1.2)  # �20% variation
                 delay = base_delay * random_factor
-                await asyncio.sleep(delay)
+                with span("pacing"):
+                    await asyncio.sleep(delay)
 
     # Send completion event with actionable data summary
     completion_data = {
@@ -117,13 +240,21 @@ async def chat_stream_generator(request: Request, chat_data: schema.ChatSchema):
     else:
         completion_data["actionable_summary"] = {"has_actionable_data": False}
 
-    yield {"data": json.dumps(completion_data)}
+    yield completion_data
+
 
+def bounded(data: dict, key: str, default: int, low: int, high: int) -> int:
+    """Integer option from a DataSource's data, clamped to what the /source routes accept"""
+    return min(max(int(data.get(key, default)), low), high)
 
-async def get_data_from_tools(data_sources: List[schema.DataSource]):
+
+@traced()
+async def get_data_from_tools(data_sources: List[schema.DataSource], compact: bool = False):
     """
     Process data from all valid data sources in the list.
     Only processes 'crm', 'website', or 'facebook_page' data sources.
+    With `compact`, website blocks are deduplicated and trimmed to the byte
+    budget (the chat pipeline always compacts).
     
     Returns:
         List[Dict[str, Any]]: A list with a single dictionary containing all data sources
@@ -134,47 +265,76 @@ async def get_data_from_tools(data_sources: List[schema.DataSource]):
     sources_processed = 0
     
     if not data_sources:
-        print("No data sources provided")
+        logger.debug("No data sources provided")
         return result
     
     for data_source in data_sources:
         source_name = data_source.name
+        started = time.perf_counter()
         
         if source_name not in ALLOWED_SOURCES:
-            print(f"Skipping unsupported data source: {source_name}")
+            logger.warning("Skipping unsupported data source", extra={"source": source_name})
             continue
             
         try:
             if source_name == "crm":
-                print("Fetching data from CRM tool...")
-                result["crm_data"] = get_crm_mock_data()
+                if "size" in data_source.data:
+                    # Seeded synthetic customers, generated off the event loop
+                    size = check_size(int(data_source.data["size"]), SYNTHETIC_INLINE_MAX)
+                    result["crm_data"] = await asyncio.to_thread(
+                        synthetic_crm, size, int(data_source.data.get("seed", 0))
+                    )
+                else:
+                    result["crm_data"] = get_crm_mock_data()
                 sources_processed += 1
                 
             elif source_name == "website":
                 url = data_source.data.get("url", "")
                 if not url:
-                    print("Website URL not provided")
+                    logger.warning("Website URL not provided")
                     continue
-                print(f"Scraping website at {url}...")
-                result["website_data"] = await scrape_website(url)
+                if data_source.data.get("crawl"):
+                    crawl = await crawl_website(
+                        url,
+                        max_pages=bounded(data_source.data, "max_pages", CRAWL_MAX_PAGES, 1, CRAWL_PAGES_LIMIT),
+                        max_depth=bounded(data_source.data, "max_depth", CRAWL_MAX_DEPTH, 0, CRAWL_DEPTH_LIMIT),
+                    )
+                    result["website_data"] = compact_crawl(crawl) if compact else crawl
+                else:
+                    blocks = await scrape_website(url)
+                    result["website_data"] = compact_blocks(blocks) if compact else blocks
                 sources_processed += 1
                 
             elif source_name == "facebook_page":
                 url = data_source.data.get("url", "")
                 if not url:
-                    print("Facebook page URL not provided")
+                    logger.warning("Facebook page URL not provided")
                     continue
-                print(f"Fetching data from Facebook page at {url}...")
-                result["facebook_data"] = get_facebook_page_mock_data(url)
+                if "size" in data_source.data:
+                    size = check_size(int(data_source.data["size"]), SYNTHETIC_INLINE_MAX)
+                    result["facebook_data"] = await asyncio.to_thread(
+                        synthetic_facebook_page, url, size, int(data_source.data.get("seed", 0)),
+                    )
+                else:
+                    since, until = data_source.data.get("since"), data_source.data.get("until")
+                    result["facebook_data"] = await fetch_facebook_page(
+                        url,
+                        bounded(data_source.data, "max_posts", FACEBOOK_MAX_POSTS, 1, FACEBOOK_POSTS_LIMIT),
+                        datetime.fromisoformat(since) if since else None,
+                        datetime.fromisoformat(until) if until else None,
+                    )
                 sources_processed += 1
                 
         except Exception as e:
-            print(f"Error processing {source_name}: {str(e)}")
+            SOURCE_FETCH_SECONDS.labels(source_name, "error").observe(time.perf_counter() - started)
+            logger.warning("Error processing data source", extra={"source": source_name, "error": str(e)})
             continue
+
+        SOURCE_FETCH_SECONDS.labels(source_name, "ok").observe(time.perf_counter() - started)
     
     if sources_processed == 0:
-        print("No valid data sources were processed")
+        logger.info("No valid data sources were processed")
         return {}  # Return empty dict if no sources processed
     
-    print(f"Successfully processed {sources_processed} data source(s)")
+    logger.debug("Processed data sources", extra={"sources_processed": sources_processed})
     return result  # Return the dictionary directly
@@ -0,0 +1,194 @@
+"""
+Conversation sessions for /stream/chat.
+
+A session holds the processed source data of a conversation, its
+retrieval index and its prior turns, so follow-up questions skip every
+source fetch. Sessions are keyed by the client's session_id and are only
+reused while the requested data sources stay the same.
+
+SESSION_BACKEND selects the store:
+
+- "memory" (the default) is an LRU per API worker. Sessions are evicted
+  after SESSION_IDLE_TTL seconds without use. The store is also capped by
+  SESSION_MAX_COUNT and by SESSION_MAX_BYTES of source data.
+- "redis" shares sessions across workers. Entries expire after the same
+  idle TTL. The index is rebuilt from the stored data on load.
+
+Building an index over large sources takes seconds, so sessions are built,
+encoded and decoded in a worker thread, never on the event loop.
+"""
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from src.core import codec
+from src.core.metrics import Counter, Gauge
+from src.core.serialization import dumps_bytes
+from src.core.storage import REDIS_URL
+from . import schema
+from .retrieval import SourceIndex
+
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_IDLE_TTL = int(os.getenv("SESSION_IDLE_TTL", "1800"))
+SESSION_MAX_COUNT = int(os.getenv("SESSION_MAX_COUNT", "1000"))
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(256 * 2**20)))
+# Turns kept per session (user and assistant turns count separately)
+SESSION_MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", "50"))
+
+SESSION_LOOKUPS = Counter(
+    "chat_session_lookups_total", "Chat turns by session outcome", ["outcome"]
+)
+SESSIONS_ACTIVE = Gauge(
+    "chat_sessions_active", "Sessions held by this worker's in-memory store"
+)
+
+
+def sources_key(data_sources: List[schema.DataSource]) -> str:
+    """Identity of a data source selection; a change means the sources must be refetched"""
+    payload = dumps_bytes([source.model_dump() for source in data_sources or []])
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+class Session:
+    __slots__ = ("session_id", "sources_key", "processed_data", "index", "turns", "size", "last_used")
+
+    def __init__(
+        self,
+        session_id: str,
+        sources_key: str,
+        processed_data: dict,
+        index: Optional[SourceIndex] = None,
+        turns: Optional[List[dict]] = None,
+    ):
+        self.session_id = session_id
+        self.sources_key = sources_key
+        self.processed_data = processed_data
+        self.index = index or SourceIndex.build(processed_data)
+        self.turns = turns or []
+        self.size = self.index.source_bytes
+        self.last_used = time.monotonic()
+
+    def add_turn(self, role: str, content: str) -> None:
+        self.turns.append({"role": role, "content": content, "timestamp": time.time()})
+        del self.turns[:-SESSION_MAX_TURNS]
+
+    def to_bytes(self) -> bytes:
+        return codec.encode({
+            "sources_key": self.sources_key,
+            "processed_data": self.processed_data,
+            "turns": self.turns,
+        })
+
+    @classmethod
+    def from_bytes(cls, session_id: str, data: bytes) -> "Session":
+        state = codec.decode(data)
+        return cls(session_id, state["sources_key"], state["processed_data"], turns=state["turns"])
+
+
+class SessionStore(ABC):
+    @abstractmethod
+    async def get(self, session_id: str) -> Optional[Session]:
+        ...
+
+    @abstractmethod
+    async def put(self, session: Session) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, session_id: str) -> None:
+        ...
+
+
+class MemorySessionStore(SessionStore):
+    """LRU of live sessions with idle expiry and count and byte caps"""
+
+    def __init__(
+        self,
+        idle_ttl: float = SESSION_IDLE_TTL,
+        max_count: int = SESSION_MAX_COUNT,
+        max_bytes: int = SESSION_MAX_BYTES,
+    ):
+        self.idle_ttl = idle_ttl
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._bytes = 0
+
+    def _remove(self, session_id: str) -> None:
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self._bytes -= session.size
+
+    def _evict(self) -> None:
+        # Least recently used first, so idle sessions sit at the front
+        now = time.monotonic()
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            over_cap = len(self._sessions) > self.max_count or self._bytes > self.max_bytes
+            if not over_cap and now - session.last_used < self.idle_ttl:
+                break
+            self._remove(session_id)
+        SESSIONS_ACTIVE.set(len(self._sessions))
+
+    async def get(self, session_id: str) -> Optional[Session]:
+        self._evict()
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session.last_used = time.monotonic()
+            self._sessions.move_to_end(session_id)
+        return session
+
+    async def put(self, session: Session) -> None:
+        self._remove(session.session_id)
+        session.last_used = time.monotonic()
+        self._sessions[session.session_id] = session
+        self._bytes += session.size
+        self._evict()
+
+    async def delete(self, session_id: str) -> None:
+        self._remove(session_id)
+        SESSIONS_ACTIVE.set(len(self._sessions))
+
+
+class RedisSessionStore(SessionStore):
+    prefix = "chat:session:"
+
+    def __init__(self, url: str = REDIS_URL, idle_ttl: int = SESSION_IDLE_TTL):
+        from redis import asyncio as redis_asyncio
+
+        self._redis = redis_asyncio.from_url(url)
+        self.idle_ttl = idle_ttl
+
+    async def get(self, session_id: str) -> Optional[Session]:
+        # GETEX refreshes the idle TTL on every read
+        data = await self._redis.getex(self.prefix + session_id, ex=self.idle_ttl)
+        if data is None:
+            return None
+        return await asyncio.to_thread(Session.from_bytes, session_id, data)
+
+    async def put(self, session: Session) -> None:
+        data = await asyncio.to_thread(session.to_bytes)
+        await self._redis.set(self.prefix + session.session_id, data, ex=self.idle_ttl)
+
+    async def delete(self, session_id: str) -> None:
+        await self._redis.delete(self.prefix + session_id)
+
+
+_session_store: Optional[SessionStore] = None
+
+
+def get_session_store() -> SessionStore:
+    """Session store for the configured SESSION_BACKEND"""
+    global _session_store
+    if _session_store is None:
+        _session_store = RedisSessionStore() if SESSION_BACKEND == "redis" else MemorySessionStore()
+    return _session_store
+
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex
@@ -1,22 +1,38 @@
 from celery import Celery
+from kombu import Queue
+from celery.signals import worker_process_init
 import os
 
-# Celery configuration
-REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+from src.core import codec, metrics, queues
+from src.core.storage import REDIS_URL
+
+# Compact binary messages by default; set CELERY_SERIALIZER=json to fall back
+codec.register_with_kombu()
+CELERY_SERIALIZER = os.getenv("CELERY_SERIALIZER", codec.CODEC_NAME)
+
+# Broker and result backend default to Redis. Offline runs (benchmarks) can
+# use "memory://" and "cache+memory://" together with CELERY_TASK_ALWAYS_EAGER.
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", REDIS_URL)
+CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", REDIS_URL)
+CELERY_TASK_ALWAYS_EAGER = os.getenv("CELERY_TASK_ALWAYS_EAGER", "0") == "1"
 
 # Initialize Celery app
 celery_app = Celery(
     "email_worker",
-    broker=REDIS_URL,
-    backend=REDIS_URL,
-    include=["src.api.email.tasks"]
+    broker=CELERY_BROKER_URL,
+    backend=CELERY_RESULT_BACKEND,
+    include=["src.api.email.tasks", "src.api.channels.tasks"]
 )
 
 # Celery configuration
 celery_app.conf.update(
-    task_serializer="json",
-    accept_content=["json"],
-    result_serializer="json",
+    task_serializer=CELERY_SERIALIZER,
+    # Keep json accepted so messages queued before a serializer switch still run
+    accept_content=[codec.CODEC_NAME, "json"],
+    result_serializer=CELERY_SERIALIZER,
+    result_accept_content=[codec.CODEC_NAME, "json"],
+    # Never copy task arguments (audiences) into the result backend
+    result_extended=False,
     timezone="UTC",
     enable_utc=True,
     task_track_started=True,
@@ -24,4 +40,27 @@ celery_app.conf.update(
     worker_prefetch_multiplier=1,
     task_default_retry_delay=60,  # 1 minute
     task_max_retries=3,
+    task_always_eager=CELERY_TASK_ALWAYS_EAGER,
+    # Per-channel priority/regular/bulk queues; run a worker pool per queue
+    # with -Q (see src/core/queues.py). Senders pick the queue per call.
+    task_default_queue="celery",
+    task_queues=[Queue(name) for name in queues.all_queues()],
+    task_routes={
+        "send_bulk_email_task": {"queue": "channel.email"},
+        "schedule_campaign_task": {"queue": "channel.email"},
+        "retry_email_batch_task": {"queue": "channel.email"},
+    },
 )
+
+# Each pool process serves its own metrics on WORKER_METRICS_PORT + index
+WORKER_METRICS_PORT = os.getenv("WORKER_METRICS_PORT")
+
+
+@worker_process_init.connect
+def serve_worker_metrics(**kwargs):
+    if not WORKER_METRICS_PORT:
+        return
+    from billiard import current_process
+
+    index = getattr(current_process(), "index", 0) or 0
+    metrics.start_http_server(int(WORKER_METRICS_PORT) + index)
@@ -0,0 +1,243 @@
+"""
+Adaptive admission control for expensive endpoints.
+
+Each limiter caps how many requests of one kind a worker runs at once
+(chat pipelines, website scrapes). The cap adapts with AIMD on observed
+latency. When requests finish within the target latency while the limiter
+is busy, the limit grows by about one per limit's worth of completions.
+When they take longer than the target, the limit shrinks by
+ADMISSION_DECREASE_FACTOR, at most once per target-latency window.
+
+Requests over the limit wait in a short FIFO queue until
+ADMISSION_QUEUE_TIMEOUT. When the queue is full or the deadline passes,
+they are shed with 503 and a Retry-After header. Rejecting early keeps
+tail latency bounded for the requests that are admitted, instead of
+slowing every stream down together.
+
+The limit is per worker process; run more workers to scale out.
+"""
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, Optional, TypeVar
+
+from fastapi import HTTPException
+
+from .metrics import Counter, Gauge, Histogram
+
+T = TypeVar("T")
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2"))
+ADMISSION_DECREASE_FACTOR = float(os.getenv("ADMISSION_DECREASE_FACTOR", "0.8"))
+
+# Per limiter: (initial limit, max limit, target latency in seconds)
+LIMITER_DEFAULTS = {
+    # Latency is the time to the first event; the permit is held until the pipeline ends
+    "chat": (16, 64, 2.0),
+    "source": (8, 32, 5.0),
+}
+
+ADMISSION_LIMIT = Gauge(
+    "admission_concurrency_limit", "Current adaptive concurrency limit", ["route"]
+)
+ADMISSION_INFLIGHT = Gauge(
+    "admission_inflight", "Admitted requests in progress", ["route"]
+)
+ADMISSION_REQUESTS = Counter(
+    "admission_requests_total", "Requests by admission outcome", ["route", "outcome"]
+)
+ADMISSION_QUEUE_SECONDS = Histogram(
+    "admission_queue_seconds", "Time admitted requests waited for a slot", ["route"]
+)
+
+
+class Permit:
+    """One admitted request; release() is idempotent"""
+
+    __slots__ = ("limiter", "started", "latency", "released")
+
+    def __init__(self, limiter: "AdaptiveLimiter"):
+        self.limiter = limiter
+        self.started = time.perf_counter()
+        self.latency: Optional[float] = None
+        self.released = False
+
+    def observe(self, latency: Optional[float] = None) -> None:
+        """Record the latency signal (defaults to the time since admission)"""
+        if self.latency is None:
+            self.latency = time.perf_counter() - self.started if latency is None else latency
+
+    def release(self, failed: bool = False) -> None:
+        if self.released:
+            return
+        self.released = True
+        self.observe()
+        self.limiter.release(self.latency, failed)
+
+
+class AdaptiveLimiter:
+    def __init__(
+        self,
+        name: str,
+        initial: int,
+        max_limit: int,
+        target_latency: float,
+        min_limit: int = 1,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+        max_queue: Optional[int] = None,
+    ):
+        self.name = name
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_limit if max_queue is None else max_queue
+        self.inflight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+        # Smoothed latency, used for the Retry-After hint
+        self._latency = target_latency
+        ADMISSION_LIMIT.labels(name).set(initial)
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self._latency))
+
+    def _shed(self) -> HTTPException:
+        ADMISSION_REQUESTS.labels(self.name, "shed").inc()
+        return HTTPException(
+            status_code=503,
+            detail=f"Server busy ({self.name}), retry later",
+            headers={"Retry-After": str(self.retry_after())},
+        )
+
+    def _admit(self) -> Permit:
+        self.inflight += 1
+        ADMISSION_INFLIGHT.labels(self.name).set(self.inflight)
+        return Permit(self)
+
+    async def acquire(self) -> Permit:
+        """Admit now, after a short wait, or raise a 503 HTTPException"""
+        if self.inflight < int(self.limit) and not self._waiters:
+            ADMISSION_REQUESTS.labels(self.name, "admitted").inc()
+            return self._admit()
+        if len(self._waiters) >= self.max_queue:
+            raise self._shed()
+
+        started = time.perf_counter()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not waiter.done():
+                waiter.cancel()
+                self._waiters.remove(waiter)
+                raise self._shed()
+        except asyncio.CancelledError:
+            # Client went away; hand a slot granted meanwhile to the next waiter
+            if waiter.done() and not waiter.cancelled():
+                self._release_slot()
+            else:
+                waiter.cancel()
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            raise
+
+        # release() already counted this request in inflight
+        ADMISSION_REQUESTS.labels(self.name, "queued").inc()
+        ADMISSION_QUEUE_SECONDS.labels(self.name).observe(time.perf_counter() - started)
+        return Permit(self)
+
+    def release(self, latency: float, failed: bool = False) -> None:
+        self._latency += 0.2 * (latency - self._latency)
+        now = time.perf_counter()
+        if failed or latency > self.target_latency:
+            if now - self._last_decrease >= self.target_latency:
+                self.limit = max(self.min_limit, self.limit * ADMISSION_DECREASE_FACTOR)
+                self._last_decrease = now
+        elif self.inflight >= self.limit / 2:
+            # Only grow while the limit is actually in use
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        ADMISSION_LIMIT.labels(self.name).set(round(self.limit, 2))
+        self._release_slot()
+
+    def _release_slot(self) -> None:
+        self.inflight -= 1
+        # Hand freed slots straight to waiters, so newcomers cannot overtake them
+        while self._waiters and self.inflight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self.inflight += 1
+        ADMISSION_INFLIGHT.labels(self.name).set(self.inflight)
+
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+
+
+def get_limiter(name: str) -> AdaptiveLimiter:
+    """Limiter for `name`, configured by <NAME>_CONCURRENCY_INITIAL, _MAX and <NAME>_TARGET_LATENCY"""
+    limiter = _limiters.get(name)
+    if limiter is None:
+        initial, max_limit, target = LIMITER_DEFAULTS[name]
+        prefix = name.upper()
+        limiter = _limiters[name] = AdaptiveLimiter(
+            name,
+            int(os.getenv(f"{prefix}_CONCURRENCY_INITIAL", str(initial))),
+            int(os.getenv(f"{prefix}_CONCURRENCY_MAX", str(max_limit))),
+            float(os.getenv(f"{prefix}_TARGET_LATENCY", str(target))),
+        )
+    return limiter
+
+
+def admission(name: str):
+    """
+    Route dependency holding a permit while the endpoint runs. The permit is
+    released before a streaming body is sent; use admit_stream and hold for
+    those.
+    """
+
+    async def dependency():
+        if not ADMISSION_ENABLED:
+            yield
+            return
+        permit = await get_limiter(name).acquire()
+        try:
+            yield
+        except HTTPException:
+            # Client errors say nothing about load
+            permit.release()
+            raise
+        except Exception:
+            permit.release(failed=True)
+            raise
+        permit.release()
+
+    return dependency
+
+
+async def admit_stream(name: str) -> Optional[Permit]:
+    """Permit for a streaming response, or None with admission disabled"""
+    return await get_limiter(name).acquire() if ADMISSION_ENABLED else None
+
+
+async def hold(permit: Optional[Permit], events: AsyncIterator[T]) -> AsyncIterator[T]:
+    """Hold a stream's permit until it ends; the first item's delay is the latency signal"""
+    if permit is None:
+        async for event in events:
+            yield event
+        return
+    failed = False
+    try:
+        async for event in events:
+            permit.observe()
+            yield event
+    except Exception:
+        failed = True
+        raise
+    finally:
+        permit.release(failed)
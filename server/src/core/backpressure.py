@@ -0,0 +1,184 @@
+"""
+Bounded per-connection delivery for server-sent event streams.
+
+Each SSE connection reads from a SendQueue filled by its producer. When the
+client reads slower than events are produced the queue fills up and the
+overflow policy decides what happens:
+
+- "block":       the producer waits for the client (no loss)
+- "drop_oldest": the oldest queued event is discarded
+- "coalesce":    the new event is merged into the last queued one
+                 (falls back to drop_oldest when events can't be merged)
+- "disconnect":  the connection is closed; the client can resume later
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from typing import AsyncIterator, Callable, Deque, Optional
+
+from .metrics import Counter, Gauge
+from .profiling import PROFILE_ENABLED, record_span
+
+POLICIES = ("block", "drop_oldest", "coalesce", "disconnect")
+
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "64"))
+SSE_QUEUE_POLICY = os.getenv("SSE_QUEUE_POLICY", "block")
+
+SSE_QUEUE_DEPTH = Gauge(
+    "sse_send_queue_depth", "Events queued for delivery, summed over connections", ["route"]
+)
+SSE_DROPPED_EVENTS = Counter(
+    "sse_dropped_events_total", "Events discarded because a client fell behind", ["route", "policy"]
+)
+SSE_COALESCED_EVENTS = Counter(
+    "sse_coalesced_events_total", "Events merged into an already queued event", ["route"]
+)
+SSE_SLOW_CONSUMER_DISCONNECTS = Counter(
+    "sse_slow_consumer_disconnects_total", "Connections closed for falling behind", ["route"]
+)
+
+# Merges a queued event with a new one; None when they can't be combined
+Coalescer = Callable[[dict, dict], Optional[dict]]
+
+
+class SendQueue:
+    """Bounded event queue between a producer and one SSE connection"""
+
+    __slots__ = ("route", "maxsize", "policy", "coalesce", "closed",
+                 "_items", "_readable", "_writable", "_depth")
+
+    def __init__(self, route: str, maxsize: int = SSE_QUEUE_SIZE, policy: str = SSE_QUEUE_POLICY,
+                 coalesce: Optional[Coalescer] = None):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown SSE queue policy {policy!r}; expected one of {POLICIES}")
+        self.route = route
+        self.maxsize = maxsize
+        self.policy = policy
+        self.coalesce = coalesce
+        self.closed = False
+        self._items: Deque[dict] = deque()
+        self._readable = asyncio.Event()
+        self._writable = asyncio.Event()
+        self._writable.set()
+        self._depth = SSE_QUEUE_DEPTH.labels(route)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def offer(self, event: dict) -> bool:
+        """
+        Enqueue without waiting, applying the overflow policy when full
+        ("block" behaves like "drop_oldest" here). Returns False once the
+        queue is closed.
+        """
+        if self.closed:
+            return False
+        if len(self._items) < self.maxsize:
+            self._push(event)
+            return True
+
+        if self.policy == "disconnect":
+            SSE_SLOW_CONSUMER_DISCONNECTS.labels(self.route).inc()
+            self.abort()
+            return False
+
+        if self.policy == "coalesce" and self.coalesce is not None:
+            merged = self.coalesce(self._items[-1], event)
+            if merged is not None:
+                self._items[-1] = merged
+                SSE_COALESCED_EVENTS.labels(self.route).inc()
+                return True
+
+        self._items.popleft()
+        self._depth.dec()
+        SSE_DROPPED_EVENTS.labels(self.route, self.policy).inc()
+        self._push(event)
+        return True
+
+    async def put(self, event: dict) -> bool:
+        """Enqueue, waiting for room under the "block" policy"""
+        if self.policy == "block":
+            while len(self._items) >= self.maxsize and not self.closed:
+                self._writable.clear()
+                await self._writable.wait()
+        return self.offer(event)
+
+    async def get(self) -> Optional[dict]:
+        """Next event, or None once the queue is closed and drained"""
+        while not self._items:
+            if self.closed:
+                return None
+            self._readable.clear()
+            await self._readable.wait()
+        event = self._items.popleft()
+        self._depth.dec()
+        self._writable.set()
+        return event
+
+    def finish(self) -> None:
+        """No more events; the consumer drains what is queued"""
+        self.closed = True
+        self._readable.set()
+        self._writable.set()
+
+    def abort(self) -> None:
+        """Close immediately, discarding queued events"""
+        self._depth.dec(len(self._items))
+        self._items.clear()
+        self.finish()
+
+    def _push(self, event: dict) -> None:
+        self._items.append(event)
+        self._depth.inc()
+        self._readable.set()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> dict:
+        event = await self.get()
+        if event is None:
+            raise StopAsyncIteration
+        return event
+
+
+async def deliver(route: str, events: AsyncIterator[dict], maxsize: int = SSE_QUEUE_SIZE,
+                  policy: str = SSE_QUEUE_POLICY,
+                  coalesce: Optional[Coalescer] = None) -> AsyncIterator[dict]:
+    """
+    Decouple a producer from a client through a bounded SendQueue.
+
+    The producer runs as its own task so the overflow policy, not the
+    client's read speed, decides how much is buffered for the connection.
+    """
+    queue = SendQueue(route, maxsize, policy, coalesce)
+
+    async def pump():
+        try:
+            async for event in events:
+                if not await queue.put(event):
+                    break
+        finally:
+            queue.finish()
+
+    task = asyncio.create_task(pump())
+    try:
+        async for event in queue:
+            if not PROFILE_ENABLED:
+                yield event
+                continue
+            # The client write happens while this generator is suspended
+            written = time.perf_counter()
+            yield event
+            record_span("sse_write", time.perf_counter() - written)
+    finally:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        aclose = getattr(events, "aclose", None)
+        if aclose is not None:
+            await aclose()
+        queue.abort()
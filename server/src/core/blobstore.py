@@ -0,0 +1,66 @@
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+
+from .storage import STORAGE_BACKEND, get_redis
+
+
+class BlobStore(ABC):
+    """Key/value store for large payloads passed by reference (claim check)"""
+
+    @abstractmethod
+    def put(self, key: str, data: bytes, ttl: int) -> None:
+        ...
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+
+class RedisBlobStore(BlobStore):
+    prefix = "blob:"
+
+    def put(self, key: str, data: bytes, ttl: int) -> None:
+        get_redis().set(self.prefix + key, data, ex=ttl)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return get_redis().get(self.prefix + key)
+
+    def delete(self, key: str) -> None:
+        get_redis().delete(self.prefix + key)
+
+
+class MemoryBlobStore(BlobStore):
+    def __init__(self):
+        self._blobs: Dict[str, Tuple[bytes, float]] = {}
+
+    def put(self, key: str, data: bytes, ttl: int) -> None:
+        self._blobs[key] = (data, time.monotonic() + ttl)
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._blobs.get(key)
+        if entry is None:
+            return None
+        data, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._blobs[key]
+            return None
+        return data
+
+    def delete(self, key: str) -> None:
+        self._blobs.pop(key, None)
+
+
+_blob_store: Optional[BlobStore] = None
+
+
+def get_blob_store() -> BlobStore:
+    """Blob store for the configured STORAGE_BACKEND"""
+    global _blob_store
+    if _blob_store is None:
+        _blob_store = MemoryBlobStore() if STORAGE_BACKEND == "memory" else RedisBlobStore()
+    return _blob_store
@@ -0,0 +1,251 @@
+"""
+Publish/subscribe fan-out for server-sent event streams.
+
+One producer per topic generates events; every SSE connection subscribes
+with its own bounded queue. `Hub` fans out within one process, `RedisHub`
+relays through Redis pub/sub so all uvicorn workers and nodes share a
+single producer, elected with a Redis lock.
+"""
+import asyncio
+import logging
+import os
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Deque, Dict, Optional, Set
+
+from .backpressure import SendQueue
+from .metrics import Gauge
+from .serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_QUEUE_SIZE = int(os.getenv("BROADCAST_QUEUE_SIZE", "100"))
+
+# Overflow policy for a subscriber's queue (see core.backpressure). The
+# publisher never waits for one client, so "block" acts like "drop_oldest".
+BROADCAST_LAG_POLICY = os.getenv("BROADCAST_LAG_POLICY", "drop_oldest")
+
+# Recent events kept per topic for clients reconnecting with Last-Event-ID
+BROADCAST_REPLAY_SIZE = int(os.getenv("BROADCAST_REPLAY_SIZE", "100"))
+
+BROADCAST_SUBSCRIBERS = Gauge(
+    "broadcast_subscribers", "Local subscribers per broadcast topic", ["topic"]
+)
+
+ProducerFactory = Callable[[], AsyncIterator[dict]]
+
+
+class Hub:
+    """In-process broadcast hub"""
+
+    def __init__(self, queue_size: int = BROADCAST_QUEUE_SIZE, policy: str = BROADCAST_LAG_POLICY,
+                 replay_size: int = BROADCAST_REPLAY_SIZE):
+        self.queue_size = queue_size
+        self.policy = policy
+        self.replay_size = replay_size
+        self._history: Dict[str, Deque[dict]] = {}
+        self._subscribers: Dict[str, Set[SendQueue]] = {}
+        self._producers: Dict[str, ProducerFactory] = {}
+        self._producer_tasks: Dict[str, asyncio.Task] = {}
+        self._sequence: Dict[str, int] = {}
+
+    def register_producer(self, topic: str, factory: ProducerFactory) -> None:
+        """Producer started with the first subscriber and stopped with the last"""
+        self._producers[topic] = factory
+
+    @asynccontextmanager
+    async def subscribe(self, topic: str, last_event_id: Optional[str] = None) -> AsyncIterator[SendQueue]:
+        """
+        Subscribe to a topic. With `last_event_id`, recent events after it are
+        queued first so a reconnecting client doesn't miss anything.
+        """
+        # Broadcast events are snapshots, so coalescing keeps the newest one
+        subscription = SendQueue(topic, self.queue_size, self.policy, coalesce=lambda queued, new: new)
+        if last_event_id is not None and last_event_id.isdigit():
+            for event in self._history.get(topic, ()):
+                if int(event["id"]) > int(last_event_id):
+                    subscription.offer(event)
+        subscribers = self._subscribers.setdefault(topic, set())
+        if not subscribers:
+            await self._on_first_subscriber(topic)
+        subscribers.add(subscription)
+        BROADCAST_SUBSCRIBERS.labels(topic).inc()
+        try:
+            yield subscription
+        finally:
+            subscribers.discard(subscription)
+            BROADCAST_SUBSCRIBERS.labels(topic).dec()
+            if not subscribers:
+                await self._on_last_unsubscribe(topic)
+
+    async def publish(self, topic: str, data: dict) -> None:
+        """Encode once and deliver to every subscriber of the topic"""
+        event = {"id": str(await self._next_id(topic)), "data": dumps(data)}
+        self._fan_out(topic, event)
+
+    def subscriber_count(self, topic: str) -> int:
+        return len(self._subscribers.get(topic, ()))
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        for task in list(self._producer_tasks.values()):
+            task.cancel()
+        for subscribers in self._subscribers.values():
+            for subscription in subscribers:
+                subscription.abort()
+
+    def _fan_out(self, topic: str, event: dict) -> None:
+        history = self._history.get(topic)
+        if history is None:
+            history = self._history[topic] = deque(maxlen=self.replay_size)
+        history.append(event)
+        for subscription in tuple(self._subscribers.get(topic, ())):
+            subscription.offer(event)
+
+    async def _next_id(self, topic: str) -> int:
+        self._sequence[topic] = self._sequence.get(topic, 0) + 1
+        return self._sequence[topic]
+
+    async def _on_first_subscriber(self, topic: str) -> None:
+        self._ensure_producer(topic)
+
+    async def _on_last_unsubscribe(self, topic: str) -> None:
+        task = self._producer_tasks.pop(topic, None)
+        if task is not None:
+            task.cancel()
+
+    def _ensure_producer(self, topic: str) -> None:
+        if topic in self._producers and topic not in self._producer_tasks:
+            task = asyncio.create_task(self._run_producer(topic))
+            self._producer_tasks[topic] = task
+            task.add_done_callback(lambda _: self._producer_tasks.pop(topic, None))
+
+    async def _run_producer(self, topic: str) -> None:
+        try:
+            async for data in self._producers[topic]():
+                if not self.subscriber_count(topic):
+                    break
+                await self.publish(topic, data)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Broadcast producer failed", extra={"topic": topic})
+
+
+class RedisHub(Hub):
+    """
+    Hub relaying through Redis pub/sub.
+
+    Every process forwards the topic's Redis channel to its local
+    subscribers. Only the process holding the topic's leader lock runs the
+    producer; the others retry the lock while they have subscribers.
+    """
+
+    LEADER_TTL_MS = 10_000
+    LEADER_RETRY_SECONDS = 2.0
+
+    # Extend the lock only if this node still owns it
+    _RENEW_SCRIPT = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('pexpire', KEYS[1], ARGV[2])
+    end
+    return 0
+    """
+
+    def __init__(self, url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.url = url
+        self.node_id = uuid.uuid4().hex
+        self._redis = None
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        from redis import asyncio as redis_asyncio
+
+        self._redis = redis_asyncio.from_url(self.url)
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+
+    async def stop(self) -> None:
+        await super().stop()
+        if self._reader is not None:
+            self._reader.cancel()
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+        if self._redis is not None:
+            await self._redis.aclose()
+
+    @staticmethod
+    def _channel(topic: str) -> str:
+        return f"broadcast:{topic}"
+
+    async def publish(self, topic: str, data: dict) -> None:
+        event = {"id": str(await self._next_id(topic)), "data": dumps(data)}
+        await self._redis.publish(self._channel(topic), dumps(event))
+
+    async def _next_id(self, topic: str) -> int:
+        # Shared sequence so ids stay monotonic when leadership moves
+        return await self._redis.incr(f"broadcast:seq:{topic}")
+
+    async def _on_first_subscriber(self, topic: str) -> None:
+        await self._pubsub.subscribe(self._channel(topic))
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.create_task(self._read())
+        self._ensure_producer(topic)
+
+    async def _on_last_unsubscribe(self, topic: str) -> None:
+        await super()._on_last_unsubscribe(topic)
+        await self._pubsub.unsubscribe(self._channel(topic))
+
+    async def _read(self) -> None:
+        prefix = len("broadcast:")
+        while True:
+            try:
+                # listen() returns once no channels are subscribed; the next
+                # first subscriber starts a new reader
+                async for message in self._pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    topic = message["channel"].decode()[prefix:]
+                    self._fan_out(topic, loads(message["data"]))
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Broadcast relay failed; resubscribing")
+                await asyncio.sleep(1)
+
+    async def _run_producer(self, topic: str) -> None:
+        lock = f"broadcast:leader:{topic}"
+        renew = self._redis.register_script(self._RENEW_SCRIPT)
+        try:
+            while self.subscriber_count(topic):
+                acquired = await self._redis.set(lock, self.node_id, nx=True, px=self.LEADER_TTL_MS)
+                if not acquired:
+                    await asyncio.sleep(self.LEADER_RETRY_SECONDS)
+                    continue
+
+                logger.info("Became broadcast producer", extra={"topic": topic, "node": self.node_id})
+                async for data in self._producers[topic]():
+                    if not self.subscriber_count(topic):
+                        break
+                    if not await renew(keys=[lock], args=[self.node_id, self.LEADER_TTL_MS]):
+                        break
+                    await self.publish(topic, data)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Broadcast producer failed", extra={"topic": topic})
+        finally:
+            if self._redis is not None:
+                await renew(keys=[lock], args=[self.node_id, 1])
+
+
+def create_hub(backend: str, redis_url: str) -> Hub:
+    """Hub for BROADCAST_BACKEND ("memory" or "redis")"""
+    if backend == "redis":
+        return RedisHub(redis_url)
+    return Hub()
@@ -0,0 +1,49 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Threads dedicated to blocking broker/result-backend calls. Kept separate
+# from the default executor so Celery I/O can't starve other offloaded work.
+CELERY_IO_THREADS = int(os.getenv("CELERY_IO_THREADS", "8"))
+
+# Calls allowed to wait for a thread at once; further callers wait on the
+# event loop instead of piling up in the executor queue
+CELERY_IO_MAX_PENDING = int(os.getenv("CELERY_IO_MAX_PENDING", "256"))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_pending = asyncio.Semaphore(CELERY_IO_MAX_PENDING)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=CELERY_IO_THREADS, thread_name_prefix="celery-io"
+        )
+    return _executor
+
+
+async def run_blocking(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a blocking Celery/Redis call off the event loop.
+
+    Use this for task.delay(), AsyncResult lookups and any other call that
+    does a network round-trip to the broker or result backend.
+    """
+    loop = asyncio.get_running_loop()
+    async with _pending:
+        return await loop.run_in_executor(
+            _get_executor(), functools.partial(fn, *args, **kwargs)
+        )
+
+
+def shutdown() -> None:
+    """Stop the I/O threads (called on application shutdown)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
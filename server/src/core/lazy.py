@@ -0,0 +1,53 @@
+"""
+Deferred imports for heavy dependencies.
+
+`httpx = lazy_import("httpx")` binds a stand-in that imports the real
+module the first time one of its attributes is used. This keeps Celery,
+the task modules, httpx and BeautifulSoup off the startup path of
+processes that never touch them (see APP_ROLE in src.api.routes).
+Modules that use a lazy module in annotations need
+`from __future__ import annotations`, so that defining a function does
+not trigger the import.
+"""
+import importlib
+import logging
+import time
+from types import ModuleType
+from typing import Optional
+
+from src.core.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+LAZY_IMPORT_SECONDS = Histogram(
+    "lazy_import_seconds", "Time spent importing a deferred module on first use", ["module"]
+)
+
+
+class LazyModule:
+    __slots__ = ("_name", "_module")
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+
+    def _load(self) -> ModuleType:
+        # import_module holds the per-module import lock, so racing threads load it once
+        started = time.perf_counter()
+        module = importlib.import_module(self._name)
+        elapsed = time.perf_counter() - started
+        if self._module is None:
+            LAZY_IMPORT_SECONDS.labels(self._name).observe(elapsed)
+            logger.debug("Lazy module loaded", extra={"module": self._name, "seconds": round(elapsed, 4)})
+        self._module = module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._module or self._load(), attr)
+
+    def __repr__(self) -> str:
+        return f"<lazy module {self._name!r}{' (loaded)' if self._module else ''}>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
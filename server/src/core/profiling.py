@@ -0,0 +1,179 @@
+"""
+Opt-in per-request span profiling.
+
+With PROFILE_ENABLED=1 a request is profiled when it carries the
+`X-Profile: 1` header or is picked by PROFILE_SAMPLE_RATE. Spans opened with
+`traced` / `span` while handling it are aggregated into a wall-clock
+breakdown and written to PROFILE_DIR in the folded-stack format read by
+flamegraph.pl, speedscope and inferno.
+
+When PROFILE_ENABLED is off the middleware is not installed and `traced`
+returns functions unchanged, so there is no per-call cost.
+"""
+import asyncio
+import functools
+import inspect
+import logging
+import os
+import random
+import re
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "0") == "1"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_HEADER = b"x-profile"
+
+_NULL_SPAN = nullcontext()
+
+
+class Profile:
+    """Span timings for one request, keyed by stack path"""
+
+    __slots__ = ("id", "root", "self_time", "child_time")
+
+    def __init__(self, root: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.root = root
+        self.self_time: Dict[Tuple[str, ...], float] = defaultdict(float)
+        self.child_time: Dict[Tuple[str, ...], float] = defaultdict(float)
+
+    def record(self, path: Tuple[str, ...], elapsed: float) -> None:
+        self.self_time[path] += elapsed - self.child_time.pop(path, 0.0)
+        if len(path) > 1:
+            self.child_time[path[:-1]] += elapsed
+
+    def folded(self) -> str:
+        """One `frame;frame;frame microseconds` line per stack"""
+        lines = [
+            f"{';'.join(path)} {max(0, round(seconds * 1e6))}"
+            for path, seconds in self.self_time.items()
+        ]
+        return "\n".join(sorted(lines)) + "\n"
+
+    def breakdown(self) -> Dict[str, float]:
+        """Inclusive milliseconds per span name, for log output"""
+        totals: Dict[str, float] = defaultdict(float)
+        for path, seconds in self.self_time.items():
+            for name in set(path):
+                totals[name] += seconds * 1e3
+        return {name: round(ms, 3) for name, ms in totals.items()}
+
+    def dump(self, directory: str) -> str:
+        os.makedirs(directory, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", self.root).strip("-").lower()
+        filename = os.path.join(directory, f"{int(time.time())}-{slug}-{self.id}.folded")
+        with open(filename, "w") as handle:
+            handle.write(self.folded())
+        return filename
+
+
+_profile: ContextVar[Optional[Profile]] = ContextVar("profile", default=None)
+_path: ContextVar[Tuple[str, ...]] = ContextVar("profile_path", default=())
+
+
+@contextmanager
+def _span(name: str):
+    profile = _profile.get()
+    if profile is None:
+        yield
+        return
+
+    path = _path.get() + (name,)
+    token = _path.set(path)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.record(path, time.perf_counter() - started)
+        _path.reset(token)
+
+
+def span(name: str):
+    """Context manager timing a block as a named span of the current profile"""
+    if not PROFILE_ENABLED:
+        return _NULL_SPAN
+    return _span(name)
+
+
+def record_span(name: str, elapsed: float) -> None:
+    """
+    Add an externally timed span under the current path. For time spent
+    suspended at a generator's yield, where a span's context must not be held.
+    """
+    profile = _profile.get()
+    if profile is not None:
+        profile.record(_path.get() + (name,), elapsed)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator recording each call of a sync or async function as a span"""
+
+    def decorate(fn: Callable) -> Callable:
+        if not PROFILE_ENABLED:
+            return fn
+        span_name = name or fn.__name__
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with _span(span_name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorate
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles requests selected by header or sampling"""
+
+    def __init__(self, app, directory: str = PROFILE_DIR, sample_rate: float = PROFILE_SAMPLE_RATE):
+        self.app = app
+        self.directory = directory
+        self.sample_rate = sample_rate
+
+    def _selected(self, scope) -> bool:
+        for key, value in scope.get("headers", ()):
+            if key == PROFILE_HEADER:
+                return value in (b"1", b"true")
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._selected(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(f"{scope['method']} {scope['path']}")
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile.id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        profile_token = _profile.set(profile)
+        try:
+            with _span(profile.root):
+                await self.app(scope, receive, send_with_id)
+        finally:
+            _profile.reset(profile_token)
+            filename = await asyncio.get_running_loop().run_in_executor(
+                None, profile.dump, self.directory
+            )
+            logger.info("Request profiled", extra={
+                "profile_id": profile.id, "file": filename, "breakdown_ms": profile.breakdown(),
+            })
@@ -0,0 +1,53 @@
+"""
+Celery queue layout and routing by channel, priority and size class.
+
+Every delivery channel has three queues, each meant for its own worker pool:
+
+    channel.<name>.priority  transactional and other small or high-priority sends
+    channel.<name>           regular campaigns
+    channel.<name>.bulk      very large or low-priority campaigns
+
+A million-recipient campaign therefore lands on the bulk queue and cannot
+delay a small send waiting on the priority queue.
+"""
+import os
+from typing import List, Literal
+
+Priority = Literal["high", "normal", "low"]
+
+CHANNELS = ("email", "sms", "whatsapp")
+
+# Sends up to this many recipients are small enough for the priority queue
+SMALL_SEND_MAX = int(os.getenv("SMALL_SEND_MAX", "100"))
+# Sends above this many recipients always go to the bulk queue
+BULK_SEND_MIN = int(os.getenv("BULK_SEND_MIN", "10000"))
+
+
+def channel_queue(channel: str, size_class: str = "") -> str:
+    return f"channel.{channel}.{size_class}" if size_class else f"channel.{channel}"
+
+
+def all_queues() -> List[str]:
+    """Every queue the workers may consume, default queue first"""
+    queues = ["celery"]
+    for channel in CHANNELS:
+        queues += [
+            channel_queue(channel, "priority"),
+            channel_queue(channel),
+            channel_queue(channel, "bulk"),
+        ]
+    return queues
+
+
+def size_class(recipients: int, priority: Priority = "normal") -> str:
+    """Pick the size class ("priority", "" or "bulk") for a send"""
+    if recipients > BULK_SEND_MIN or priority == "low":
+        return "bulk"
+    if recipients <= SMALL_SEND_MAX or priority == "high":
+        return "priority"
+    return ""
+
+
+def select_queue(channel: str, recipients: int, priority: Priority = "normal") -> str:
+    """Queue for a send of `recipients` messages on `channel`"""
+    return channel_queue(channel, size_class(recipients, priority))
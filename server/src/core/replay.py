@@ -0,0 +1,119 @@
+"""
+Replay buffers for resumable server-sent event streams.
+
+A producer appends events to a bounded per-stream buffer; connections follow
+the buffer instead of the producer. Event ids are "<stream_id>:<seq>", so a
+client reconnecting with Last-Event-ID resumes from the next event while the
+producer keeps running (or after it has finished) without redoing any work.
+"""
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import AsyncIterator, Deque, List, Optional, Tuple
+
+from .serialization import dumps
+
+# Events kept per stream; older ones can no longer be replayed
+REPLAY_BUFFER_SIZE = int(os.getenv("REPLAY_BUFFER_SIZE", "1000"))
+
+# Seconds a finished stream stays resumable
+REPLAY_TTL = float(os.getenv("REPLAY_TTL", "300"))
+
+# Streams kept per process; the least recently created are evicted first
+REPLAY_MAX_STREAMS = int(os.getenv("REPLAY_MAX_STREAMS", "10000"))
+
+
+def parse_event_id(event_id: Optional[str]) -> Optional[Tuple[str, int]]:
+    """Split a "<stream_id>:<seq>" Last-Event-ID; None if it isn't one"""
+    if not event_id:
+        return None
+    stream_id, _, seq = event_id.rpartition(":")
+    if not stream_id or not seq.isdigit():
+        return None
+    return stream_id, int(seq)
+
+
+class ReplayBuffer:
+    """Bounded, append-only event log for one stream"""
+
+    __slots__ = ("stream_id", "events", "next_seq", "done", "expires_at", "_updated")
+
+    def __init__(self, stream_id: str, maxlen: int = REPLAY_BUFFER_SIZE, ttl: float = REPLAY_TTL):
+        self.stream_id = stream_id
+        self.events: Deque[Tuple[int, dict]] = deque(maxlen=maxlen)
+        self.next_seq = 1
+        self.done = False
+        # Unfinished streams get the TTL too, so an abandoned producer can't pin memory
+        self.expires_at = time.monotonic() + ttl
+        self._updated = asyncio.Event()
+
+    def append(self, data: dict, ttl: float = REPLAY_TTL) -> dict:
+        """Encode, number and store an event; wakes every follower"""
+        seq = self.next_seq
+        self.next_seq += 1
+        event = {"id": f"{self.stream_id}:{seq}", "data": dumps(data)}
+        self.events.append((seq, event))
+        self.expires_at = time.monotonic() + ttl
+        self._notify()
+        return event
+
+    def finish(self, ttl: float = REPLAY_TTL) -> None:
+        self.done = True
+        self.expires_at = time.monotonic() + ttl
+        self._notify()
+
+    def _notify(self) -> None:
+        updated, self._updated = self._updated, asyncio.Event()
+        updated.set()
+
+    def events_after(self, seq: int) -> List[Tuple[int, dict]]:
+        if not self.events:
+            return []
+        first_seq = self.events[0][0]
+        return list(islice(self.events, max(0, seq - first_seq + 1), None))
+
+    async def follow(self, after: int = 0) -> AsyncIterator[dict]:
+        """Yield stored events after `after`, then live ones until the stream finishes"""
+        while True:
+            updated = self._updated
+            for seq, event in self.events_after(after):
+                after = seq
+                yield event
+            if self.done and after >= self.next_seq - 1:
+                return
+            await updated.wait()
+
+
+class ReplayRegistry:
+    """Replay buffers by stream id, bounded in count and lifetime"""
+
+    def __init__(self, max_streams: int = REPLAY_MAX_STREAMS):
+        self.max_streams = max_streams
+        self._buffers: "OrderedDict[str, ReplayBuffer]" = OrderedDict()
+
+    def create(self) -> ReplayBuffer:
+        self._evict_expired()
+        while len(self._buffers) >= self.max_streams:
+            self._buffers.popitem(last=False)
+        buffer = ReplayBuffer(uuid.uuid4().hex)
+        self._buffers[buffer.stream_id] = buffer
+        return buffer
+
+    def get(self, stream_id: str) -> Optional[ReplayBuffer]:
+        buffer = self._buffers.get(stream_id)
+        if buffer is not None and buffer.expires_at <= time.monotonic():
+            del self._buffers[stream_id]
+            return None
+        return buffer
+
+    def __len__(self) -> int:
+        return len(self._buffers)
+
+    def _evict_expired(self) -> None:
+        now = time.monotonic()
+        expired = [key for key, buffer in self._buffers.items() if buffer.expires_at <= now]
+        for key in expired:
+            del self._buffers[key]
@@ -0,0 +1,216 @@
+"""
+Time-bucketed delivery rollups per campaign and channel.
+
+Workers count delivery attempts by outcome (sent, failed transiently,
+bounced) and keep a histogram of send latency. Counts go into per-minute
+buckets in a RollupRecorder while a task runs. Each flush merges them into
+the store as increments to minute and hour buckets. A flush happens at the
+end of the task and every ROLLUP_FLUSH_INTERVAL seconds while it runs.
+A periodic flush that fails is logged and its counts are kept for the
+next one, so recording an outcome never raises mid-send.
+Reading a campaign's stats therefore touches one small record per bucket,
+whatever the audience size.
+
+Latency histograms use fixed log-spaced bounds, so buckets from different
+workers and tasks add up, and percentiles can be estimated from the sum.
+The store is a Redis hash per bucket (with a sorted-set index per
+campaign, channel and resolution), or local dicts for
+STORAGE_BACKEND=memory.
+"""
+import bisect
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+from .storage import STORAGE_BACKEND, get_redis
+
+logger = logging.getLogger(__name__)
+
+# Bucket width in seconds per resolution
+RESOLUTIONS = {"minute": 60, "hour": 3600}
+OUTCOMES = ("sent", "failed", "bounced")
+ROLLUP_TTL = int(os.getenv("ROLLUP_TTL", str(30 * 24 * 3600)))
+# Long-running tasks flush at least this often, so stats stay current
+ROLLUP_FLUSH_INTERVAL = float(os.getenv("ROLLUP_FLUSH_INTERVAL", "5"))
+
+# Latency bounds from 10us to ~1 minute, four per doubling
+LATENCY_BOUNDS = tuple(1e-5 * 2 ** (i / 4) for i in range(91))
+
+
+def latency_percentiles(histogram: Dict[int, int], quantiles=(0.5, 0.9, 0.99)) -> Dict[str, Optional[float]]:
+    """Estimated percentiles (seconds) from {bound index: count}, interpolated within a bucket"""
+    total = sum(histogram.values())
+    result: Dict[str, Optional[float]] = {}
+    for q in quantiles:
+        label = f"p{q * 100:g}"
+        if not total:
+            result[label] = None
+            continue
+        rank = q * total
+        seen = 0
+        for index in sorted(histogram):
+            count = histogram[index]
+            if seen + count >= rank:
+                # Index len(LATENCY_BOUNDS) holds everything above the last bound
+                upper = LATENCY_BOUNDS[min(index, len(LATENCY_BOUNDS) - 1)]
+                lower = LATENCY_BOUNDS[index - 1] if index > 0 else 0.0
+                result[label] = round(lower + (upper - lower) * (rank - seen) / count, 6)
+                break
+            seen += count
+    return result
+
+
+class RollupStore(ABC):
+    @abstractmethod
+    def merge(self, campaign_id: str, channel: str, resolution: str, start: int, fields: Dict[str, int]) -> None:
+        """Add counts to one bucket, creating it if needed"""
+
+    def merge_many(self, updates: List[Tuple[str, str, str, int, Dict[str, int]]]) -> None:
+        for update in updates:
+            self.merge(*update)
+
+    @abstractmethod
+    def buckets(self, campaign_id: str, channel: str, resolution: str,
+                start: float = 0, end: float = float("inf")) -> List[Tuple[int, Dict[str, int]]]:
+        """(bucket start, fields) with start <= bucket start <= end, oldest first"""
+
+
+class MemoryRollupStore(RollupStore):
+    def __init__(self):
+        self._buckets: Dict[Tuple[str, str, str], Dict[int, Dict[str, int]]] = {}
+
+    def merge(self, campaign_id, channel, resolution, start, fields):
+        series = self._buckets.setdefault((campaign_id, channel, resolution), {})
+        bucket = series.setdefault(start, {})
+        for field, value in fields.items():
+            bucket[field] = bucket.get(field, 0) + value
+
+    def buckets(self, campaign_id, channel, resolution, start=0, end=float("inf")):
+        series = self._buckets.get((campaign_id, channel, resolution), {})
+        return [(key, dict(series[key])) for key in sorted(series) if start <= key <= end]
+
+
+class RedisRollupStore(RollupStore):
+    prefix = "rollup"
+
+    def _index_key(self, campaign_id: str, channel: str, resolution: str) -> str:
+        return f"{self.prefix}:{campaign_id}:{channel}:{resolution}"
+
+    def merge(self, campaign_id, channel, resolution, start, fields):
+        self.merge_many([(campaign_id, channel, resolution, start, fields)])
+
+    def merge_many(self, updates: List[Tuple[str, str, str, int, Dict[str, int]]]) -> None:
+        """All bucket increments of one flush in a single round-trip"""
+        pipe = get_redis().pipeline(transaction=False)
+        for campaign_id, channel, resolution, start, fields in updates:
+            index = self._index_key(campaign_id, channel, resolution)
+            key = f"{index}:{start}"
+            for field, value in fields.items():
+                pipe.hincrby(key, field, value)
+            pipe.expire(key, ROLLUP_TTL)
+            pipe.zadd(index, {str(start): start})
+            pipe.expire(index, ROLLUP_TTL)
+        pipe.execute()
+
+    def buckets(self, campaign_id, channel, resolution, start=0, end=float("inf")):
+        redis = get_redis()
+        index = self._index_key(campaign_id, channel, resolution)
+        starts = [int(value) for value in redis.zrangebyscore(index, start, "+inf" if end == float("inf") else end)]
+        pipe = redis.pipeline(transaction=False)
+        for bucket_start in starts:
+            pipe.hgetall(f"{index}:{bucket_start}")
+        return [
+            (bucket_start, {field.decode(): int(value) for field, value in data.items()})
+            for bucket_start, data in zip(starts, pipe.execute())
+        ]
+
+
+_store: Optional[RollupStore] = None
+
+
+def get_rollup_store() -> RollupStore:
+    """Rollup store for the configured STORAGE_BACKEND"""
+    global _store
+    if _store is None:
+        _store = MemoryRollupStore() if STORAGE_BACKEND == "memory" else RedisRollupStore()
+    return _store
+
+
+class RollupRecorder:
+    """
+    Per-task accumulator of delivery events. record() is cheap enough to
+    call once per recipient; flush() writes everything accumulated so far.
+    """
+
+    __slots__ = ("campaign_id", "channel", "_minutes", "_flushed_at")
+
+    def __init__(self, campaign_id: str, channel: str):
+        self.campaign_id = campaign_id
+        self.channel = channel
+        self._minutes: Dict[int, Dict[str, int]] = {}
+        self._flushed_at = time.time()
+
+    def record(self, outcome: str, latency: float, count: int = 1, at: Optional[float] = None) -> None:
+        now = time.time() if at is None else at
+        if now - self._flushed_at >= ROLLUP_FLUSH_INTERVAL:
+            try:
+                self.flush()
+            except Exception:
+                # flush() keeps unwritten counts; the next flush retries them
+                logger.exception("Periodic rollup flush failed", extra={
+                    "campaign_id": self.campaign_id, "channel": self.channel,
+                })
+        minute = int(now // 60) * 60
+        bucket = self._minutes.get(minute)
+        if bucket is None:
+            bucket = self._minutes[minute] = {}
+        bucket[outcome] = bucket.get(outcome, 0) + count
+        field = f"lat_{bisect.bisect_left(LATENCY_BOUNDS, latency)}"
+        bucket[field] = bucket.get(field, 0) + count
+
+    def flush(self) -> None:
+        self._flushed_at = time.time()
+        if not self._minutes:
+            return
+        hours: Dict[int, Dict[str, int]] = {}
+        for minute, fields in self._minutes.items():
+            hour = hours.setdefault(minute // 3600 * 3600, {})
+            for field, value in fields.items():
+                hour[field] = hour.get(field, 0) + value
+        updates = [(self.campaign_id, self.channel, "minute", start, fields) for start, fields in self._minutes.items()]
+        updates += [(self.campaign_id, self.channel, "hour", start, fields) for start, fields in hours.items()]
+        get_rollup_store().merge_many(updates)
+        self._minutes = {}
+
+
+def summarize(fields: Dict[str, int]) -> dict:
+    """Outcome counts and latency percentiles of one bucket (or a sum of buckets)"""
+    histogram = {int(field[4:]): value for field, value in fields.items() if field.startswith("lat_")}
+    summary = {outcome: fields.get(outcome, 0) for outcome in OUTCOMES}
+    summary["latency_seconds"] = latency_percentiles(histogram)
+    return summary
+
+
+def campaign_stats(campaign_id: str, channels: Tuple[str, ...], resolution: str = "minute",
+                   start: float = 0, end: float = float("inf")) -> dict:
+    """Time series and totals for a campaign across `channels`, from the rollups alone"""
+    series: Dict[int, Dict[str, int]] = {}
+    store = get_rollup_store()
+    for channel in channels:
+        for bucket_start, fields in store.buckets(campaign_id, channel, resolution, start, end):
+            merged = series.setdefault(bucket_start, {})
+            for field, value in fields.items():
+                merged[field] = merged.get(field, 0) + value
+
+    totals: Dict[str, int] = {}
+    for fields in series.values():
+        for field, value in fields.items():
+            totals[field] = totals.get(field, 0) + value
+    return {
+        "campaign_id": campaign_id,
+        "resolution": resolution,
+        "buckets": [{"start": bucket_start, **summarize(series[bucket_start])} for bucket_start in sorted(series)],
+        "totals": summarize(totals),
+    }
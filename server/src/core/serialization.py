@@ -0,0 +1,65 @@
+import json
+import os
+from typing import Any, Optional
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+# Opt in to the orjson-backed serializer with FAST_JSON=1
+FAST_JSON = os.getenv("FAST_JSON", "0") == "1" and orjson is not None
+
+# Response class used by every router for JSON payloads
+DefaultJSONResponse = ORJSONResponse if FAST_JSON else JSONResponse
+
+
+def _default(obj: Any) -> Any:
+    """Fallback for types neither serializer handles natively (pydantic models)"""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Serialize to UTF-8 JSON bytes using the configured backend"""
+    if FAST_JSON:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(obj, default=_default).encode("utf-8")
+
+
+def dumps(obj: Any) -> str:
+    """Serialize to a JSON string using the configured backend"""
+    if FAST_JSON:
+        return orjson.dumps(obj, default=_default).decode("utf-8")
+    return json.dumps(obj, default=_default)
+
+
+def loads(data: str | bytes) -> Any:
+    """Parse JSON using the configured backend"""
+    if FAST_JSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_response(content: Any, status_code: int = 200) -> JSONResponse:
+    """
+    Build a JSON response directly, bypassing FastAPI's jsonable_encoder.
+
+    Use this for large payloads (CRM, Facebook, scraped websites) where the
+    encoder walk dominates response time. Content must already be made of
+    plain JSON types (dict, list, str, numbers, bool, None).
+    """
+    return DefaultJSONResponse(content=content, status_code=status_code)
+
+
+def sse_event(data: Any, event: Optional[str] = None, id: Optional[str] = None) -> dict:
+    """Encode a payload as an SSE message dict for EventSourceResponse"""
+    message = {"data": dumps(data)}
+    if event:
+        message["event"] = event
+    if id is not None:
+        message["id"] = id
+    return message
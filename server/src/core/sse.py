@@ -0,0 +1,32 @@
+import time
+from typing import AsyncIterator
+
+from .metrics import Gauge, Histogram
+
+SSE_ACTIVE_CONNECTIONS = Gauge(
+    "sse_active_connections", "Open server-sent event streams", ["route"]
+)
+SSE_TIME_TO_FIRST_EVENT = Histogram(
+    "sse_time_to_first_event_seconds", "Time from stream start to the first event", ["route"]
+)
+SSE_EVENTS_PER_STREAM = Histogram(
+    "sse_events_per_stream", "Events sent per stream", ["route"],
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000),
+)
+
+
+async def instrument_stream(route: str, events: AsyncIterator[dict]) -> AsyncIterator[dict]:
+    """Wrap an SSE event generator with connection, latency and volume metrics"""
+    active = SSE_ACTIVE_CONNECTIONS.labels(route)
+    start = time.perf_counter()
+    sent = 0
+    active.inc()
+    try:
+        async for event in events:
+            if sent == 0:
+                SSE_TIME_TO_FIRST_EVENT.labels(route).observe(time.perf_counter() - start)
+            sent += 1
+            yield event
+    finally:
+        active.dec()
+        SSE_EVENTS_PER_STREAM.labels(route).observe(sent)
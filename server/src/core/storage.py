@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import os
+from typing import Optional
+
+from .lazy import lazy_import
+
+# Loaded with the first client, so memory-backed processes never import it
+redis = lazy_import("redis")
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# "redis" for shared state across API and worker processes,
+# "memory" for single-process setups (tests, Celery eager mode)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "redis")
+
+_redis_client: Optional[redis.Redis] = None
+
+
+def get_redis() -> redis.Redis:
+    """Shared, lazily created Redis client (connection pooled)"""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(REDIS_URL)
+    return _redis_client
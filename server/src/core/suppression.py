@@ -0,0 +1,330 @@
+"""
+Suppression lists (bounces, unsubscribes) and audience screening.
+
+The exact list lives in the configured STORAGE_BACKEND: a Redis SET
+shared by API and worker processes, or a local set. Each process keeps a
+Bloom filter over it, so screening a large audience costs one local probe
+per address. Only the few Bloom hits are checked against the exact list,
+so false positives never drop a recipient and removals take effect
+immediately.
+
+Additions are also appended to a Redis log. Other processes apply them to
+their filter incrementally on their next screen, without reloading the
+whole list. They reload fully only if the log has been trimmed past what
+they have seen.
+"""
+import logging
+import math
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from .metrics import Counter
+from .storage import STORAGE_BACKEND, get_redis
+
+logger = logging.getLogger(__name__)
+
+# Expected suppressed addresses per channel; the filter stays correct past
+# it, only with more exact lookups
+SUPPRESSION_CAPACITY = int(os.getenv("SUPPRESSION_CAPACITY", "5000000"))
+SUPPRESSION_ERROR_RATE = float(os.getenv("SUPPRESSION_ERROR_RATE", "0.01"))
+# Redis log entries kept for incremental sync before the oldest half is trimmed
+SUPPRESSION_LOG_MAX = int(os.getenv("SUPPRESSION_LOG_MAX", "1000000"))
+# Exact lookups per Redis round-trip
+SUPPRESSION_LOOKUP_BATCH = 10000
+
+SUPPRESSION_SCREENED = Counter(
+    "suppression_screened_total", "Audience entries screened before enqueueing", ["channel", "outcome"]
+)
+
+
+class BloomFilter:
+    """
+    Bit-array Bloom filter with three probes from one 64-bit hash (double
+    hashing). It uses the process's str hash, so it is always built locally
+    from the exact list and never shared.
+    """
+
+    __slots__ = ("mask", "bits")
+
+    def __init__(self, capacity: int, error_rate: float):
+        # Optimal bits per element for the error rate, rounded up to a power of two
+        wanted = max(1024, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        size = 1 << (wanted - 1).bit_length()
+        self.mask = size - 1
+        self.bits = bytearray(size >> 3)
+
+    def add(self, key: str) -> None:
+        self.update((key,))
+
+    def update(self, keys: Iterable[str]) -> None:
+        bits, mask = self.bits, self.mask
+        # The mask is under 32 bits, so the raw hash stands in for its low half
+        for key in keys:
+            h = hash(key)
+            h2 = (h >> 32) & 0xFFFFFFFF | 1
+            p = h & mask
+            bits[p >> 3] |= 1 << (p & 7)
+            p = (h + h2) & mask
+            bits[p >> 3] |= 1 << (p & 7)
+            p = (h + 2 * h2) & mask
+            bits[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, key: str) -> bool:
+        h = hash(key)
+        h2 = (h >> 32) & 0xFFFFFFFF | 1
+        bits, mask = self.bits, self.mask
+        for probe in (h, h + h2, h + 2 * h2):
+            p = probe & mask
+            if not bits[p >> 3] >> (p & 7) & 1:
+                return False
+        return True
+
+
+class SuppressionStore(ABC):
+    """Exact suppression list for one channel"""
+
+    @abstractmethod
+    def add(self, keys: Sequence[str]) -> None:
+        ...
+
+    @abstractmethod
+    def remove(self, keys: Sequence[str]) -> None:
+        ...
+
+    @abstractmethod
+    def contains_many(self, keys: Sequence[str]) -> List[bool]:
+        ...
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
+
+    @abstractmethod
+    def log_position(self) -> Tuple[int, int]:
+        """(first, end) absolute positions of the addition log"""
+
+    @abstractmethod
+    def log_since(self, position: int) -> Optional[Tuple[List[str], int]]:
+        """
+        Additions logged at or after `position`, and the new end position.
+        None when `position` has been trimmed from the log.
+        """
+
+    @abstractmethod
+    def scan(self) -> Iterable[str]:
+        ...
+
+
+class MemorySuppressionStore(SuppressionStore):
+    def __init__(self):
+        self._keys = set()
+
+    def add(self, keys: Sequence[str]) -> None:
+        self._keys.update(keys)
+
+    def remove(self, keys: Sequence[str]) -> None:
+        self._keys.difference_update(keys)
+
+    def contains_many(self, keys: Sequence[str]) -> List[bool]:
+        return [key in self._keys for key in keys]
+
+    def count(self) -> int:
+        return len(self._keys)
+
+    def log_position(self) -> Tuple[int, int]:
+        # Single process: the filter is updated directly by add()
+        return 0, 0
+
+    def log_since(self, position: int) -> Optional[Tuple[List[str], int]]:
+        return [], position
+
+    def scan(self) -> Iterable[str]:
+        return list(self._keys)
+
+
+class RedisSuppressionStore(SuppressionStore):
+    def __init__(self, channel: str):
+        self.key = f"suppression:{channel}"
+        self.log_key = f"suppression:{channel}:log"
+        self.base_key = f"suppression:{channel}:log_base"
+
+    def add(self, keys: Sequence[str]) -> None:
+        if not keys:
+            return
+        redis = get_redis()
+        pipe = redis.pipeline()
+        pipe.sadd(self.key, *keys)
+        pipe.rpush(self.log_key, *keys)
+        length = pipe.execute()[1]
+        if length > SUPPRESSION_LOG_MAX:
+            # Drop the oldest half; readers behind the new base reload fully
+            trim = length // 2
+            pipe = redis.pipeline()
+            pipe.ltrim(self.log_key, trim, -1)
+            pipe.incrby(self.base_key, trim)
+            pipe.execute()
+
+    def remove(self, keys: Sequence[str]) -> None:
+        if keys:
+            get_redis().srem(self.key, *keys)
+
+    def contains_many(self, keys: Sequence[str]) -> List[bool]:
+        redis = get_redis()
+        found: List[bool] = []
+        for start in range(0, len(keys), SUPPRESSION_LOOKUP_BATCH):
+            found += [bool(hit) for hit in redis.smismember(self.key, keys[start:start + SUPPRESSION_LOOKUP_BATCH])]
+        return found
+
+    def count(self) -> int:
+        return get_redis().scard(self.key)
+
+    def log_position(self) -> Tuple[int, int]:
+        pipe = get_redis().pipeline()
+        pipe.get(self.base_key)
+        pipe.llen(self.log_key)
+        base, length = pipe.execute()
+        base = int(base or 0)
+        return base, base + length
+
+    def log_since(self, position: int) -> Optional[Tuple[List[str], int]]:
+        from redis.exceptions import WatchError
+
+        # A trim in add() moves the base and the list together in one
+        # transaction; WATCH retries the read if one lands in between
+        with get_redis().pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(self.base_key)
+                    base = int(pipe.get(self.base_key) or 0)
+                    if position < base:
+                        return None
+                    pipe.multi()
+                    pipe.lrange(self.log_key, position - base, -1)
+                    keys = pipe.execute()[0]
+                    return [key.decode() for key in keys], position + len(keys)
+                except WatchError:
+                    continue
+
+    def scan(self) -> Iterable[str]:
+        for key in get_redis().sscan_iter(self.key, count=10000):
+            yield key.decode()
+
+
+class SuppressionList:
+    """Bloom-filtered view of one channel's exact suppression list"""
+
+    def __init__(self, channel: str, store: SuppressionStore, casefold: bool):
+        self.channel = channel
+        self.store = store
+        self.casefold = casefold
+        self._lock = threading.Lock()
+        self._bloom: Optional[BloomFilter] = None
+        self._position = 0
+
+    def normalize(self, address: str) -> str:
+        return address.strip().lower() if self.casefold else address.strip()
+
+    def _rebuild(self) -> None:
+        _, end = self.store.log_position()
+        bloom = BloomFilter(SUPPRESSION_CAPACITY, SUPPRESSION_ERROR_RATE)
+        bloom.update(self.store.scan())
+        self._bloom, self._position = bloom, end
+        logger.info("Suppression filter rebuilt", extra={"channel": self.channel, "position": end})
+
+    def sync(self) -> BloomFilter:
+        """Bring the local filter up to date with additions from other processes"""
+        with self._lock:
+            if self._bloom is None:
+                self._rebuild()
+            else:
+                first, end = self.store.log_position()
+                if self._position < first:
+                    self._rebuild()
+                elif end > self._position:
+                    update = self.store.log_since(self._position)
+                    if update is None:
+                        # Trimmed past our position since log_position()
+                        self._rebuild()
+                    else:
+                        keys, self._position = update
+                        self._bloom.update(keys)
+            return self._bloom
+
+    def add(self, addresses: Iterable[str]) -> int:
+        keys = list({self.normalize(address) for address in addresses})
+        if not keys:
+            return 0
+        self.store.add(keys)
+        self.sync().update(keys)
+        return len(keys)
+
+    def remove(self, addresses: Iterable[str]) -> None:
+        # The filter keeps the stale bits; the exact check lets the address through
+        self.store.remove([self.normalize(address) for address in addresses])
+
+    def contains(self, address: str) -> bool:
+        key = self.normalize(address)
+        return key in self.sync() and self.store.contains_many([key])[0]
+
+    def screen(self, addresses: Sequence[str]) -> Tuple[List[int], int, int]:
+        """
+        Indices of the addresses to keep, in order: the first occurrence of
+        each normalized address, minus suppressed ones. Also returns the
+        duplicate and suppressed counts.
+        """
+        bloom = self.sync()
+        bits, mask = bloom.bits, bloom.mask
+        # Audiences are validated already, so only case needs normalizing
+        keys = [address.lower() for address in addresses] if self.casefold else addresses
+
+        seen = set()
+        mark = seen.add
+        keep: List[int] = []
+        candidates: List[int] = []
+        # BloomFilter.__contains__, inlined: this loop runs once per recipient,
+        # and most addresses miss on the first probe
+        for idx, key in enumerate(keys):
+            if key in seen:
+                continue
+            mark(key)
+            h = hash(key)
+            p = h & mask
+            if bits[p >> 3] >> (p & 7) & 1:
+                h2 = (h >> 32) & 0xFFFFFFFF | 1
+                p = (h + h2) & mask
+                if bits[p >> 3] >> (p & 7) & 1:
+                    p = (h + 2 * h2) & mask
+                    if bits[p >> 3] >> (p & 7) & 1:
+                        candidates.append(idx)
+                        continue
+            keep.append(idx)
+
+        suppressed = 0
+        if candidates:
+            found = self.store.contains_many([keys[idx] for idx in candidates])
+            passed = [idx for idx, hit in zip(candidates, found) if not hit]
+            suppressed = len(candidates) - len(passed)
+            if passed:
+                keep = sorted(keep + passed)
+
+        duplicates = len(keys) - len(seen)
+        SUPPRESSION_SCREENED.labels(self.channel, "kept").inc(len(keep))
+        SUPPRESSION_SCREENED.labels(self.channel, "duplicate").inc(duplicates)
+        SUPPRESSION_SCREENED.labels(self.channel, "suppressed").inc(suppressed)
+        return keep, duplicates, suppressed
+
+
+_lists = {}
+_lists_lock = threading.Lock()
+
+
+def get_suppression_list(channel: str) -> SuppressionList:
+    """Suppression list of a channel for the configured STORAGE_BACKEND"""
+    with _lists_lock:
+        suppression = _lists.get(channel)
+        if suppression is None:
+            store = MemorySuppressionStore() if STORAGE_BACKEND == "memory" else RedisSuppressionStore(channel)
+            suppression = _lists[channel] = SuppressionList(channel, store, casefold=channel == "email")
+        return suppression
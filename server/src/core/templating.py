@@ -0,0 +1,180 @@
+"""
+Campaign message templates with `{field}` merge fields.
+
+A message is compiled once into a single %-format string plus the list of
+fields it uses, then rendered for whole recipient batches at a time.
+Renders are cached per distinct set of field values, so recipients that
+share a name (or have none) cost a single dict lookup. Cached renders of
+all templates in a worker share one TEMPLATE_CACHE_BUDGET; a template
+returns its share when it drops its cache or is garbage collected.
+
+    Hi {name|there}, your order ships today.
+
+`{name|there}` falls back to "there" when the recipient has no name.
+`{{` and `}}` are literal braces. Anything that is not a simple
+`{identifier}` field is left as plain text. This includes malformed
+braces and `{0}` or `{a.b}` fields.
+"""
+import os
+import string
+import threading
+from functools import lru_cache
+from itertools import repeat
+from typing import Dict, List, Mapping, Optional, Sequence
+
+# Distinct rendered variants kept per template, and across all templates
+TEMPLATE_CACHE_SIZE = int(os.getenv("TEMPLATE_CACHE_SIZE", "100000"))
+TEMPLATE_CACHE_BUDGET = int(os.getenv("TEMPLATE_CACHE_BUDGET", "250000"))
+# Recipients rendered per batch when rendering lazily
+TEMPLATE_RENDER_BATCH = int(os.getenv("TEMPLATE_RENDER_BATCH", "1000"))
+# The cache is dropped if its hit rate over the first CACHE_PROBE_RENDERS
+# renders is below CACHE_MIN_HIT_RATE
+CACHE_PROBE_RENDERS = 20000
+CACHE_MIN_HIT_RATE = 0.2
+
+
+class CacheBudget:
+    """Cache entries shared by all templates; renders run on several threads"""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def take(self, wanted: int) -> int:
+        """Reserve up to `wanted` entries; returns how many were granted"""
+        with self._lock:
+            granted = max(0, min(wanted, self.total - self.used))
+            self.used += granted
+            return granted
+
+    def give_back(self, count: int) -> None:
+        with self._lock:
+            self.used -= count
+
+
+_budget = CacheBudget(TEMPLATE_CACHE_BUDGET)
+
+
+class Template:
+    __slots__ = ("source", "fields", "defaults", "_format", "_cache", "_cache_size", "_renders", "_misses")
+
+    def __init__(self, source: str, cache_size: int = TEMPLATE_CACHE_SIZE):
+        self.source = source
+        self.fields: List[str] = []
+        self.defaults: List[str] = []
+        self._cache: Optional[Dict[object, str]] = {}
+        self._cache_size = cache_size
+        self._renders = 0
+        self._misses = 0
+
+        parts = []
+        try:
+            parsed = list(string.Formatter().parse(source))
+        except ValueError:
+            # Unbalanced braces: not a template, send it verbatim
+            parsed = [(source, None, None, None)]
+
+        for literal, field, spec, conversion in parsed:
+            parts.append(literal.replace("%", "%%"))
+            if field is None:
+                continue
+            name, _, default = field.partition("|")
+            if not name.isidentifier() or spec or conversion:
+                # Not a merge field; keep the original text
+                parts.append("{" + field + ("!" + conversion if conversion else "")
+                             + (":" + spec if spec else "") + "}")
+                continue
+            self.fields.append(name)
+            self.defaults.append(default)
+            parts.append("%s")
+
+        self._format = "".join(parts)
+        if not self.fields:
+            # No merge fields: the format string is the final text
+            self._format = self._format.replace("%%", "%")
+
+    def __del__(self):
+        self._drop_cache()
+
+    def __repr__(self) -> str:
+        return f"Template({self.source!r}, fields={self.fields})"
+
+    def _drop_cache(self) -> None:
+        cache, self._cache = self._cache, None
+        if cache:
+            _budget.give_back(len(cache))
+
+    @property
+    def is_static(self) -> bool:
+        return not self.fields
+
+    def render(self, **values: Optional[str]) -> str:
+        """Render one message"""
+        return self.render_batch({name: [value] for name, value in values.items()}, 1)[0]
+
+    def render_batch(self, columns: Mapping[str, Sequence[Optional[str]]], count: int) -> List[str]:
+        """
+        Render `count` messages from columnar values, e.g.
+        {"name": names, "email": emails}. Missing columns render their default.
+        """
+        fmt = self._format
+        if not self.fields:
+            return [fmt] * count
+
+        # Defaults are applied column-wise, so every key is final render input
+        cols = []
+        for name, default in zip(self.fields, self.defaults):
+            column = columns.get(name)
+            if column is None:
+                cols.append([default] * count)
+            else:
+                cols.append([value if value else default for value in column])
+        keys = cols[0] if len(cols) == 1 else zip(*cols)
+
+        if self._cache is None:
+            return [fmt % key for key in keys]
+
+        cache = self._cache
+        get = cache.get
+        # Reserve room for this batch up front and return what is left unused
+        room = _budget.take(min(count, self._cache_size - len(cache)))
+        misses = 0
+        out = []
+        append = out.append
+        for key in keys:
+            text = get(key)
+            if text is None:
+                text = fmt % key
+                misses += 1
+                if room > 0:
+                    cache[key] = text
+                    room -= 1
+            append(text)
+        if room:
+            _budget.give_back(room)
+
+        # Per-recipient fields (email, phone) make every render unique; stop
+        # paying for lookups once the probe shows the cache is not helping
+        if self._renders < CACHE_PROBE_RENDERS:
+            self._renders += count
+            self._misses += misses
+            if (self._renders >= CACHE_PROBE_RENDERS
+                    and self._misses > self._renders * (1 - CACHE_MIN_HIT_RATE)):
+                self._drop_cache()
+        return out
+
+    def iter_render(self, columns: Mapping[str, Sequence[Optional[str]]], count: int,
+                    batch_size: int = TEMPLATE_RENDER_BATCH):
+        """Yield messages in order, rendering `batch_size` recipients at a time"""
+        for start in range(0, count, batch_size):
+            end = min(start + batch_size, count)
+            yield from self.render_batch(
+                {name: column[start:end] for name, column in columns.items()}, end - start
+            )
+
+
+@lru_cache(maxsize=256)
+def compile_template(source: str) -> Template:
+    """Compile a message once per process; batch tasks of one campaign share it"""
+    return Template(source)
@@ -1,14 +1,35 @@
 import asyncio
-import json
+import logging
+import os
 import random
+from contextlib import asynccontextmanager
 from datetime import datetime
 from enum import Enum
-from typing import Dict
+from typing import Dict, Optional
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
 from sse_starlette.sse import EventSourceResponse
 from src.api.routes import register_routes
+from src.core import celery_async
+from src.core.backpressure import deliver
+from src.core.broadcast import create_hub
+from src.core.log import setup_logging, shutdown_logging
+from src.core.profiling import PROFILE_ENABLED, ProfilingMiddleware
+from src.core.serialization import DefaultJSONResponse, sse_event
+from src.core.sse import instrument_stream
+from src.core.storage import REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+# "per_client" generates an independent /stream per connection, "broadcast"
+# runs one producer and fans its events out to every connection
+STREAM_MODE = os.getenv("STREAM_MODE", "per_client")
+
+# "memory" shares the producer within a worker, "redis" across workers/nodes
+BROADCAST_BACKEND = os.getenv("BROADCAST_BACKEND", "memory")
+
+hub = create_hub(BROADCAST_BACKEND, REDIS_URL)
 
 
 class MarkdownType(str, Enum):
@@ -21,8 +42,19 @@ class MarkdownType(str, Enum):
     DIVIDER = "divider"
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logging()
+    await hub.start()
+    yield
+    await hub.stop()
+    # Release the threads used for blocking Celery/Redis calls
+    celery_async.shutdown()
+    shutdown_logging()
+
+
 # Initialize the FastAPI app
-app = FastAPI()
+app = FastAPI(default_response_class=DefaultJSONResponse, lifespan=lifespan)
 
 # Add CORS middleware to allow requests from our Next.js frontend
 # This is crucial for development when frontend and backend are on different ports
@@ -34,6 +66,10 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+# Per-request span profiling; only installed when PROFILE_ENABLED=1
+if PROFILE_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
 def generate_markdown_data() -> Dict[str, str]:
     """
     Generates a markdown document with various markdown elements.
@@ -63,40 +99,70 @@ def generate_markdown_data() -> Dict[str, str]:
     }
 # This is our event generator. It will run in a loop,
 # yielding data whenever it's ready.
-async def markdown_event_generator(request: Request):
+async def markdown_event_generator(request: Request, start_after: int = 0):
     """
     Generates server-sent events with markdown content. The loop will stop if the client disconnects.
+    Numbering continues after `start_after` when a client reconnects.
     """
-    count = 0
+    count = start_after
     while True:
         # Check if the client has disconnected
         if await request.is_disconnected():
-            print("Markdown client disconnected.")
+            logger.info("Markdown client disconnected")
             break
 
         # Generate markdown data
         count += 1
         markdown_data = generate_markdown_data()
         markdown_data["id"] = count
-        
-        # Convert to JSON string
-        json_data = json.dumps(markdown_data)
 
         # Yield the data in the format required by SSE
-        yield {"data": json_data}
+        yield sse_event(markdown_data, id=str(count))
 
         # Wait for 1-3 seconds before sending the next markdown chunk
         await asyncio.sleep(random.uniform(1.0, 3.0))
 
 
+async def markdown_broadcast_producer():
+    """
+    Single shared markdown stream for broadcast mode. Started by the hub with
+    the first subscriber and stopped after the last one leaves.
+    """
+    count = 0
+    while True:
+        count += 1
+        markdown_data = generate_markdown_data()
+        markdown_data["id"] = count
+        yield markdown_data
+
+        await asyncio.sleep(random.uniform(1.0, 3.0))
+
+
+hub.register_producer("markdown", markdown_broadcast_producer)
+
+
+async def markdown_broadcast_generator(last_event_id: Optional[str] = None):
+    """
+    Relays the shared markdown stream to one client. Events arrive already
+    encoded; a client that falls behind is handled by the hub's lag policy.
+    """
+    async with hub.subscribe("markdown", last_event_id) as subscription:
+        async for event in subscription:
+            yield event
+
+
 # Define the SSE endpoints
 @app.get("/stream")
-async def stream_events(request: Request):
+async def stream_events(request: Request, last_event_id: Optional[str] = Header(default=None)):
     """
     This endpoint establishes the SSE connection and returns the event stream.
     """
-    return EventSourceResponse(markdown_event_generator(request))
-    # return EventSourceResponse(event_generator(request))
+    if STREAM_MODE == "broadcast":
+        events = markdown_broadcast_generator(last_event_id)
+    else:
+        start_after = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+        events = deliver("markdown", markdown_event_generator(request, start_after))
+    return EventSourceResponse(instrument_stream("markdown", events))
 
 
 